@@ -1,18 +1,19 @@
 import asyncio
+import os
+import sys
 from logging.config import fileConfig
+
+from dotenv import load_dotenv
 from sqlalchemy import pool
 from sqlalchemy.ext.asyncio import async_engine_from_config
+
 from alembic import context
-import os
-import sys
-from dotenv import load_dotenv
 
 # Add the parent directory to sys.path so we can import 'app'
 # Assuming alembic is run from the 'backend' folder
-sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), "..")))
 
 from app.database import Base
-from app.shared.gifts.models import User, Gift, Milestone, Notification, MediaMessage, OverrideWindow
 
 load_dotenv()
 
@@ -31,6 +32,7 @@ if config.config_file_name is not None:
 
 target_metadata = Base.metadata
 
+
 def run_migrations_offline() -> None:
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
@@ -42,11 +44,13 @@ def run_migrations_offline() -> None:
     with context.begin_transaction():
         context.run_migrations()
 
+
 def do_run_migrations(connection):
     context.configure(connection=connection, target_metadata=target_metadata)
     with context.begin_transaction():
         context.run_migrations()
 
+
 async def run_migrations_online() -> None:
     connectable = async_engine_from_config(
         config.get_section(config.config_ini_section, {}),
@@ -57,6 +61,7 @@ async def run_migrations_online() -> None:
         await connection.run_sync(do_run_migrations)
     await connectable.dispose()
 
+
 if context.is_offline_mode():
     run_migrations_offline()
 else:
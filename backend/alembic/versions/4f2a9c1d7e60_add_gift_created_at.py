@@ -0,0 +1,39 @@
+"""add_gift_created_at
+
+Revision ID: 4f2a9c1d7e60
+Revises: ccd86ebc053a
+Create Date: 2026-10-18 15:02:11.418530
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "4f2a9c1d7e60"
+down_revision: Union[str, Sequence[str], None] = "ccd86ebc053a"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing gifts are stamped with the migration time so date-range exports include
+    # them
+    op.add_column(
+        "gifts",
+        sa.Column(
+            "created_at",
+            sa.DateTime(),
+            server_default=sa.text("timezone('utc', now())"),
+            nullable=True,
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("gifts", "created_at")
@@ -0,0 +1,72 @@
+"""add_notification_outbox
+
+Revision ID: 8d3e61b0a5f2
+Revises: 4f2a9c1d7e60
+Create Date: 2026-10-18 17:12:40.206153
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8d3e61b0a5f2"
+down_revision: Union[str, Sequence[str], None] = "4f2a9c1d7e60"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "notification_outbox",
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column("dedup_key", sa.String(length=255), nullable=True),
+        sa.Column("recipient_id", sa.UUID(), nullable=False),
+        # The enum type already exists for notifications.role
+        sa.Column(
+            "role",
+            postgresql.ENUM(
+                "grandparent",
+                "grandchild",
+                "trustee",
+                name="user_roles_context",
+                create_type=False,
+            ),
+            nullable=False,
+        ),
+        sa.Column("event_type", sa.String(length=100), nullable=False),
+        sa.Column("message", sa.Text(), nullable=False),
+        sa.Column("action_url", sa.String(length=255), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("available_at", sa.DateTime(), nullable=False),
+        sa.Column(
+            "attempts", sa.Integer(), server_default=sa.text("0"), nullable=False
+        ),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("dispatched_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["recipient_id"],
+            ["users.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("dedup_key"),
+    )
+    op.create_index(
+        "ix_notification_outbox_pending_available_at",
+        "notification_outbox",
+        ["available_at"],
+        postgresql_where=sa.text("dispatched_at IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "ix_notification_outbox_pending_available_at", table_name="notification_outbox"
+    )
+    op.drop_table("notification_outbox")
@@ -0,0 +1,50 @@
+"""key_gift_dashboards_on_created_at
+
+Revision ID: 9b4e7d2c1f38
+Revises: f2d8b6c4a019
+Create Date: 2026-10-18 23:41:05.227914
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "9b4e7d2c1f38"
+down_revision: Union[str, Sequence[str], None] = "f2d8b6c4a019"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Dashboards are keyset-paginated on (created_at, id), so every gift needs a
+    # creation time
+    op.execute(
+        "UPDATE gifts SET created_at = timezone('utc', now()) WHERE created_at IS NULL"
+    )
+    op.alter_column("gifts", "created_at", existing_type=sa.DateTime(), nullable=False)
+    op.create_index(
+        "ix_gifts_grandparent_id_created_at_id",
+        "gifts",
+        ["grandparent_id", "created_at", "id"],
+    )
+    op.create_index(
+        "ix_gifts_grandchild_id_created_at_id",
+        "gifts",
+        ["grandchild_id", "created_at", "id"],
+    )
+    op.drop_index("ix_gifts_grandchild_id_id", table_name="gifts")
+    op.drop_index("ix_gifts_grandparent_id_id", table_name="gifts")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index("ix_gifts_grandparent_id_id", "gifts", ["grandparent_id", "id"])
+    op.create_index("ix_gifts_grandchild_id_id", "gifts", ["grandchild_id", "id"])
+    op.drop_index("ix_gifts_grandchild_id_created_at_id", table_name="gifts")
+    op.drop_index("ix_gifts_grandparent_id_created_at_id", table_name="gifts")
+    op.alter_column("gifts", "created_at", existing_type=sa.DateTime(), nullable=True)
@@ -0,0 +1,66 @@
+"""add_hot_lookup_indexes
+
+Revision ID: b19859b94414
+Revises: 055c17778db0
+Create Date: 2026-10-18 11:40:12.481305
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b19859b94414"
+down_revision: Union[str, Sequence[str], None] = "055c17778db0"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Dashboards: gifts by owner, keyset-ordered by id
+    op.create_index("ix_gifts_grandparent_id_id", "gifts", ["grandparent_id", "id"])
+    op.create_index("ix_gifts_grandchild_id_id", "gifts", ["grandchild_id", "id"])
+    # Notification feed, plus a partial index that only holds the unread rows the bell
+    # polls
+    op.create_index(
+        "ix_notifications_recipient_id_created_at",
+        "notifications",
+        ["recipient_id", "created_at"],
+    )
+    op.create_index(
+        "ix_notifications_unread_recipient_id_created_at",
+        "notifications",
+        ["recipient_id", "created_at"],
+        postgresql_where=sa.text("is_read = false"),
+    )
+    # Child rows loaded per gift
+    op.create_index("ix_milestones_gift_id", "milestones", ["gift_id"])
+    op.create_index("ix_media_messages_gift_id", "media_messages", ["gift_id"])
+    op.create_index("ix_override_windows_gift_id", "override_windows", ["gift_id"])
+    # Expiry sweeps only care about windows that are still open
+    op.create_index(
+        "ix_override_windows_open_expires_at",
+        "override_windows",
+        ["expires_at"],
+        postgresql_where=sa.text("status = 'Open'"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_override_windows_open_expires_at", table_name="override_windows")
+    op.drop_index("ix_override_windows_gift_id", table_name="override_windows")
+    op.drop_index("ix_media_messages_gift_id", table_name="media_messages")
+    op.drop_index("ix_milestones_gift_id", table_name="milestones")
+    op.drop_index(
+        "ix_notifications_unread_recipient_id_created_at", table_name="notifications"
+    )
+    op.drop_index(
+        "ix_notifications_recipient_id_created_at", table_name="notifications"
+    )
+    op.drop_index("ix_gifts_grandchild_id_id", table_name="gifts")
+    op.drop_index("ix_gifts_grandparent_id_id", table_name="gifts")
@@ -0,0 +1,44 @@
+"""add_notification_counters
+
+Revision ID: c7b5e2a91d34
+Revises: 8d3e61b0a5f2
+Create Date: 2026-10-18 19:05:12.481337
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c7b5e2a91d34"
+down_revision: Union[str, Sequence[str], None] = "8d3e61b0a5f2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "notification_counters",
+        sa.Column("user_id", sa.UUID(), nullable=False),
+        sa.Column("unread", sa.Integer(), server_default=sa.text("0"), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["users.id"],
+        ),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+    # Backfill from the unread partial index
+    op.execute(
+        "INSERT INTO notification_counters (user_id, unread) "
+        "SELECT recipient_id, count(*) FROM notifications "
+        "WHERE is_read = false GROUP BY recipient_id"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("notification_counters")
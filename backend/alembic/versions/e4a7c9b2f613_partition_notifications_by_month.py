@@ -0,0 +1,137 @@
+"""partition_notifications_by_month
+
+Revision ID: e4a7c9b2f613
+Revises: c7b5e2a91d34
+Create Date: 2026-10-18 20:41:09.372815
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e4a7c9b2f613"
+down_revision: Union[str, Sequence[str], None] = "c7b5e2a91d34"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = "id, recipient_id, role, event_type, message, is_read, action_url, created_at"
+INDEXES = (
+    "ix_notifications_recipient_id_created_at",
+    "ix_notifications_unread_recipient_id_created_at",
+)
+# Months created past the current one; later months come from
+# app.shared.notifications.retention
+MONTHS_AHEAD = 3
+
+
+def _rename(old_table, new_table):
+    op.rename_table(old_table, new_table)
+    op.execute(f"ALTER INDEX {old_table}_pkey RENAME TO {new_table}_pkey")
+    op.execute(
+        f"ALTER TABLE {new_table} RENAME CONSTRAINT {old_table}_recipient_id_fkey "
+        f"TO {new_table}_recipient_id_fkey"
+    )
+    for name in INDEXES:
+        op.execute(
+            f"ALTER INDEX {name} RENAME TO {name.replace(old_table, new_table, 1)}"
+        )
+
+
+def _create_notifications(partitioned):
+    # created_at joins the primary key when partitioned, since unique constraints must
+    # include the partition key
+    primary_key = ("id", "created_at") if partitioned else ("id",)
+    kw = {"postgresql_partition_by": "RANGE (created_at)"} if partitioned else {}
+    op.create_table(
+        "notifications",
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column("recipient_id", sa.UUID(), nullable=False),
+        sa.Column(
+            "role",
+            postgresql.ENUM(
+                "grandparent",
+                "grandchild",
+                "trustee",
+                name="user_roles_context",
+                create_type=False,
+            ),
+            nullable=False,
+        ),
+        sa.Column("event_type", sa.String(length=100), nullable=False),
+        sa.Column("message", sa.Text(), nullable=False),
+        sa.Column("is_read", sa.Boolean(), nullable=True),
+        sa.Column("action_url", sa.String(length=255), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=not partitioned),
+        # Named explicitly: while the old table's partitions still hold this name, the
+        # default would become ..._fkey1 and a later _rename would not find it
+        sa.ForeignKeyConstraint(
+            ["recipient_id"], ["users.id"], name="notifications_recipient_id_fkey"
+        ),
+        sa.PrimaryKeyConstraint(*primary_key),
+        **kw,
+    )
+    op.create_index(
+        "ix_notifications_recipient_id_created_at",
+        "notifications",
+        ["recipient_id", "created_at"],
+    )
+    op.create_index(
+        "ix_notifications_unread_recipient_id_created_at",
+        "notifications",
+        ["recipient_id", "created_at"],
+        postgresql_where=sa.text("is_read = false"),
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _rename("notifications", "notifications_unpartitioned")
+    _create_notifications(partitioned=True)
+    op.execute("CREATE TABLE notifications_default PARTITION OF notifications DEFAULT")
+    # One partition per month from the oldest row through MONTHS_AHEAD months from now
+    op.execute(f"""
+        DO $$
+        DECLARE month date;
+        BEGIN
+            FOR month IN SELECT generate_series(
+                date_trunc('month', coalesce(
+                    (SELECT min(created_at) FROM notifications_unpartitioned),
+                    now() AT TIME ZONE 'utc'
+                )),
+                date_trunc('month', now() AT TIME ZONE 'utc')
+                    + interval '{MONTHS_AHEAD} months',
+                interval '1 month'
+            )::date LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF notifications '
+                        || 'FOR VALUES FROM (%L) TO (%L)',
+                    'notifications_' || to_char(month, 'YYYY_MM'),
+                    month, month + interval '1 month'
+                );
+            END LOOP;
+        END $$
+    """)
+    op.execute(
+        f"INSERT INTO notifications ({COLUMNS}) "
+        "SELECT id, recipient_id, role, event_type, message, is_read, action_url, "
+        "coalesce(created_at, now() AT TIME ZONE 'utc') "
+        "FROM notifications_unpartitioned"
+    )
+    op.drop_table("notifications_unpartitioned")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _rename("notifications", "notifications_partitioned")
+    _create_notifications(partitioned=False)
+    op.execute(
+        f"INSERT INTO notifications ({COLUMNS}) "
+        f"SELECT {COLUMNS} FROM notifications_partitioned"
+    )
+    # Drops the partitions with it; archived (detached) months are left alone
+    op.drop_table("notifications_partitioned")
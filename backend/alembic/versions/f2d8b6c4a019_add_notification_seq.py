@@ -0,0 +1,56 @@
+"""add_notification_seq
+
+Revision ID: f2d8b6c4a019
+Revises: e4a7c9b2f613
+Create Date: 2026-10-18 22:14:37.905112
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f2d8b6c4a019"
+down_revision: Union[str, Sequence[str], None] = "e4a7c9b2f613"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(sa.schema.CreateSequence(sa.Sequence("notifications_seq_seq")))
+    op.add_column("notifications", sa.Column("seq", sa.BigInteger(), nullable=True))
+    # Existing rows are numbered in (created_at, id) order, the order streams resumed in
+    # until now
+    op.execute(
+        "UPDATE notifications SET seq = numbered.seq "
+        "FROM (SELECT id, created_at, "
+        "row_number() OVER (ORDER BY created_at, id) AS seq "
+        "FROM notifications) numbered "
+        "WHERE notifications.id = numbered.id "
+        "AND notifications.created_at = numbered.created_at"
+    )
+    op.execute(
+        "SELECT setval('notifications_seq_seq', coalesce(max(seq), 0) + 1, false) "
+        "FROM notifications"
+    )
+    op.execute("ALTER SEQUENCE notifications_seq_seq OWNED BY notifications.seq")
+    op.alter_column(
+        "notifications",
+        "seq",
+        server_default=sa.text("nextval('notifications_seq_seq'::regclass)"),
+        nullable=False,
+    )
+    op.create_index(
+        "ix_notifications_recipient_id_seq", "notifications", ["recipient_id", "seq"]
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_notifications_recipient_id_seq", table_name="notifications")
+    # Drops the owned sequence with it
+    op.drop_column("notifications", "seq")
@@ -0,0 +1,109 @@
+import os
+from functools import cache
+from typing import Literal, Mapping, Optional
+
+from pydantic import BaseModel, Field, model_validator
+
+
+class Settings(BaseModel):
+    """
+    Typed runtime configuration. Every field is read from the environment variable of
+    the same name in upper case (e.g. DB_POOL_SIZE); see `from_env`.
+    """
+
+    database_url: str
+    ca_cert_path: str = "ca.pem"
+    # SQL logging is expensive under load; enable only while debugging
+    db_echo: bool = False
+    # Connections kept open per worker, and extra ones allowed during bursts
+    db_pool_size: int = Field(5, ge=1)
+    db_max_overflow: int = Field(10, ge=0)
+    # Seconds a request waits for a free connection before failing
+    db_pool_timeout: float = Field(30.0, gt=0)
+    # Ping connections on checkout (one extra round trip) to survive server-side idle
+    # disconnects
+    db_pool_pre_ping: bool = False
+    # Seconds after which connections are replaced; -1 keeps them forever
+    db_pool_recycle: int = 1800
+    # asyncpg prepared-statement cache per connection; 0 is required behind PgBouncer
+    # transaction pooling
+    db_statement_cache_size: int = Field(100, ge=0)
+    # Optional streaming replica for read-only routes; reads fall back to the primary
+    # without it
+    database_replica_url: Optional[str] = None
+    # Replica lag above which reads go to the primary, and how often lag is measured
+    db_replica_max_lag_seconds: float = Field(5.0, ge=0)
+    db_replica_check_interval: float = Field(1.0, gt=0)
+    # Seconds a user's reads stay on the primary after one of their writes; 0 disables
+    db_read_your_writes_seconds: float = Field(10.0, ge=0)
+    # Requests repeating one statement shape more often than this are logged as possible
+    # N+1s
+    sql_repeat_warning_threshold: int = Field(5, ge=1)
+    # Response cache: per-worker memory, shared Redis, or disabled
+    cache_backend: Literal["memory", "redis", "none"] = "memory"
+    cache_url: str = "redis://localhost:6379/0"
+    cache_max_entries: int = Field(1024, ge=1)
+    cache_ttl_seconds: float = Field(30.0, gt=0)
+    # Seconds a Redis round trip may take before the request goes on without the cache
+    cache_timeout_seconds: float = Field(0.5, gt=0)
+    # Notification outbox: run the dispatcher in this process, rows per batch, idle poll
+    # interval, and attempts before a failing row is parked for inspection
+    outbox_dispatcher_enabled: bool = True
+    outbox_batch_size: int = Field(100, ge=1)
+    outbox_poll_interval: float = Field(1.0, gt=0)
+    outbox_max_attempts: int = Field(5, ge=1)
+    # Notification streams: LISTEN for rows committed by other workers, heartbeat
+    # interval, and the lifetime after which a stream ends so the client reconnects with
+    # Last-Event-ID
+    notifications_listen_enabled: bool = True
+    notifications_stream_heartbeat_seconds: float = Field(15.0, gt=0)
+    notifications_stream_max_seconds: float = Field(300.0, gt=0)
+    # Monthly notification partitions: run the maintenance task in this process, months
+    # kept, months created ahead, and whether expired months are detached and kept
+    # instead of dropped
+    notifications_retention_enabled: bool = True
+    notifications_retention_months: int = Field(12, ge=1)
+    notifications_partitions_ahead: int = Field(3, ge=1)
+    notifications_archive_expired: bool = False
+    # Monte Carlo simulation: worker processes for large runs (0 keeps every run on a
+    # thread of this process) and the path count from which a run is spread over them
+    simulation_workers: int = Field(0, ge=0)
+    simulation_pool_min_paths: int = Field(50_000, ge=1)
+    # Unit growth curves memoized per (risk profile rate, years, step); each is a few KB
+    # at most
+    simulation_curve_cache_size: int = Field(256, ge=1)
+    # Directory of the historical fund .npy files; the bundled mock dataset when unset
+    simulation_history_dir: Optional[str] = None
+
+    @model_validator(mode="after")
+    def _window_covers_lag(self) -> "Settings":
+        if (
+            self.database_replica_url
+            and 0 < self.db_read_your_writes_seconds < self.db_replica_max_lag_seconds
+        ):
+            raise ValueError(
+                "DB_READ_YOUR_WRITES_SECONDS must be at least "
+                "DB_REPLICA_MAX_LAG_SECONDS"
+            )
+        return self
+
+    @classmethod
+    def from_env(cls, environ: Mapping[str, str] = os.environ) -> "Settings":
+        return cls.model_validate(
+            {
+                name: environ[name.upper()]
+                for name in cls.model_fields
+                if name.upper() in environ
+            }
+        )
+
+
+@cache
+def get_settings() -> Settings:
+    """
+    Settings for this process: .env is loaded once, then the environment is read.
+    """
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    return Settings.from_env()
@@ -1,48 +1,231 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker, declarative_base
+import asyncio
 import os
-from dotenv import load_dotenv
-
-load_dotenv()
-
-import ssl
-
-DATABASE_URL = os.getenv("DATABASE_URL")
-CA_CERT_PATH = os.getenv("CA_CERT_PATH", "ca.pem")
-
-# SSL Configuration for asyncpg
-connect_args = {}
-is_local = "localhost" in DATABASE_URL or "127.0.0.1" in DATABASE_URL
-
-if "postgresql" in DATABASE_URL:
-    if is_local:
-        # Local DB usually doesn't need SSL
-        connect_args["ssl"] = False
-    elif os.path.exists(CA_CERT_PATH):
-        ctx = ssl.create_default_context(cafile=CA_CERT_PATH)
-        ctx.verify_mode = ssl.CERT_REQUIRED
-        connect_args["ssl"] = ctx
-    else:
-        # Default for cloud like Aiven
-        connect_args["ssl"] = "require"
-
-engine = create_async_engine(
-    DATABASE_URL, 
-    echo=True, 
-    connect_args=connect_args
-)
-
-AsyncSessionLocal = sessionmaker(
-    engine, 
-    class_=AsyncSession, 
-    expire_on_commit=False
-)
+import uuid
+from functools import cache
+from typing import Optional, Set
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from app.config import Settings, get_settings
+from app.shared.cache.backends import InMemoryBackend, RedisBackend
+from app.shared.cache.service import response_cache
+from app.shared.replica.service import RecentWrites, ReplicaMonitor
+from app.shared.telemetry.pool import PoolMetrics
+from app.shared.telemetry.sql import instrument_engine
+
+
+@cache
+def _ssl_context(ca_cert_path: str):
+    # Built on the first connection rather than at import
+    import ssl
+
+    ctx = ssl.create_default_context(cafile=ca_cert_path)
+    ctx.verify_mode = ssl.CERT_REQUIRED
+    return ctx
+
+
+def _connect_args(settings: Settings, url: str) -> dict:
+    # SSL Configuration for asyncpg
+    connect_args = {}
+    is_local = "localhost" in url or "127.0.0.1" in url
+
+    if "postgresql" in url:
+        if is_local:
+            # Local DB usually doesn't need SSL
+            connect_args["ssl"] = False
+        elif not os.path.exists(settings.ca_cert_path):
+            # Default for cloud like Aiven
+            connect_args["ssl"] = "require"
+        # Otherwise the CA-verified context is supplied on connect, see build_engine
+
+    if "asyncpg" in url:
+        connect_args["statement_cache_size"] = settings.db_statement_cache_size
+    return connect_args
+
+
+def build_engine(
+    settings: Settings, metrics: PoolMetrics, database_url: Optional[str] = None
+) -> AsyncEngine:
+    """
+    Creates the async engine from typed settings, with its pool reporting into `metrics`.
+    `database_url` overrides settings.database_url (used for the replica).
+    """
+    database_url = database_url or settings.database_url
+    url = make_url(database_url)
+    if url.drivername.endswith("asyncpg"):
+        # SQLAlchemy keeps its own prepared-statement cache in front of asyncpg's; size them together
+        url = url.update_query_dict(
+            {"prepared_statement_cache_size": str(settings.db_statement_cache_size)}
+        )
+
+    connect_args = _connect_args(settings, database_url)
+    engine = create_async_engine(
+        url,
+        echo=settings.db_echo,
+        poolclass=metrics.pool_class(),
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        pool_recycle=settings.db_pool_recycle,
+        connect_args=connect_args,
+    )
+    if "postgresql" in database_url and "ssl" not in connect_args:
+
+        @event.listens_for(engine.sync_engine, "do_connect")
+        def _verified_ssl(dialect, conn_rec, cargs, cparams):
+            cparams["ssl"] = _ssl_context(settings.ca_cert_path)
+
+    metrics.attach(engine)
+    instrument_engine(engine)
+    return engine
+
+
+def _build_replica_engine(settings: Settings):
+    if not settings.database_replica_url:
+        return None
+    return build_engine(settings, replica_pool_metrics, settings.database_replica_url)
+
+
+def _recent_writes_backend():
+    # Markers are shared across workers when the response cache runs on Redis
+    if isinstance(response_cache.backend, RedisBackend):
+        return response_cache.backend
+    return InMemoryBackend(max_entries=10_000)
+
+
+pool_metrics = PoolMetrics()
+replica_pool_metrics = PoolMetrics("replica")
+# Set by configure (create_app), or from the environment on first use
+settings: Optional[Settings] = None
+# Built on first use (see get_engine), so importing this module needs no configuration
+engine: Optional[AsyncEngine] = None
+replica_engine: Optional[AsyncEngine] = None
+# Disposals of replaced engines still running
+_disposals: Set[asyncio.Task] = set()
+
+
+class _LazySessionmaker(sessionmaker):
+    """
+    Session factory that builds and binds the engines on the first session it creates.
+    """
+
+    def __call__(self, **local_kw):
+        get_engine()
+        return super().__call__(**local_kw)
+
+
+AsyncSessionLocal = _LazySessionmaker(class_=AsyncSession, expire_on_commit=False)
+ReadSessionLocal = _LazySessionmaker(class_=AsyncSession, expire_on_commit=False)
+# Tuned by configure before anything routes through them
+replica_monitor = ReplicaMonitor(None, max_lag_seconds=0)
+recent_writes = RecentWrites(_recent_writes_backend(), window_seconds=0)
 
 Base = declarative_base()
 
+
+def get_engine() -> AsyncEngine:
+    """
+    The primary engine. It is built, with the replica one, on first use from the settings given to
+    configure, or from the environment when create_app has not run.
+    """
+    global engine, replica_engine
+    if settings is None:
+        configure(get_settings())
+    if engine is None:
+        engine = build_engine(settings, pool_metrics)
+        replica_engine = _build_replica_engine(settings)
+        AsyncSessionLocal.configure(bind=engine)
+        ReadSessionLocal.configure(bind=replica_engine or engine)
+        replica_monitor.engine = replica_engine
+    return engine
+
+
+def _dispose(old: AsyncEngine):
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        # Its connections belong to an event loop that has stopped, so they cannot be closed
+        # cleanly; the pool is dropped without closing them
+        old.sync_engine.dispose(close=False)
+        return
+    task = loop.create_task(old.dispose())
+    _disposals.add(task)
+    task.add_done_callback(_disposals.discard)
+
+
+def configure(new_settings: Settings):
+    """
+    Applies settings passed to create_app. Engines already built from other settings are
+    disposed and rebuilt on next use; session factories and routing objects are updated in
+    place, so modules that imported them keep working.
+    """
+    global settings, engine, replica_engine
+    if new_settings != settings:
+        settings = new_settings
+        for old in (engine, replica_engine):
+            if old is not None:
+                _dispose(old)
+        engine = replica_engine = None
+        replica_monitor.engine = None
+        replica_monitor.max_lag_seconds = settings.db_replica_max_lag_seconds
+        replica_monitor.check_interval_seconds = settings.db_replica_check_interval
+    recent_writes.backend = _recent_writes_backend()
+    recent_writes.window_seconds = settings.db_read_your_writes_seconds
+
+
+async def dispose():
+    """
+    Closes every pooled connection, including those of replaced engines. Engines are rebuilt on
+    next use. Called at shutdown.
+    """
+    global engine, replica_engine
+    for old in (engine, replica_engine):
+        if old is not None:
+            await old.dispose()
+    engine = replica_engine = None
+    replica_monitor.engine = None
+    if _disposals:
+        await asyncio.gather(*_disposals)
+
+
 async def get_db():
     async with AsyncSessionLocal() as session:
         try:
             yield session
         finally:
             await session.close()
+
+
+async def _read_sessionmaker(user_id=None):
+    get_engine()
+    if await replica_monitor.is_usable() and not await recent_writes.is_recent(user_id):
+        return ReadSessionLocal
+    return AsyncSessionLocal
+
+
+async def get_read_db():
+    """
+    Session for read-only routes that do not show one user's own data. Uses the replica when one
+    is configured and within the lag budget; the primary otherwise.
+    """
+    async with (await _read_sessionmaker())() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
+
+
+async def get_user_read_db(user_id: uuid.UUID):
+    """
+    Like get_read_db for routes showing the data of the user given by the `user_id` parameter,
+    which every such route must take: a user who wrote recently reads from the primary.
+    """
+    async with (await _read_sessionmaker(user_id))() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
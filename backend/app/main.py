@@ -1,58 +1,148 @@
+import os
+from contextlib import asynccontextmanager
+from typing import Optional
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
 
-from app.modules.voice.router import router as voice_router
-from app.shared.gifts.router import router as gifts_router
+from app import database
+from app.config import Settings, get_settings
+from app.modules.export.router import router as export_router
 from app.modules.media.router import router as media_router
 from app.modules.trustee.router import router as trustee_router
-from app.shared.simulation.router import router as simulation_router
-from app.shared.notifications.router import router as notifications_router
 from app.modules.users.router import router as users_router
-
-app = FastAPI(
-    title="GiftForge API",
-    description="Full-stack Legacy Gifting Platform",
-    version="2.0.0",
-    openapi_tags=[
-        {"name": "Gifts", "description": "Gift management and lifecycle"},
-        {"name": "Grandparent", "description": "Grandparent specific actions"},
-        {"name": "Grandchild", "description": "Grandchild specific actions"},
-        {"name": "Trustee", "description": "Trustee governance actions"},
-        {"name": "Voice", "description": "Voice command parsing"},
-        {"name": "Notifications", "description": "In-app and push notifications"},
-        {"name": "Media", "description": "Multimedia messaging and proofs"},
-    ]
+from app.modules.voice.router import router as voice_router
+from app.shared.cache.router import router as cache_router
+from app.shared.cache.service import configure_cache
+from app.shared.gifts.router import router as gifts_router
+from app.shared.notifications.outbox import configure_outbox, outbox_dispatcher
+from app.shared.notifications.retention import (
+    configure_retention,
+    notification_retention,
 )
-
-app.include_router(voice_router)
-app.include_router(gifts_router)
-app.include_router(media_router)
-app.include_router(trustee_router)
-app.include_router(simulation_router)
-app.include_router(notifications_router)
-app.include_router(users_router)
-
-# CORS configuration
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # Allows any origin, like localhost or local network IPs
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+from app.shared.notifications.router import router as notifications_router
+from app.shared.notifications.stream import (
+    configure_stream,
+    notification_hub,
+    notification_listener,
 )
+from app.shared.simulation.curves import configure_curves
+from app.shared.simulation.history import configure_history
+from app.shared.simulation.montecarlo import configure_montecarlo, monte_carlo_runner
+from app.shared.simulation.router import router as simulation_router
+from app.shared.telemetry.middleware import (
+    MetricsMiddleware,
+    SQLInstrumentationMiddleware,
+)
+from app.shared.telemetry.router import metrics_router
+from app.shared.telemetry.router import router as telemetry_router
+
+
+def create_app(settings: Optional[Settings] = None) -> FastAPI:
+    """
+    Builds the API for `settings` (the environment by default). Heavy dependencies such as the
+    OpenAI SDK are not imported here; they load on the first request that needs them.
+    """
+    settings = settings or get_settings()
+    configure_cache(settings)
+    database.configure(settings)
+    configure_outbox(settings)
+    configure_stream(settings)
+    configure_retention(settings)
+    configure_montecarlo(settings)
+    configure_curves(settings)
+    configure_history(settings)
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        # Delivers queued notifications in the background; see app.shared.notifications.outbox
+        if settings.outbox_dispatcher_enabled:
+            outbox_dispatcher.start()
+        # Relays notifications committed by other workers to this worker's streams
+        if settings.notifications_listen_enabled:
+            notification_listener.start()
+        # Creates upcoming monthly notification partitions and expires old ones
+        if settings.notifications_retention_enabled:
+            notification_retention.start()
+        yield
+        await notification_retention.stop()
+        notification_hub.close()
+        await notification_listener.stop()
+        await outbox_dispatcher.stop()
+        monte_carlo_runner.close()
+        await database.dispose()
+
+    app = FastAPI(
+        title="GiftForge API",
+        description="Full-stack Legacy Gifting Platform",
+        version="2.0.0",
+        lifespan=lifespan,
+        openapi_tags=[
+            {"name": "Gifts", "description": "Gift management and lifecycle"},
+            {"name": "Grandparent", "description": "Grandparent specific actions"},
+            {"name": "Grandchild", "description": "Grandchild specific actions"},
+            {"name": "Trustee", "description": "Trustee governance actions"},
+            {"name": "Voice", "description": "Voice command parsing"},
+            {"name": "Notifications", "description": "In-app and push notifications"},
+            {"name": "Media", "description": "Multimedia messaging and proofs"},
+            {"name": "Internal", "description": "Operational telemetry"},
+            {
+                "name": "Export",
+                "description": "Streaming exports for reconciliation and audits",
+            },
+        ],
+    )
+
+    app.include_router(voice_router)
+    app.include_router(gifts_router)
+    app.include_router(media_router)
+    app.include_router(trustee_router)
+    app.include_router(simulation_router)
+    app.include_router(notifications_router)
+    app.include_router(users_router)
+    app.include_router(cache_router)
+    app.include_router(export_router)
+    app.include_router(telemetry_router)
+    app.include_router(metrics_router)
+
+    # CORS configuration
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],  # Allows any origin, like localhost or local network IPs
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
 
-os.makedirs("static/media", exist_ok=True)
-app.mount("/static", StaticFiles(directory="static"), name="static")
+    # Per-request statement counts, Server-Timing and N+1 warnings
+    app.add_middleware(
+        SQLInstrumentationMiddleware,
+        repeat_threshold=settings.sql_repeat_warning_threshold,
+    )
+    # Prometheus request metrics, served at /metrics
+    app.add_middleware(MetricsMiddleware)
+
+    os.makedirs("static/media", exist_ok=True)
+    app.mount("/static", StaticFiles(directory="static"), name="static")
+
+    @app.get("/")
+    async def root():
+        return {"message": "Welcome to GiftForge API", "version": "2.0.0"}
+
+    return app
+
+
+def __getattr__(name: str):
+    # `uvicorn app.main:app`: built from the environment on first access, so importing
+    # create_app to pass explicit settings needs no environment
+    if name == "app":
+        globals()["app"] = app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-@app.get("/")
-async def root():
-    return {"message": "Welcome to GiftForge API", "version": "2.0.0"}
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+
+    uvicorn.run(create_app(), host="0.0.0.0", port=8000)
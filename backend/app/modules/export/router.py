@@ -0,0 +1,65 @@
+import datetime
+import uuid
+from typing import Optional
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_read_db
+from app.modules.export.service import ExportFormat, ExportService
+from app.shared.gifts.schemas import GiftStatus
+
+router = APIRouter(prefix="/export", tags=["Export"])
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _attachment(name: str, body, format: ExportFormat) -> StreamingResponse:
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{format}"'},
+    )
+
+
+@router.get("/gifts")
+async def export_gifts(
+    format: ExportFormat = "ndjson",
+    status: Optional[GiftStatus] = None,
+    grandparent_id: Optional[uuid.UUID] = None,
+    created_from: Optional[datetime.datetime] = None,
+    created_to: Optional[datetime.datetime] = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Streams every matching gift with its milestones for reconciliation. NDJSON nests
+    milestones; CSV repeats the gift columns on one row per milestone.
+    """
+    body = ExportService.export_gifts(
+        db,
+        format,
+        status=status,
+        grandparent_id=grandparent_id,
+        created_from=created_from,
+        created_to=created_to,
+    )
+    return _attachment("gifts", body, format)
+
+
+@router.get("/notifications")
+async def export_notifications(
+    format: ExportFormat = "ndjson",
+    recipient_id: Optional[uuid.UUID] = None,
+    created_from: Optional[datetime.datetime] = None,
+    created_to: Optional[datetime.datetime] = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    body = ExportService.export_notifications(
+        db,
+        format,
+        recipient_id=recipient_id,
+        created_from=created_from,
+        created_to=created_to,
+    )
+    return _attachment("notifications", body, format)
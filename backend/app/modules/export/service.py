@@ -0,0 +1,195 @@
+import csv
+import datetime
+import io
+import uuid
+from typing import AsyncIterator, Iterable, List, Literal, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.shared.gifts.models import Gift, Milestone, Notification
+from app.shared.gifts.schemas import GiftStatus
+from app.shared.responses import dumps
+
+# Rows fetched per server-side cursor round trip
+EXPORT_BATCH_SIZE = 1000
+# Encoded output is flushed in chunks of roughly this many bytes
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+ExportFormat = Literal["ndjson", "csv"]
+
+GIFT_COLUMNS = [column.name for column in Gift.__table__.columns]
+MILESTONE_COLUMNS = [
+    column.name for column in Milestone.__table__.columns if column.name != "gift_id"
+]
+NOTIFICATION_COLUMNS = [column.name for column in Notification.__table__.columns]
+
+
+class ExportService:
+    @staticmethod
+    def _created_between(
+        query,
+        column,
+        created_from: Optional[datetime.datetime],
+        created_to: Optional[datetime.datetime],
+    ):
+        if created_from is not None:
+            query = query.where(column >= created_from)
+        if created_to is not None:
+            query = query.where(column < created_to)
+        return query
+
+    @staticmethod
+    def build_gift_query(
+        status: Optional[GiftStatus] = None,
+        grandparent_id: Optional[uuid.UUID] = None,
+        created_from: Optional[datetime.datetime] = None,
+        created_to: Optional[datetime.datetime] = None,
+    ):
+        """
+        Gifts left-joined to their milestones, ordered so each gift's milestones arrive
+        together.
+        """
+        query = (
+            select(
+                *Gift.__table__.columns,
+                *(
+                    Milestone.__table__.c[name].label(f"milestone_{name}")
+                    for name in MILESTONE_COLUMNS
+                ),
+            )
+            .outerjoin(Milestone, Milestone.gift_id == Gift.id)
+            .order_by(Gift.id, Milestone.id)
+        )
+        if status is not None:
+            query = query.where(Gift.status == status.value)
+        if grandparent_id is not None:
+            query = query.where(Gift.grandparent_id == grandparent_id)
+        query = ExportService._created_between(
+            query, Gift.created_at, created_from, created_to
+        )
+        return query.execution_options(yield_per=EXPORT_BATCH_SIZE)
+
+    @staticmethod
+    def build_notification_query(
+        recipient_id: Optional[uuid.UUID] = None,
+        created_from: Optional[datetime.datetime] = None,
+        created_to: Optional[datetime.datetime] = None,
+    ):
+        query = select(*Notification.__table__.columns).order_by(
+            Notification.created_at, Notification.id
+        )
+        if recipient_id is not None:
+            query = query.where(Notification.recipient_id == recipient_id)
+        query = ExportService._created_between(
+            query, Notification.created_at, created_from, created_to
+        )
+        return query.execution_options(yield_per=EXPORT_BATCH_SIZE)
+
+    @staticmethod
+    async def stream_gifts(db: AsyncSession, **filters) -> AsyncIterator[dict]:
+        """
+        Yields one dict per gift with a nested `milestones` list. Rows come from a
+        server-side cursor in EXPORT_BATCH_SIZE batches and only the gift being
+        assembled is held in memory.
+        """
+        result = await db.stream(ExportService.build_gift_query(**filters))
+        gift = None
+        async for row in result.mappings():
+            if gift is None or gift["id"] != row["id"]:
+                if gift is not None:
+                    yield gift
+                gift = {name: row[name] for name in GIFT_COLUMNS}
+                gift["milestones"] = []
+            if row["milestone_id"] is not None:
+                gift["milestones"].append(
+                    {name: row[f"milestone_{name}"] for name in MILESTONE_COLUMNS}
+                )
+        if gift is not None:
+            yield gift
+
+    @staticmethod
+    async def stream_notifications(db: AsyncSession, **filters) -> AsyncIterator[dict]:
+        result = await db.stream(ExportService.build_notification_query(**filters))
+        async for row in result.mappings():
+            yield dict(row)
+
+    @staticmethod
+    async def encode_ndjson(records: AsyncIterator[dict]) -> AsyncIterator[bytes]:
+        buffer = bytearray()
+        async for record in records:
+            buffer += dumps(record)
+            buffer += b"\n"
+            if len(buffer) >= EXPORT_CHUNK_BYTES:
+                yield bytes(buffer)
+                buffer.clear()
+        if buffer:
+            yield bytes(buffer)
+
+    @staticmethod
+    async def encode_csv(
+        records: AsyncIterator[dict], columns: List[str]
+    ) -> AsyncIterator[bytes]:
+        """
+        CSV with a header row. Records are expected to be flat (see `flatten_gift`).
+        """
+        text = io.StringIO()
+        writer = csv.DictWriter(text, fieldnames=columns, extrasaction="ignore")
+        writer.writeheader()
+        async for record in records:
+            writer.writerow(
+                {key: ExportService._csv_value(value) for key, value in record.items()}
+            )
+            if text.tell() >= EXPORT_CHUNK_BYTES:
+                yield text.getvalue().encode()
+                text.seek(0)
+                text.truncate()
+        if text.tell():
+            yield text.getvalue().encode()
+
+    @staticmethod
+    def _csv_value(value):
+        if isinstance(value, (datetime.datetime, datetime.date)):
+            return value.isoformat()
+        return value
+
+    @staticmethod
+    def flatten_gift(gift: dict) -> Iterable[dict]:
+        """
+        One CSV row per milestone (gift columns repeated); gifts without milestones get
+        one row.
+        """
+        base = {name: gift[name] for name in GIFT_COLUMNS}
+        if not gift["milestones"]:
+            yield base
+        for milestone in gift["milestones"]:
+            yield {
+                **base,
+                **{f"milestone_{name}": value for name, value in milestone.items()},
+            }
+
+    @staticmethod
+    def export_gifts(
+        db: AsyncSession, format: ExportFormat, **filters
+    ) -> AsyncIterator[bytes]:
+        gifts = ExportService.stream_gifts(db, **filters)
+        if format == "ndjson":
+            return ExportService.encode_ndjson(gifts)
+
+        async def rows():
+            async for gift in gifts:
+                for row in ExportService.flatten_gift(gift):
+                    yield row
+
+        return ExportService.encode_csv(
+            rows(), GIFT_COLUMNS + [f"milestone_{name}" for name in MILESTONE_COLUMNS]
+        )
+
+    @staticmethod
+    def export_notifications(
+        db: AsyncSession, format: ExportFormat, **filters
+    ) -> AsyncIterator[bytes]:
+        notifications = ExportService.stream_notifications(db, **filters)
+        if format == "ndjson":
+            return ExportService.encode_ndjson(notifications)
+        return ExportService.encode_csv(notifications, NOTIFICATION_COLUMNS)
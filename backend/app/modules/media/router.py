@@ -1,21 +1,34 @@
-from fastapi import APIRouter, Depends, UploadFile, File, Form
+from typing import List
+
+from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
 from sqlalchemy.ext.asyncio import AsyncSession
+
 from app.database import get_db
 from app.modules.media.service import MediaService
-from typing import List
+from app.shared.gifts.schemas import MediaMessageSchema
+from app.shared.responses import FastJSONResponse
 
 router = APIRouter(prefix="/media", tags=["Media"])
 
+
 @router.post("/upload")
 async def upload_media(
     gift_id: str = Form(...),
     uploader_id: str = Form(...),
     type: str = Form(...),
     file: UploadFile = File(...),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
 ):
-    return await MediaService.upload_file(db, gift_id, uploader_id, file, type)
+    try:
+        return await MediaService.upload_file(db, gift_id, uploader_id, file, type)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
 
-@router.get("/{gift_id}")
+@router.get(
+    "/{gift_id}",
+    response_model=List[MediaMessageSchema],
+    response_class=FastJSONResponse,
+)
 async def get_gift_media(gift_id: str, db: AsyncSession = Depends(get_db)):
-    return await MediaService.get_media_for_gift(db, gift_id)
+    return FastJSONResponse(await MediaService.get_media_for_gift(db, gift_id))
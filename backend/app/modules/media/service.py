@@ -1,41 +1,107 @@
 import os
 import shutil
 import uuid
+from typing import List
+
 from fastapi import UploadFile
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from app.shared.gifts.models import MediaMessage
-from typing import List
+
+from app.database import recent_writes
+from app.shared.cache.service import gift_tag, response_cache
+from app.shared.gifts.models import Gift, MediaMessage
+from app.shared.gifts.schemas import NotificationCreate, UserRole
+from app.shared.gifts.service import TRUSTEE_ID
+from app.shared.gifts.versions import bump_user_versions
+from app.shared.notifications.outbox import OutboxService, outbox_dispatcher
 
 UPLOAD_DIR = "static/media"
 
+
 class MediaService:
     @staticmethod
-    async def upload_file(db: AsyncSession, gift_id: str, uploader_id: str, file: UploadFile, type: str) -> MediaMessage:
+    async def upload_file(
+        db: AsyncSession, gift_id: str, uploader_id: str, file: UploadFile, type: str
+    ) -> MediaMessage:
+        owners = (
+            await db.execute(
+                select(Gift.grandparent_id, Gift.grandchild_id).where(
+                    Gift.id == uuid.UUID(gift_id)
+                )
+            )
+        ).one_or_none()
+        if owners is None:
+            raise ValueError("Gift not found")
+
         if not os.path.exists(UPLOAD_DIR):
             os.makedirs(UPLOAD_DIR, exist_ok=True)
-            
+
         file_ext = os.path.splitext(file.filename)[1]
         file_name = f"{uuid.uuid4()}{file_ext}"
         file_path = os.path.join(UPLOAD_DIR, file_name)
-        
+
         with open(file_path, "wb") as buffer:
             shutil.copyfileobj(file.file, buffer)
-            
+
         media = MediaMessage(
             id=uuid.uuid4(),
             gift_id=uuid.UUID(gift_id),
             uploader_id=uuid.UUID(uploader_id),
             type=type,
-            file_path=file_path
+            file_path=file_path,
         )
-        
+
         db.add(media)
+        await bump_user_versions(db, *owners)
+        await OutboxService.enqueue(
+            db, MediaService._upload_notifications(media, *owners)
+        )
         await db.commit()
+        outbox_dispatcher.wake()
         await db.refresh(media)
+        await recent_writes.mark(*owners)
+        # Dashboard entries are tagged with each gift they contain
+        await response_cache.invalidate(gift_tag(media.gift_id))
         return media
 
     @staticmethod
-    async def get_media_for_gift(db: AsyncSession, gift_id: str) -> List[MediaMessage]:
-        result = await db.execute(select(MediaMessage).where(MediaMessage.gift_id == uuid.UUID(gift_id)))
-        return result.scalars().all()
+    def _upload_notifications(
+        media: MediaMessage, grandparent_id: uuid.UUID, grandchild_id: uuid.UUID
+    ) -> List[NotificationCreate]:
+        """
+        Uploads by the grandchild are proofs for the trustee and grandparent; anything else is a
+        message for the grandchild.
+        """
+        if media.uploader_id == grandchild_id:
+            message = "Your grandchild submitted a proof for review."
+            return [
+                NotificationCreate(
+                    recipient_id=TRUSTEE_ID,
+                    role=UserRole.trustee,
+                    event_type="proof_submitted",
+                    message=message,
+                ),
+                NotificationCreate(
+                    recipient_id=grandparent_id,
+                    role=UserRole.grandparent,
+                    event_type="proof_submitted",
+                    message=message,
+                ),
+            ]
+        return [
+            NotificationCreate(
+                recipient_id=grandchild_id,
+                role=UserRole.grandchild,
+                event_type="new_media",
+                message=f"A new {media.type} message is waiting for you.",
+            )
+        ]
+
+    @staticmethod
+    async def get_media_for_gift(db: AsyncSession, gift_id: str) -> List[dict]:
+        result = await db.execute(
+            select(*MediaMessage.__table__.columns).where(
+                MediaMessage.gift_id == uuid.UUID(gift_id)
+            )
+        )
+        return [dict(row) for row in result.mappings()]
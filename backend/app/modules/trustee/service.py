@@ -1,64 +1,90 @@
+import uuid
+
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from app.shared.gifts.models import Milestone, Gift
-from app.shared.gifts.schemas import MilestoneStatus, GiftStatus
-from app.shared.gifts.state_machine import GiftStateMachine
-import uuid
+
+from app.database import recent_writes
+from app.shared.cache.service import gift_tag, response_cache, user_tag
+from app.shared.gifts.models import Gift, Milestone
+from app.shared.gifts.schemas import (
+    GiftStatus,
+    MilestoneStatus,
+    NotificationCreate,
+    UserRole,
+)
+from app.shared.gifts.service import GiftService
+from app.shared.gifts.versions import bump_user_versions
+from app.shared.notifications.outbox import OutboxService, outbox_dispatcher
+
 
 class TrusteeService:
     @staticmethod
-    async def process_milestone_submission(db: AsyncSession, milestone_id: str) -> Milestone:
+    async def process_milestone_submission(
+        db: AsyncSession, milestone_id: str
+    ) -> Milestone:
         """
         Handles milestone submission and auto-approves in demo mode.
         """
-        result = await db.execute(select(Milestone).where(Milestone.id == uuid.UUID(milestone_id)))
+        result = await db.execute(
+            select(Milestone).where(Milestone.id == uuid.UUID(milestone_id))
+        )
         milestone = result.scalar_one_or_none()
-        
+
         if not milestone:
             raise ValueError("Milestone not found")
-            
+
         # In real app, status would become 'Submitted' first.
         # In Demo Mode, we auto-approve.
         milestone.status = MilestoneStatus.Approved
-        
+
         # Check if all milestones are approved to complete the gift
         gift_result = await db.execute(select(Gift).where(Gift.id == milestone.gift_id))
         gift = gift_result.scalar_one()
-        
-        all_milestones_result = await db.execute(select(Milestone).where(Milestone.gift_id == gift.id))
+
+        all_milestones_result = await db.execute(
+            select(Milestone).where(Milestone.gift_id == gift.id)
+        )
         all_milestones = all_milestones_result.scalars().all()
-        
-        if all(m.status == MilestoneStatus.Approved for m in all_milestones):
-            GiftStateMachine.validate_transition(gift.status, GiftStatus.Completed)
-            gift.status = GiftStatus.Completed
-            
-        await db.commit()
-        await db.refresh(milestone)
 
-        # Trigger notifications
-        from app.shared.notifications.service import NotificationService
-        from app.shared.gifts.schemas import UserRole
-        
-        # Notify grandchild
+        completed = all(m.status == MilestoneStatus.Approved for m in all_milestones)
+        if completed:
+            # The conditional UPDATE also bumps both owners' versions and queues "gift_unlocked"
+            await GiftService.transition(db, gift.id, GiftStatus.Completed)
+
+        # Notify both owners through the outbox, in the approval's transaction
         gc_message = f"Congratulations! Your milestone '{milestone.type}' has been approved and funds disbursed."
         if gift.message:
-            gc_message += f"\n\nMessage from Grandparent:\n\"{gift.message}\""
-            
-        await NotificationService.create_notification(
-            db,
-            str(gift.grandchild_id),
-            UserRole.grandchild,
-            "milestone_approved",
-            gc_message
-        )
+            gc_message += f'\n\nMessage from Grandparent:\n"{gift.message}"'
 
-        # Notify grandparent
-        await NotificationService.create_notification(
+        await OutboxService.enqueue(
             db,
-            str(gift.grandparent_id),
-            UserRole.grandparent,
-            "milestone_approved",
-            f"Your grandchild has successfully reached the '{milestone.type}' milestone."
+            [
+                NotificationCreate(
+                    recipient_id=gift.grandchild_id,
+                    role=UserRole.grandchild,
+                    event_type="milestone_approved",
+                    message=gc_message,
+                    dedup_key=f"milestone_approved:{milestone.id}:grandchild",
+                ),
+                NotificationCreate(
+                    recipient_id=gift.grandparent_id,
+                    role=UserRole.grandparent,
+                    event_type="milestone_approved",
+                    message=f"Your grandchild has successfully reached the '{milestone.type}' milestone.",
+                    dedup_key=f"milestone_approved:{milestone.id}:grandparent",
+                ),
+            ],
+        )
+        if not completed:
+            await bump_user_versions(db, gift.grandparent_id, gift.grandchild_id)
+        await db.commit()
+        outbox_dispatcher.wake()
+        await db.refresh(milestone)
+        await recent_writes.mark(gift.grandparent_id, gift.grandchild_id)
+        await response_cache.invalidate(
+            gift_tag(gift.id),
+            user_tag(gift.grandparent_id),
+            user_tag(gift.grandchild_id),
         )
 
         return milestone
@@ -1,19 +1,30 @@
+import uuid
+from typing import List
+
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.database import get_db
+
+from app.database import get_read_db, get_user_read_db
 from app.modules.users.service import UserService
+from app.shared.cache.service import USERS_TAG, cached_response
 from app.shared.gifts.schemas import UserSchema
-from typing import List
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
+
 @router.get("/", response_model=List[UserSchema])
-async def list_users(db: AsyncSession = Depends(get_db)):
-    return await UserService.get_all_users(db)
+async def list_users(db: AsyncSession = Depends(get_read_db)):
+    return await cached_response(
+        "users:all",
+        lambda: UserService.get_all_users(db),
+        List[UserSchema],
+        tags=[USERS_TAG],
+    )
+
 
 @router.get("/{user_id}", response_model=UserSchema)
-async def get_user(user_id: str, db: AsyncSession = Depends(get_db)):
-    user = await UserService.get_user_by_id(db, user_id)
+async def get_user(user_id: uuid.UUID, db: AsyncSession = Depends(get_user_read_db)):
+    user = await UserService.get_user_by_id(db, str(user_id))
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
@@ -1,11 +1,9 @@
 # backend/app/modules/voice/service.py
-import os
 import json
-from openai import OpenAI
-from app.shared.gifts.schemas import VoiceParseResponse, Currency, RiskProfile
-from dotenv import load_dotenv
+import os
+from functools import lru_cache
 
-load_dotenv()
+from app.shared.telemetry.metrics import track_openai
 
 # In-memory session store (replace with Redis in production)
 conversation_sessions: dict[str, list] = {}
@@ -152,7 +150,11 @@ EXAMPLE 4 — User wants to edit:
 """
 
 
+@lru_cache(maxsize=1)
 def get_openai_client():
+    # The SDK is slow to import; load it on the first voice request instead of at worker boot
+    from openai import OpenAI
+
     return OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 
@@ -172,16 +174,15 @@ class VoiceService:
             ]
 
         # Add user message to history
-        conversation_sessions[session_id].append(
-            {"role": "user", "content": user_text}
-        )
+        conversation_sessions[session_id].append({"role": "user", "content": user_text})
 
         # Get GPT-4o response
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=conversation_sessions[session_id],
-            temperature=0.2  # Low = consistent, predictable field extraction
-        )
+        with track_openai("chat"):
+            response = client.chat.completions.create(
+                model="gpt-4o",
+                messages=conversation_sessions[session_id],
+                temperature=0.2,  # Low = consistent, predictable field extraction
+            )
 
         assistant_reply = response.choices[0].message.content
 
@@ -207,9 +208,11 @@ class VoiceService:
         return {
             "session_id": session_id,
             "user_said": user_text,
-            "assistant_reply": assistant_reply if not is_confirmed else "Gift created successfully!",
+            "assistant_reply": (
+                assistant_reply if not is_confirmed else "Gift created successfully!"
+            ),
             "gift_data": gift_data,
-            "is_confirmed": is_confirmed
+            "is_confirmed": is_confirmed,
         }
 
     @staticmethod
@@ -219,11 +222,9 @@ class VoiceService:
         """
         try:
             client = get_openai_client()
-            with open(audio_file_path, "rb") as audio:
+            with open(audio_file_path, "rb") as audio, track_openai("transcription"):
                 transcript = client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio,
-                    language="en"
+                    model="whisper-1", file=audio, language="en"
                 )
             return transcript.text
         except Exception as e:
@@ -233,4 +234,3 @@ class VoiceService:
     @staticmethod
     async def clear_session(session_id: str):
         conversation_sessions.pop(session_id, None)
- 
\ No newline at end of file
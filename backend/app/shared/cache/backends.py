@@ -0,0 +1,237 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+
+class CacheBackend:
+    """
+    Storage for cached response bodies. Entries carry tags so a write can drop every
+    entry that mentions a given user or gift without knowing the individual keys.
+    """
+
+    name = "base"
+
+    async def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    async def set(
+        self, key: str, value: bytes, ttl_seconds: float, tags: Iterable[str] = ()
+    ):
+        raise NotImplementedError
+
+    async def invalidate_tags(self, tags: Iterable[str]) -> int:
+        raise NotImplementedError
+
+    def size(self) -> Optional[int]:
+        return None
+
+
+class NullBackend(CacheBackend):
+    """Caching disabled: every read is a miss."""
+
+    name = "none"
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return None
+
+    async def set(
+        self, key: str, value: bytes, ttl_seconds: float, tags: Iterable[str] = ()
+    ):
+        pass
+
+    async def invalidate_tags(self, tags: Iterable[str]) -> int:
+        return 0
+
+    def size(self) -> Optional[int]:
+        return 0
+
+
+class InMemoryBackend(CacheBackend):
+    """
+    Per-process cache with TTL expiry and LRU eviction once max_entries is reached.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._entries: OrderedDict[str, Tuple[float, bytes, Tuple[str, ...]]] = (
+            OrderedDict()
+        )
+        self._tags: Dict[str, Set[str]] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value, _ = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(
+        self, key: str, value: bytes, ttl_seconds: float, tags: Iterable[str] = ()
+    ):
+        if key in self._entries:
+            self._remove(key)
+        tags = tuple(tags)
+        self._entries[key] = (time.monotonic() + ttl_seconds, value, tags)
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    async def invalidate_tags(self, tags: Iterable[str]) -> int:
+        removed = 0
+        for tag in tags:
+            for key in list(self._tags.get(tag, ())):
+                self._remove(key)
+                removed += 1
+        return removed
+
+    def size(self) -> Optional[int]:
+        return len(self._entries)
+
+    def _remove(self, key: str):
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+class RespError(Exception):
+    pass
+
+
+class RedisBackend(CacheBackend):
+    """
+    Shared cache speaking the Redis protocol (RESP) over one pipelined connection, so
+    any Redis-compatible server works without a client library. Entries expire through
+    PX; LRU eviction is the server's job (maxmemory-policy allkeys-lru). Tags are Redis
+    sets that expire with the entries they point to. A call taking longer than `timeout`
+    seconds, waiting for the connection included, raises TimeoutError.
+    """
+
+    name = "redis"
+
+    def __init__(
+        self, url: str, prefix: str = "giftforge:cache:", timeout: float = 0.5
+    ):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.password = parsed.password
+        self.prefix = prefix
+        self.timeout = timeout
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._lock = asyncio.Lock()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        (value,) = await self._execute(("GET", self.prefix + key))
+        return value
+
+    async def set(
+        self, key: str, value: bytes, ttl_seconds: float, tags: Iterable[str] = ()
+    ):
+        ttl_ms = str(max(1, int(ttl_seconds * 1000)))
+        commands = [("SET", self.prefix + key, value, "PX", ttl_ms)]
+        for tag in tags:
+            commands.append(("SADD", self._tag_key(tag), self.prefix + key))
+            commands.append(("PEXPIRE", self._tag_key(tag), ttl_ms))
+        await self._execute(*commands)
+
+    async def invalidate_tags(self, tags: Iterable[str]) -> int:
+        tag_keys = [self._tag_key(tag) for tag in tags]
+        if not tag_keys:
+            return 0
+        members = await self._execute(*[("SMEMBERS", tag_key) for tag_key in tag_keys])
+        keys = {key for reply in members for key in (reply or [])}
+        await self._execute(("DEL", *keys, *tag_keys))
+        return len(keys)
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._reader = self._writer = None
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.prefix}tag:{tag}"
+
+    async def _execute(self, *commands) -> List:
+        replies = await asyncio.wait_for(self._round_trip(commands), self.timeout)
+        for reply in replies:
+            if isinstance(reply, RespError):
+                raise reply
+        return replies
+
+    async def _round_trip(self, commands) -> List:
+        async with self._lock:
+            try:
+                if self._writer is None:
+                    await self._connect()
+                self._writer.write(
+                    b"".join(self._encode(command) for command in commands)
+                )
+                await self._writer.drain()
+                return [await self._read_reply() for _ in commands]
+            except BaseException:
+                # A timeout, cancellation or garbled reply can leave replies unread on
+                # the pipelined connection, which the next caller would take for its
+                # own: reconnect instead
+                await self.close()
+                raise
+
+    async def _connect(self):
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        setup = []
+        if self.password:
+            setup.append(("AUTH", self.password))
+        if self.db:
+            setup.append(("SELECT", str(self.db)))
+        for command in setup:
+            self._writer.write(self._encode(command))
+            await self._writer.drain()
+            reply = await self._read_reply()
+            if isinstance(reply, RespError):
+                raise reply
+
+    @staticmethod
+    def _encode(command) -> bytes:
+        parts = [b"*%d\r\n" % len(command)]
+        for arg in command:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(parts)
+
+    async def _read_reply(self):
+        line = await self._reader.readuntil(b"\r\n")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode()
+        if kind == b"-":
+            return RespError(payload.decode())
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            data = await self._reader.readexactly(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            count = int(payload)
+            if count < 0:
+                return None
+            return [await self._read_reply() for _ in range(count)]
+        raise RespError(f"Unexpected reply {line!r}")
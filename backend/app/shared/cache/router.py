@@ -0,0 +1,13 @@
+from fastapi import APIRouter
+
+from app.shared.cache.service import response_cache
+
+router = APIRouter(prefix="/internal", tags=["Internal"])
+
+
+@router.get("/cache")
+async def get_cache_stats():
+    """
+    Hit/miss counters and size of the response cache for this worker.
+    """
+    return response_cache.stats()
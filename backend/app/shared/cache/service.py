@@ -0,0 +1,154 @@
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Union
+
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.config import Settings
+from app.shared.cache.backends import (
+    CacheBackend,
+    InMemoryBackend,
+    NullBackend,
+    RedisBackend,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def user_tag(user_id) -> str:
+    return f"user:{user_id}"
+
+
+def gift_tag(gift_id) -> str:
+    return f"gift:{gift_id}"
+
+
+def notifications_tag(user_id) -> str:
+    return f"notifications:{user_id}"
+
+
+USERS_TAG = "users"
+
+
+class ResponseCache:
+    """
+    Read-through cache for serialized JSON responses. Backend failures never fail the
+    request: reads fall back to the database and are counted as errors.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl_seconds: float = 30.0):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.errors = 0
+
+    async def get(self, key: str) -> Optional[bytes]:
+        try:
+            value = await self.backend.get(key)
+        except Exception as e:  # noqa: BLE001
+            self.errors += 1
+            logger.warning("Cache read failed for %s: %s", key, e)
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: bytes, tags: Iterable[str] = ()):
+        try:
+            await self.backend.set(key, value, self.ttl_seconds, tags)
+        except Exception as e:  # noqa: BLE001
+            self.errors += 1
+            logger.warning("Cache write failed for %s: %s", key, e)
+
+    async def invalidate(self, *tags: str):
+        """
+        Drops every entry carrying one of the tags. Called by services after a write
+        commits.
+        """
+        try:
+            self.invalidations += await self.backend.invalidate_tags(tags)
+        except Exception as e:  # noqa: BLE001
+            self.errors += 1
+            logger.warning("Cache invalidation failed for %s: %s", tags, e)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.backend.name,
+            "ttl_seconds": self.ttl_seconds,
+            "entries": self.backend.size(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "evictions": getattr(self.backend, "evictions", None),
+            "errors": self.errors,
+        }
+
+
+def build_backend(settings: Settings) -> CacheBackend:
+    if settings.cache_backend == "redis":
+        return RedisBackend(settings.cache_url, timeout=settings.cache_timeout_seconds)
+    if settings.cache_backend == "none":
+        return NullBackend()
+    return InMemoryBackend(max_entries=settings.cache_max_entries)
+
+
+# Defaults until create_app applies the configured settings with configure_cache
+response_cache = ResponseCache(InMemoryBackend())
+
+
+def configure_cache(settings: Settings):
+    response_cache.backend = build_backend(settings)
+    response_cache.ttl_seconds = settings.cache_ttl_seconds
+
+
+async def cached_response(
+    key: str,
+    load: Callable[[], Awaitable[Any]],
+    response_type: Any = None,
+    tags: Union[Iterable[str], Callable[[Any], Iterable[str]]] = (),
+    headers: Optional[Callable[[Any], Dict[str, str]]] = None,
+    encode: Optional[Callable[[Any], bytes]] = None,
+) -> Response:
+    """
+    Serves `key` from the cache, or runs `load`, serializes the result through
+    `response_type` and caches the body together with any response headers. `tags` may
+    be a callable receiving the validated data, so an entry can be tagged with every
+    gift it contains. `encode` skips validation for loaders that already return
+    schema-shaped dicts. Without either, the result is encoded the way FastAPI encodes
+    untyped responses.
+    """
+    cached = await response_cache.get(key)
+    if cached is not None:
+        header_line, body = cached.split(b"\n", 1)
+        return Response(
+            content=body, media_type="application/json", headers=json.loads(header_line)
+        )
+
+    if encode is not None:
+        data = await load()
+        body = encode(data)
+    elif response_type is None:
+        data = await load()
+        body = json.dumps(
+            jsonable_encoder(data), ensure_ascii=False, separators=(",", ":")
+        ).encode()
+    else:
+        adapter = TypeAdapter(response_type)
+        data = adapter.validate_python(await load(), from_attributes=True)
+        body = adapter.dump_json(data)
+    response_headers = headers(data) if headers else {}
+    entry_tags = tags(data) if callable(tags) else tags
+    await response_cache.set(
+        key, json.dumps(response_headers).encode() + b"\n" + body, entry_tags
+    )
+    return Response(
+        content=body, media_type="application/json", headers=response_headers
+    )
@@ -1,80 +1,261 @@
-from sqlalchemy import Column, String, Integer, Numeric, Enum, ForeignKey, Boolean, DateTime, Text
+import datetime
+import uuid
+
+from sqlalchemy import (
+    DDL,
+    BigInteger,
+    Boolean,
+    Column,
+    DateTime,
+    Enum,
+    ForeignKey,
+    Index,
+    Integer,
+    Numeric,
+    Sequence,
+    String,
+    Text,
+    event,
+    text,
+)
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
-import uuid
-import datetime
+
 from app.database import Base
 
+
+def utcnow() -> datetime.datetime:
+    # Naive UTC, matching the naive DateTime columns below
+    return datetime.datetime.now(datetime.UTC).replace(tzinfo=None)
+
+
 class User(Base):
     __tablename__ = "users"
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String(255), nullable=False)
-    role = Column(Enum("grandparent", "grandchild", "trustee", name="user_roles"), nullable=False)
-    
-    gifts_created = relationship("Gift", back_populates="grandparent", foreign_keys="Gift.grandparent_id")
-    gifts_received = relationship("Gift", back_populates="grandchild", foreign_keys="Gift.grandchild_id")
+    role = Column(
+        Enum("grandparent", "grandchild", "trustee", name="user_roles"), nullable=False
+    )
+
+    gifts_created = relationship(
+        "Gift", back_populates="grandparent", foreign_keys="Gift.grandparent_id"
+    )
+    gifts_received = relationship(
+        "Gift", back_populates="grandchild", foreign_keys="Gift.grandchild_id"
+    )
     notifications = relationship("Notification", back_populates="recipient")
 
+
 class Gift(Base):
     __tablename__ = "gifts"
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     grandparent_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     grandchild_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
-    grandchild_name = Column(String, nullable=True) # Added grandchild_name
+    grandchild_name = Column(String, nullable=True)  # Added grandchild_name
     message = Column(Text, nullable=True)
     corpus = Column(Numeric(15, 2), nullable=False)
     currency = Column(Enum("USD", "INR", name="currencies"), default="USD")
-    status = Column(Enum("Draft", "Active", "Under Review", "Approved", "Rejected", "Redirected", "Completed", name="gift_statuses"), default="Draft")
-    risk_profile = Column(Enum("Conservative", "Balanced", "Growth", name="risk_profiles"), default="Balanced")
-    rule_type = Column(Enum("Time", "Milestone", "Behavior", name="rule_types"), default="Milestone")
+    status = Column(
+        Enum(
+            "Draft",
+            "Active",
+            "Under Review",
+            "Approved",
+            "Rejected",
+            "Redirected",
+            "Completed",
+            name="gift_statuses",
+        ),
+        default="Draft",
+    )
+    risk_profile = Column(
+        Enum("Conservative", "Balanced", "Growth", name="risk_profiles"),
+        default="Balanced",
+    )
+    rule_type = Column(
+        Enum("Time", "Milestone", "Behavior", name="rule_types"), default="Milestone"
+    )
     fallback_ngo_id = Column(String(50), nullable=True)
-    
-    grandparent = relationship("User", back_populates="gifts_created", foreign_keys=[grandparent_id])
-    grandchild = relationship("User", back_populates="gifts_received", foreign_keys=[grandchild_id])
-    milestones = relationship("Milestone", back_populates="gift", cascade="all, delete-orphan")
-    media_messages = relationship("MediaMessage", back_populates="gift", cascade="all, delete-orphan")
-    override_window = relationship("OverrideWindow", back_populates="gift", uselist=False, cascade="all, delete-orphan")
+    created_at = Column(
+        DateTime, server_default=text("timezone('utc', now())"), nullable=False
+    )
+
+    grandparent = relationship(
+        "User", back_populates="gifts_created", foreign_keys=[grandparent_id]
+    )
+    grandchild = relationship(
+        "User", back_populates="gifts_received", foreign_keys=[grandchild_id]
+    )
+    milestones = relationship(
+        "Milestone", back_populates="gift", cascade="all, delete-orphan"
+    )
+    media_messages = relationship(
+        "MediaMessage", back_populates="gift", cascade="all, delete-orphan"
+    )
+    override_window = relationship(
+        "OverrideWindow",
+        back_populates="gift",
+        uselist=False,
+        cascade="all, delete-orphan",
+    )
+
+    __table_args__ = (
+        Index(
+            "ix_gifts_grandparent_id_created_at_id",
+            "grandparent_id",
+            "created_at",
+            "id",
+        ),
+        Index(
+            "ix_gifts_grandchild_id_created_at_id", "grandchild_id", "created_at", "id"
+        ),
+    )
+
 
 class Milestone(Base):
     __tablename__ = "milestones"
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    gift_id = Column(UUID(as_uuid=True), ForeignKey("gifts.id"), nullable=False)
-    type = Column(String(255), nullable=False) # e.g. Graduation
+    gift_id = Column(
+        UUID(as_uuid=True), ForeignKey("gifts.id"), nullable=False, index=True
+    )
+    type = Column(String(255), nullable=False)  # e.g. Graduation
     percentage = Column(Integer, nullable=False)
-    status = Column(Enum("Pending", "Submitted", "Approved", "Rejected", name="milestone_statuses"), default="Pending")
-    
+    status = Column(
+        Enum("Pending", "Submitted", "Approved", "Rejected", name="milestone_statuses"),
+        default="Pending",
+    )
+
     gift = relationship("Gift", back_populates="milestones")
 
+
+NOTIFICATION_SEQ = Sequence("notifications_seq_seq")
+
+
 class Notification(Base):
     __tablename__ = "notifications"
+    # Range-partitioned by month on created_at, which is therefore part of the primary key. Monthly
+    # partitions are created ahead and expired by app.shared.notifications.retention
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     recipient_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
-    role = Column(Enum("grandparent", "grandchild", "trustee", name="user_roles_context"), nullable=False)
+    role = Column(
+        Enum("grandparent", "grandchild", "trustee", name="user_roles_context"),
+        nullable=False,
+    )
     event_type = Column(String(100), nullable=False)
     message = Column(Text, nullable=False)
     is_read = Column(Boolean, default=False)
     action_url = Column(String(255), nullable=True)
-    created_at = Column(DateTime, default=datetime.datetime.utcnow)
-    
+    created_at = Column(DateTime, primary_key=True, default=utcnow)
+    # Numbered in each recipient's commit order (see app.shared.notifications.stream.lock_stream_order); streams resume on it
+    seq = Column(
+        BigInteger,
+        NOTIFICATION_SEQ,
+        server_default=NOTIFICATION_SEQ.next_value(),
+        nullable=False,
+    )
+
     recipient = relationship("User", back_populates="notifications")
 
+    __table_args__ = (
+        Index("ix_notifications_recipient_id_created_at", "recipient_id", "created_at"),
+        Index(
+            "ix_notifications_unread_recipient_id_created_at",
+            "recipient_id",
+            "created_at",
+            postgresql_where=text("is_read = false"),
+        ),
+        Index("ix_notifications_recipient_id_seq", "recipient_id", "seq"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+
+# Catches rows outside the monthly partitions, and makes a metadata.create_all table writable
+event.listen(
+    Notification.__table__,
+    "after_create",
+    DDL("CREATE TABLE notifications_default PARTITION OF notifications DEFAULT"),
+)
+
+
 class MediaMessage(Base):
     __tablename__ = "media_messages"
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    gift_id = Column(UUID(as_uuid=True), ForeignKey("gifts.id"), nullable=False)
+    gift_id = Column(
+        UUID(as_uuid=True), ForeignKey("gifts.id"), nullable=False, index=True
+    )
     uploader_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
-    type = Column(Enum("text", "photo", "audio", "video", name="media_types"), nullable=False)
+    type = Column(
+        Enum("text", "photo", "audio", "video", name="media_types"), nullable=False
+    )
     file_path = Column(String(255), nullable=False)
-    created_at = Column(DateTime, default=datetime.datetime.utcnow)
-    
+    created_at = Column(DateTime, default=utcnow)
+
     gift = relationship("Gift", back_populates="media_messages")
 
+
 class OverrideWindow(Base):
     __tablename__ = "override_windows"
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    gift_id = Column(UUID(as_uuid=True), ForeignKey("gifts.id"), nullable=False)
-    created_at = Column(DateTime, default=datetime.datetime.utcnow)
-    expires_at = Column(DateTime, nullable=False) # created_at + 7 days
-    status = Column(Enum("Open", "Overridden", "Expired", name="override_statuses"), default="Open")
-    
+    gift_id = Column(
+        UUID(as_uuid=True), ForeignKey("gifts.id"), nullable=False, index=True
+    )
+    created_at = Column(DateTime, default=utcnow)
+    expires_at = Column(DateTime, nullable=False)  # created_at + 7 days
+    status = Column(
+        Enum("Open", "Overridden", "Expired", name="override_statuses"), default="Open"
+    )
+
     gift = relationship("Gift", back_populates="override_window")
+
+    __table_args__ = (
+        Index(
+            "ix_override_windows_open_expires_at",
+            "expires_at",
+            postgresql_where=text("status = 'Open'"),
+        ),
+    )
+
+
+class UserVersion(Base):
+    __tablename__ = "user_versions"
+    # Bumped in the same transaction as any write that changes what this user's dashboards or feed return
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=1)
+
+
+class NotificationCounter(Base):
+    __tablename__ = "notification_counters"
+    # Unread notifications per recipient, adjusted by the same statement that inserts or reads them
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True)
+    unread = Column(Integer, nullable=False, server_default=text("0"))
+
+
+class NotificationOutbox(Base):
+    __tablename__ = "notification_outbox"
+    # Written in the same transaction as the change that triggers it and drained into notifications by
+    # the OutboxDispatcher; the outbox id becomes the notification id
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    # Optional; a second row with the same key is not enqueued
+    dedup_key = Column(String(255), nullable=True, unique=True)
+    recipient_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    role = Column(
+        Enum("grandparent", "grandchild", "trustee", name="user_roles_context"),
+        nullable=False,
+    )
+    event_type = Column(String(100), nullable=False)
+    message = Column(Text, nullable=False)
+    action_url = Column(String(255), nullable=True)
+    created_at = Column(DateTime, default=utcnow)
+    # Not claimed before this time; pushed back after each failed attempt
+    available_at = Column(DateTime, nullable=False, default=utcnow)
+    attempts = Column(Integer, nullable=False, server_default=text("0"))
+    last_error = Column(Text, nullable=True)
+    dispatched_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index(
+            "ix_notification_outbox_pending_available_at",
+            "available_at",
+            postgresql_where=text("dispatched_at IS NULL"),
+        ),
+    )
@@ -1,14 +1,39 @@
-from fastapi import APIRouter, Depends, HTTPException
+import uuid
+from typing import List, Literal, Optional, Union
+
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.database import get_db
+
+from app.database import get_db, get_user_read_db
+from app.shared.cache.service import cached_response, gift_tag, user_tag
+from app.shared.gifts.schemas import (
+    BulkGiftResult,
+    BulkStatusResult,
+    BulkStatusUpdate,
+    Currency,
+    GiftCreate,
+    GiftRecordSchema,
+    GiftSchema,
+    GiftStatus,
+    GiftSummarySchema,
+    PortfolioSchema,
+)
 from app.shared.gifts.service import GiftService
-from app.shared.gifts.schemas import GiftCreate, GiftSchema, GiftStatus
-from typing import List
+from app.shared.gifts.versions import etag_response
+from app.shared.responses import FastJSONResponse, dumps
 
 router = APIRouter(prefix="/gifts", tags=["Gifts"])
 
+MAX_PAGE_SIZE = 200
+# Gifts per POST /gifts/bulk; the request holds one connection and transaction for all its chunks
+MAX_BULK_GIFTS = 1000
+GiftFields = Literal["full", "summary"]
+
+
 @router.post("/", response_model=GiftSchema, status_code=201)
-async def create_gift(gift: GiftCreate, grandparent_id: str, db: AsyncSession = Depends(get_db)):
+async def create_gift(
+    gift: GiftCreate, grandparent_id: str, db: AsyncSession = Depends(get_db)
+):
     """
     Endpoint to create a new gift from the wizard.
     """
@@ -17,16 +42,158 @@ async def create_gift(gift: GiftCreate, grandparent_id: str, db: AsyncSession =
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@router.get("/grandparent/{user_id}", response_model=List[GiftSchema])
-async def get_grandparent_dashboard(user_id: str, db: AsyncSession = Depends(get_db)):
-    return await GiftService.get_gifts_by_user(db, user_id, is_grandparent=True)
 
-@router.get("/grandchild/{user_id}", response_model=List[GiftSchema])
-async def get_grandchild_dashboard(user_id: str, db: AsyncSession = Depends(get_db)):
-    return await GiftService.get_gifts_by_user(db, user_id, is_grandparent=False)
+@router.post("/bulk", response_model=List[BulkGiftResult])
+async def create_gifts_bulk(
+    grandparent_id: str,
+    gifts: List[GiftCreate] = Body(..., max_length=MAX_BULK_GIFTS),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Endpoint to onboard a family: creates up to MAX_BULK_GIFTS gifts at once and reports
+    per-item results. Longer lists are rejected with 422.
+    """
+    try:
+        return await GiftService.create_gifts_bulk(db, grandparent_id, gifts)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 
-@router.patch("/{gift_id}/status", response_model=GiftSchema)
-async def update_gift_status(gift_id: str, next_status: GiftStatus, db: AsyncSession = Depends(get_db)):
+async def _list_gifts(
+    request: Request,
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    is_grandparent: bool,
+    limit: Optional[int],
+    cursor: Optional[str],
+    fields: GiftFields,
+) -> Response:
+    """
+    Shared dashboard listing, served through the response cache. Fetches one extra row to know
+    whether another page exists and, if so, returns the keyset cursor in the X-Next-Cursor header.
+    Entries are tagged with the user and every gift they contain. Polls carrying the current
+    ETag get a 304 before any of this runs.
+    """
+    try:
+        after = GiftService.decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    next_page = {}
+
+    async def load():
+        fetch = (
+            GiftService.get_gift_summaries_by_user
+            if fields == "summary"
+            else GiftService.get_gifts_by_user
+        )
+        rows = await fetch(
+            db,
+            str(user_id),
+            is_grandparent,
+            limit=limit + 1 if limit else None,
+            after=after,
+        )
+        if limit and len(rows) > limit:
+            rows = rows[:limit]
+            next_page["X-Next-Cursor"] = GiftService.encode_cursor(rows[-1])
+        return rows
+
+    role = "grandparent" if is_grandparent else "grandchild"
+    key = f"gifts:{role}:{user_id}:{fields}:{limit}:{cursor}"
+    return await etag_response(
+        request,
+        db,
+        user_id,
+        key,
+        lambda versioned_key: cached_response(
+            versioned_key,
+            load,
+            tags=lambda gifts: [user_tag(user_id), *(gift_tag(g["id"]) for g in gifts)],
+            headers=lambda _: next_page,
+            encode=dumps,
+        ),
+    )
+
+
+@router.get(
+    "/grandparent/{user_id}",
+    response_model=Union[List[GiftSchema], List[GiftSummarySchema]],
+    response_class=FastJSONResponse,
+)
+async def get_grandparent_dashboard(
+    user_id: uuid.UUID,
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: GiftFields = "full",
+    db: AsyncSession = Depends(get_user_read_db),
+):
+    return await _list_gifts(request, db, user_id, True, limit, cursor, fields)
+
+
+@router.get("/grandparent/{user_id}/portfolio", response_model=PortfolioSchema)
+async def get_grandparent_portfolio(
+    user_id: uuid.UUID,
+    request: Request,
+    currency: Currency = Currency.USD,
+    db: AsyncSession = Depends(get_user_read_db),
+):
+    """
+    Portfolio overview for the Grandparent Dashboard, aggregated in SQL.
+    """
+    key = f"portfolio:{user_id}:{currency.value}"
+    return await etag_response(
+        request,
+        db,
+        user_id,
+        key,
+        lambda versioned_key: cached_response(
+            versioned_key,
+            lambda: GiftService.get_portfolio(db, str(user_id), currency),
+            PortfolioSchema,
+            tags=[user_tag(user_id)],
+        ),
+    )
+
+
+@router.get(
+    "/grandchild/{user_id}",
+    response_model=Union[List[GiftSchema], List[GiftSummarySchema]],
+    response_class=FastJSONResponse,
+)
+async def get_grandchild_dashboard(
+    user_id: uuid.UUID,
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: GiftFields = "full",
+    db: AsyncSession = Depends(get_user_read_db),
+):
+    return await _list_gifts(request, db, user_id, False, limit, cursor, fields)
+
+
+@router.get("/{gift_id}", response_model=GiftSchema, response_class=FastJSONResponse)
+async def get_gift(gift_id: str, db: AsyncSession = Depends(get_db)):
+    try:
+        return FastJSONResponse(await GiftService.get_gift(db, gift_id))
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.patch("/status", response_model=BulkStatusResult)
+async def update_gift_statuses(
+    update: BulkStatusUpdate, db: AsyncSession = Depends(get_db)
+):
+    """
+    Moves many gifts to the same status in one statement; gifts failing the state check are reported.
+    """
+    return await GiftService.update_status_bulk(db, update.gift_ids, update.next_status)
+
+
+@router.patch("/{gift_id}/status", response_model=GiftRecordSchema)
+async def update_gift_status(
+    gift_id: str, next_status: GiftStatus, db: AsyncSession = Depends(get_db)
+):
     try:
         return await GiftService.update_status(db, gift_id, next_status)
     except ValueError as e:
@@ -34,6 +201,7 @@ async def update_gift_status(gift_id: str, next_status: GiftStatus, db: AsyncSes
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+
 @router.delete("/{gift_id}", status_code=204)
 async def delete_gift(gift_id: str, db: AsyncSession = Depends(get_db)):
     try:
@@ -1,15 +1,18 @@
-from pydantic import BaseModel, Field
 import uuid
-from typing import List, Optional
-from decimal import Decimal
 from datetime import datetime
+from decimal import Decimal
 from enum import Enum
+from typing import List, Literal, Optional
+
+from pydantic import BaseModel, Field
+
 
 class UserRole(str, Enum):
     grandparent = "grandparent"
     grandchild = "grandchild"
     trustee = "trustee"
 
+
 class GiftStatus(str, Enum):
     Draft = "Draft"
     Active = "Active"
@@ -19,32 +22,38 @@ class GiftStatus(str, Enum):
     Redirected = "Redirected"
     Completed = "Completed"
 
+
 class RiskProfile(str, Enum):
     Conservative = "Conservative"
     Balanced = "Balanced"
     Growth = "Growth"
 
+
 class Currency(str, Enum):
     USD = "USD"
     INR = "INR"
 
+
 class RuleType(str, Enum):
     Time = "Time"
     Milestone = "Milestone"
     Behavior = "Behavior"
 
+
 class MilestoneStatus(str, Enum):
     Pending = "Pending"
     Submitted = "Submitted"
     Approved = "Approved"
     Rejected = "Rejected"
 
+
 class MediaType(str, Enum):
     text = "text"
     photo = "photo"
     audio = "audio"
     video = "video"
 
+
 class MediaMessageSchema(BaseModel):
     id: uuid.UUID
     gift_id: uuid.UUID
@@ -52,33 +61,39 @@ class MediaMessageSchema(BaseModel):
     type: MediaType
     file_path: str
     created_at: datetime
-    
+
     class Config:
         from_attributes = True
 
+
 # User schemas
 class UserBase(BaseModel):
     name: str
     role: UserRole
 
+
 class UserCreate(UserBase):
     pass
 
+
 class UserSchema(UserBase):
     id: uuid.UUID
 
     class Config:
         from_attributes = True
 
+
 # Milestone schemas
 class MilestoneBase(BaseModel):
     type: str
     percentage: int
     status: MilestoneStatus = MilestoneStatus.Pending
 
+
 class MilestoneCreate(MilestoneBase):
     pass
 
+
 class MilestoneSchema(MilestoneBase):
     id: uuid.UUID
     gift_id: uuid.UUID
@@ -86,6 +101,7 @@ class MilestoneSchema(MilestoneBase):
     class Config:
         from_attributes = True
 
+
 # Gift schemas
 class GiftBase(BaseModel):
     grandchild_id: uuid.UUID
@@ -97,20 +113,109 @@ class GiftBase(BaseModel):
     rule_type: RuleType = RuleType.Milestone
     fallback_ngo_id: Optional[str] = None
 
+
 class GiftCreate(GiftBase):
     milestones: List[MilestoneCreate]
 
-class GiftSchema(GiftBase):
+
+class GiftRecordSchema(GiftBase):
     id: uuid.UUID
     grandparent_id: uuid.UUID
     status: GiftStatus
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class GiftSchema(GiftRecordSchema):
     milestones: List[MilestoneSchema]
     media_messages: List[MediaMessageSchema] = []
 
     class Config:
         from_attributes = True
 
+
+class GiftSummarySchema(BaseModel):
+    id: uuid.UUID
+    grandparent_id: uuid.UUID
+    grandchild_id: uuid.UUID
+    grandchild_name: Optional[str] = None
+    corpus: Decimal
+    currency: Currency
+    status: GiftStatus
+    risk_profile: RiskProfile
+    rule_type: RuleType
+    created_at: datetime
+    milestones_total: int
+    milestones_approved: int
+    media_count: int
+
+    class Config:
+        from_attributes = True
+
+
+class GrandchildAllocationSchema(BaseModel):
+    grandchild_id: uuid.UUID
+    grandchild_name: Optional[str] = None
+    gift_count: int
+    corpus: Decimal
+    allocated: Decimal
+
+
+class RiskAllocationSchema(BaseModel):
+    risk_profile: RiskProfile
+    gift_count: int
+    corpus: Decimal
+    percentage: Decimal
+
+
+class PortfolioSchema(BaseModel):
+    grandparent_id: uuid.UUID
+    currency: Currency
+    gift_count: int
+    total_corpus: Decimal
+    allocated: Decimal
+    released: Decimal
+    grandchildren: List[GrandchildAllocationSchema]
+    risk_allocation: List[RiskAllocationSchema]
+
+
+class BulkStatusUpdate(BaseModel):
+    gift_ids: List[uuid.UUID] = Field(..., min_length=1)
+    next_status: GiftStatus
+
+
+class StatusUpdateFailure(BaseModel):
+    gift_id: uuid.UUID
+    current_status: Optional[GiftStatus] = None
+    reason: str
+
+
+class BulkStatusResult(BaseModel):
+    next_status: GiftStatus
+    updated: List[uuid.UUID]
+    failed: List[StatusUpdateFailure]
+
+
+class BulkGiftResult(BaseModel):
+    index: int
+    status: Literal["created", "failed"]
+    gift: Optional[GiftSchema] = None
+    reason: Optional[str] = None
+
+
 # Notification schemas
+class NotificationCreate(BaseModel):
+    recipient_id: uuid.UUID
+    role: UserRole
+    event_type: str
+    message: str
+    action_url: Optional[str] = None
+    # Outbox rows sharing a key are enqueued once (e.g. one approval notice per milestone)
+    dedup_key: Optional[str] = None
+
+
 class NotificationSchema(BaseModel):
     id: uuid.UUID
     recipient_id: uuid.UUID
@@ -124,6 +229,20 @@ class NotificationSchema(BaseModel):
     class Config:
         from_attributes = True
 
+
+class UnreadCountSchema(BaseModel):
+    user_id: uuid.UUID
+    unread: int
+
+
+class NotificationIds(BaseModel):
+    notification_ids: List[uuid.UUID] = Field(..., min_length=1)
+
+
+class MarkReadResult(BaseModel):
+    marked: int
+
+
 # Voice parsing schemas
 class VoiceParseResponse(BaseModel):
     grandchild_name: Optional[str]
@@ -1,135 +1,866 @@
+import datetime
+import logging
+import uuid
+from decimal import Decimal
+from typing import List, Optional, Tuple
+
+from sqlalchemy import (
+    String,
+    cast,
+    func,
+    insert,
+    literal,
+    tuple_,
+    union,
+    union_all,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from app.shared.gifts.models import Gift, User, Milestone
-from app.shared.gifts.schemas import GiftCreate, GiftStatus, MilestoneStatus
-from app.shared.gifts.state_machine import GiftStateMachine
-from typing import List
-import uuid
+
+from app.database import recent_writes
+from app.shared.cache.service import USERS_TAG, gift_tag, response_cache, user_tag
+from app.shared.gifts.models import (
+    Gift,
+    MediaMessage,
+    Milestone,
+    OverrideWindow,
+    User,
+    utcnow,
+)
+from app.shared.gifts.schemas import (
+    BulkGiftResult,
+    BulkStatusResult,
+    Currency,
+    GiftCreate,
+    GiftRecordSchema,
+    GiftSchema,
+    GiftStatus,
+    GrandchildAllocationSchema,
+    MilestoneSchema,
+    MilestoneStatus,
+    NotificationCreate,
+    PortfolioSchema,
+    RiskAllocationSchema,
+    RiskProfile,
+    StatusUpdateFailure,
+    UserRole,
+)
+from app.shared.gifts.state_machine import GiftStateMachine, StateMachineError
+from app.shared.gifts.versions import (
+    build_version_bump,
+    build_version_bump_from,
+    bump_user_versions,
+)
+from app.shared.notifications.outbox import OutboxService, outbox_dispatcher
+from app.shared.utils import convert_amount
+
+logger = logging.getLogger(__name__)
+
+# Demo trustee assigned to every gift
+TRUSTEE_ID = uuid.UUID("33333333-3333-3333-3333-333333333333")
+
+# (created_at, id) of the last gift on a dashboard page
+GiftKey = Tuple[datetime.datetime, uuid.UUID]
+
+# Gifts per multi-row INSERT; keeps bind parameters well under the asyncpg limit of 32767
+BULK_CHUNK_SIZE = 200
+# Reported for gifts whose write failed; the database error itself is only logged
+BULK_WRITE_FAILED = "Could not save the gift; please retry"
+
+# Spec 4.12 notifications sent when a gift enters a status: (recipient, event_type, message)
+STATUS_NOTIFICATIONS = {
+    GiftStatus.Under_Review: [
+        (
+            UserRole.grandparent,
+            "withdrawal_requested",
+            "An emergency withdrawal was requested for {name}'s gift.",
+        ),
+        (
+            UserRole.trustee,
+            "withdrawal_requested",
+            "An emergency withdrawal for {name}'s gift is waiting for your review.",
+        ),
+    ],
+    GiftStatus.Approved: [
+        (
+            UserRole.grandchild,
+            "withdrawal_approved",
+            "Your emergency withdrawal has been approved.",
+        ),
+    ],
+    GiftStatus.Rejected: [
+        (
+            UserRole.grandparent,
+            "override_window_opened",
+            "The trustee rejected the request for {name}'s gift. You have 7 days to override before the amount is redirected to your chosen NGO.",
+        ),
+    ],
+    GiftStatus.Redirected: [
+        (
+            UserRole.grandparent,
+            "ngo_redirection",
+            "The amount of {name}'s gift is being redirected to your chosen NGO.",
+        ),
+    ],
+    GiftStatus.Completed: [
+        (
+            UserRole.grandchild,
+            "gift_unlocked",
+            "Your gift has been unlocked and the payout is on its way.",
+        ),
+    ],
+}
+
+# Days the grandparent has to override a trustee rejection (spec 4.5)
+OVERRIDE_WINDOW_DAYS = 7
+# Status the open override window is closed with when its gift leaves Rejected
+OVERRIDE_WINDOW_CLOSURES = {
+    GiftStatus.Active: "Overridden",
+    GiftStatus.Redirected: "Expired",
+}
+
+# Gift statuses whose corpus is still held by the platform (not yet paid out or redirected)
+ALLOCATED_STATUSES = (
+    GiftStatus.Draft,
+    GiftStatus.Active,
+    GiftStatus.Under_Review,
+    GiftStatus.Approved,
+    GiftStatus.Rejected,
+)
+
 
 class GiftService:
     @staticmethod
-    async def create_gift(db: AsyncSession, grandparent_id: str, gift_data: GiftCreate) -> Gift:
+    async def create_gift(
+        db: AsyncSession, grandparent_id: str, gift_data: GiftCreate
+    ) -> GiftSchema:
         """
-        Creates a new gift in 'Draft' status and validates the state transition to 'Active'
-        if confirmation is provided (logic for confirmed creation).
+        Creates a new gift and moves it from 'Draft' to 'Active' through the State Machine.
+        Users, gift, milestones and notifications are written by a single statement in one
+        transaction, and the response is built from the inserted values without a re-fetch.
         """
-        # Ensure grandparent exists
+        GiftService._validate_gift(gift_data)
+
         gp_id = uuid.UUID(grandparent_id)
-        gp = await db.execute(select(User).where(User.id == gp_id))
-        if not gp.scalar_one_or_none():
-            db.add(User(id=gp_id, name="Grandparent", role="grandparent"))
-
-        # Ensure grandchild exists
-        gc = await db.execute(select(User).where(User.id == gift_data.grandchild_id))
-        if not gc.scalar_one_or_none():
-            db.add(User(id=gift_data.grandchild_id, name=gift_data.grandchild_name or "Grandchild", role="grandchild"))
-
-        # Ensure trustee exists
-        trustee_id = uuid.UUID("33333333-3333-3333-3333-333333333333")
-        trustee = await db.execute(select(User).where(User.id == trustee_id))
-        if not trustee.scalar_one_or_none():
-            db.add(User(id=trustee_id, name="Trustee", role="trustee"))
-            
-        await db.commit() # Commit to avoid FK issues
-        
-        new_gift = Gift(
-            id=uuid.uuid4(),
-            grandparent_id=uuid.UUID(grandparent_id),
-            grandchild_id=gift_data.grandchild_id,
-            grandchild_name=gift_data.grandchild_name,
-            corpus=gift_data.corpus,
-            currency=gift_data.currency,
-            message=gift_data.message,
-            status=GiftStatus.Active,
-            risk_profile=gift_data.risk_profile,
-            rule_type=gift_data.rule_type,
-            fallback_ngo_id=gift_data.fallback_ngo_id
-        )
-        
-        db.add(new_gift)
-        
-        # Add milestones
-        for m in gift_data.milestones:
-            milestone = Milestone(
-                id=uuid.uuid4(),
-                gift_id=new_gift.id,
-                type=m.type,
-                percentage=m.percentage,
-                status=MilestoneStatus.Pending
-            )
-            db.add(milestone)
-        
+        user_rows, gift_row, milestone_rows, notification_rows = (
+            GiftService._build_gift_rows(gp_id, gift_data, utcnow())
+        )
+        user_rows.append(
+            {"id": TRUSTEE_ID, "name": "Trustee", "role": UserRole.trustee.value}
+        )
+
+        await db.execute(
+            GiftService._build_creation_statement(
+                user_rows, [gift_row], milestone_rows, notification_rows
+            )
+        )
         await db.commit()
-        
-        from sqlalchemy.orm import selectinload
-        # Re-fetch with eagerly loaded milestones and media_messages to satisfy Pydantic serialization
-        refresh_query = select(Gift).where(Gift.id == new_gift.id).options(selectinload(Gift.milestones), selectinload(Gift.media_messages))
-        refresh_result = await db.execute(refresh_query)
-        new_gift_loaded = refresh_result.scalar_one()
-        
-        # Trigger notification for Grandparent
-        from app.shared.notifications.service import NotificationService
-        from app.shared.gifts.schemas import UserRole
-        
-        await NotificationService.create_notification(
-            db,
-            str(new_gift.grandparent_id),
-            UserRole.grandparent,
-            "gift_created",
-            f"Your gift for {new_gift.grandchild_name or 'your grandchild'} has been created and is now {new_gift.status}."
-        )
-        
-        # Trigger notification for Grandchild
-        await NotificationService.create_notification(
-            db,
-            str(new_gift.grandchild_id),
-            UserRole.grandchild,
-            "gift_received",
-            f"You have received a new gift! Log in to view the milestones."
+        outbox_dispatcher.wake()
+        await recent_writes.mark(gp_id, gift_data.grandchild_id)
+        await response_cache.invalidate(
+            *GiftService._creation_tags(gp_id, [gift_data.grandchild_id])
         )
-        
-        return new_gift_loaded
+
+        return GiftService._to_schema(gift_row, milestone_rows)
 
     @staticmethod
-    async def update_status(db: AsyncSession, gift_id: str, next_status: GiftStatus) -> Gift:
+    async def create_gifts_bulk(
+        db: AsyncSession, grandparent_id: str, gifts_data: List[GiftCreate]
+    ) -> List[BulkGiftResult]:
         """
-        Updates the status of a gift using the State Machine.
+        Creates many gifts for one grandparent. Each payload is validated on its own and reported
+        as created or failed; the valid ones are written with multi-row INSERTs in one transaction,
+        one savepoint per chunk, so a chunk the database rejects fails only its own gifts.
         """
-        result = await db.execute(select(Gift).where(Gift.id == uuid.UUID(gift_id)))
-        gift = result.scalar_one_or_none()
-        
-        if not gift:
-            raise ValueError("Gift not found")
-        
-        # Validate transition
-        GiftStateMachine.validate_transition(gift.status, next_status)
-        
-        gift.status = next_status
+        gp_id = uuid.UUID(grandparent_id)
+        now = utcnow()
+
+        results: List[BulkGiftResult] = []
+        pending = []
+        for index, gift_data in enumerate(gifts_data):
+            try:
+                GiftService._validate_gift(gift_data)
+            except (StateMachineError, ValueError) as e:
+                results.append(
+                    BulkGiftResult(index=index, status="failed", reason=str(e))
+                )
+                continue
+            pending.append((index, GiftService._build_gift_rows(gp_id, gift_data, now)))
+
+        written = []
+        for start in range(0, len(pending), BULK_CHUNK_SIZE):
+            chunk = pending[start : start + BULK_CHUNK_SIZE]
+            try:
+                async with db.begin_nested():
+                    await db.execute(
+                        GiftService._build_chunk_statement([rows for _, rows in chunk])
+                    )
+            except SQLAlchemyError as e:
+                GiftService._log_bulk_failure(e, len(chunk))
+                results.extend(
+                    BulkGiftResult(
+                        index=index, status="failed", reason=BULK_WRITE_FAILED
+                    )
+                    for index, _ in chunk
+                )
+            else:
+                written.extend(chunk)
+
+        if written:
+            try:
+                await db.commit()
+            except SQLAlchemyError as e:
+                await db.rollback()
+                GiftService._log_bulk_failure(e, len(written))
+                results.extend(
+                    BulkGiftResult(
+                        index=index, status="failed", reason=BULK_WRITE_FAILED
+                    )
+                    for index, _ in written
+                )
+                written = []
+        elif pending:
+            await db.rollback()
+
+        if written:
+            outbox_dispatcher.wake()
+            grandchild_ids = [rows[1]["grandchild_id"] for _, rows in written]
+            await recent_writes.mark(gp_id, *grandchild_ids)
+            await response_cache.invalidate(
+                *GiftService._creation_tags(gp_id, grandchild_ids)
+            )
+            results.extend(
+                BulkGiftResult(
+                    index=index,
+                    status="created",
+                    gift=GiftService._to_schema(gift_row, milestone_rows),
+                )
+                for index, (_, gift_row, milestone_rows, _) in written
+            )
+
+        return sorted(results, key=lambda r: r.index)
+
+    @staticmethod
+    def _build_chunk_statement(chunk):
+        # Grandparent and trustee repeat across payloads; keep one row per user id
+        users = {
+            TRUSTEE_ID: {
+                "id": TRUSTEE_ID,
+                "name": "Trustee",
+                "role": UserRole.trustee.value,
+            }
+        }
+        for user_rows, _, _, _ in chunk:
+            for row in user_rows:
+                users.setdefault(row["id"], row)
+        return GiftService._build_creation_statement(
+            list(users.values()),
+            [gift_row for _, gift_row, _, _ in chunk],
+            [row for _, _, milestone_rows, _ in chunk for row in milestone_rows],
+            [row for _, _, _, notification_rows in chunk for row in notification_rows],
+        )
+
+    @staticmethod
+    def _log_bulk_failure(error: SQLAlchemyError, count: int):
+        # The driver's message, without the statement and parameters SQLAlchemy wraps around it
+        logger.warning(
+            "Bulk gift write of %d gifts failed: %s",
+            count,
+            getattr(error, "orig", None) or error,
+        )
+
+    @staticmethod
+    def _creation_tags(gp_id: uuid.UUID, grandchild_ids: List[uuid.UUID]) -> List[str]:
+        """
+        Cache tags touched by new gifts: both dashboards and the user list. Notification feeds are
+        invalidated by the outbox dispatcher once the notifications are delivered.
+        """
+        user_ids = {gp_id, *grandchild_ids}
+        return [USERS_TAG, *(user_tag(uid) for uid in user_ids)]
+
+    @staticmethod
+    def _validate_gift(gift_data: GiftCreate):
+        """
+        Checks a creation payload before anything is written. Raises StateMachineError or ValueError.
+        """
+        GiftStateMachine.validate_transition(GiftStatus.Draft, GiftStatus.Active)
+        if gift_data.corpus <= 0:
+            raise ValueError("Corpus must be greater than zero")
+        if sum(m.percentage for m in gift_data.milestones) > 100:
+            raise ValueError("Milestone percentages cannot exceed 100")
+
+    @staticmethod
+    def _build_gift_rows(
+        gp_id: uuid.UUID, gift_data: GiftCreate, now: datetime.datetime
+    ):
+        """
+        Returns (user_rows, gift_row, milestone_rows, notification_rows) ready for Core inserts;
+        notification_rows are outbox rows.
+        """
+        gift_id = uuid.uuid4()
+        user_rows = [
+            {"id": gp_id, "name": "Grandparent", "role": UserRole.grandparent.value},
+            {
+                "id": gift_data.grandchild_id,
+                "name": gift_data.grandchild_name or "Grandchild",
+                "role": UserRole.grandchild.value,
+            },
+        ]
+        gift_row = {
+            "id": gift_id,
+            "grandparent_id": gp_id,
+            "grandchild_id": gift_data.grandchild_id,
+            "grandchild_name": gift_data.grandchild_name,
+            "message": gift_data.message,
+            "corpus": gift_data.corpus,
+            "currency": gift_data.currency.value,
+            "status": GiftStatus.Active.value,
+            "risk_profile": gift_data.risk_profile.value,
+            "rule_type": gift_data.rule_type.value,
+            "fallback_ngo_id": gift_data.fallback_ngo_id,
+            "created_at": now,
+        }
+        milestone_rows = [
+            {
+                "id": uuid.uuid4(),
+                "gift_id": gift_id,
+                "type": m.type,
+                "percentage": m.percentage,
+                "status": MilestoneStatus.Pending.value,
+            }
+            for m in gift_data.milestones
+        ]
+        notification_rows = OutboxService.build_rows(
+            [
+                NotificationCreate(
+                    recipient_id=gp_id,
+                    role=UserRole.grandparent,
+                    event_type="gift_created",
+                    message=f"Your gift for {gift_data.grandchild_name or 'your grandchild'} has been created and is now {GiftStatus.Active.value}.",
+                ),
+                NotificationCreate(
+                    recipient_id=gift_data.grandchild_id,
+                    role=UserRole.grandchild,
+                    event_type="gift_received",
+                    message="You have received a new gift! Log in to view the milestones.",
+                ),
+            ],
+            now,
+        )
+        return user_rows, gift_row, milestone_rows, notification_rows
+
+    @staticmethod
+    def _to_schema(gift_row: dict, milestone_rows: List[dict]) -> GiftSchema:
+        return GiftSchema(
+            **gift_row,
+            milestones=[MilestoneSchema(**row) for row in milestone_rows],
+            media_messages=[],
+        )
+
+    @staticmethod
+    def _build_creation_statement(
+        user_rows: List[dict],
+        gift_rows: List[dict],
+        milestone_rows: List[dict],
+        notification_rows: List[dict],
+    ):
+        """
+        Chains the inserts as data-modifying CTEs so Postgres runs them as one statement (one round trip).
+        Users are upserted with ON CONFLICT DO NOTHING; foreign keys are checked at the end of the statement.
+        The grandparent and grandchildren get their dashboard versions bumped in the same statement, and
+        the notifications are queued in the outbox by it.
+        """
+        owner_ids = [row["grandparent_id"] for row in gift_rows] + [
+            row["grandchild_id"] for row in gift_rows
+        ]
+        ctes = [
+            pg_insert(User)
+            .values(user_rows)
+            .on_conflict_do_nothing(index_elements=[User.id])
+            .cte("upsert_users"),
+            insert(Gift).values(gift_rows).cte("insert_gifts"),
+            build_version_bump(owner_ids).cte("bump_versions"),
+        ]
+        if milestone_rows:
+            ctes.append(
+                insert(Milestone).values(milestone_rows).cte("insert_milestones")
+            )
+        return OutboxService.build_insert(notification_rows).add_cte(*ctes)
+
+    @staticmethod
+    async def transition(
+        db: AsyncSession, gift_id: uuid.UUID, next_status: GiftStatus
+    ) -> dict:
+        """
+        Moves one gift to next_status inside the caller's transaction and returns its gifts row;
+        the caller commits. The transition is a single conditional UPDATE ... RETURNING, so two
+        concurrent callers cannot both move the gift out of the same source status. When nothing
+        matched, the transaction is rolled back and ValueError (no such gift) or StateMachineError
+        is raised.
+        """
+        result = await db.execute(
+            GiftService._build_transition_statement([gift_id], next_status)
+        )
+        row = result.mappings().one_or_none()
+
+        if row is None:
+            # Nothing matched: look up why, only on the failure path
+            current = (
+                await db.execute(select(Gift.status).where(Gift.id == gift_id))
+            ).scalar_one_or_none()
+            await db.rollback()
+            if current is None:
+                raise ValueError("Gift not found")
+            GiftStateMachine.validate_transition(GiftStatus(current), next_status)
+            raise StateMachineError(
+                f"Gift status changed concurrently; it is now {current}"
+            )
+        return dict(row)
+
+    @staticmethod
+    async def update_status(
+        db: AsyncSession, gift_id: str, next_status: GiftStatus
+    ) -> GiftRecordSchema:
+        """
+        Updates the status of a gift using the State Machine (see transition) and commits.
+        """
+        row = await GiftService.transition(db, uuid.UUID(gift_id), next_status)
+        await db.commit()
+        outbox_dispatcher.wake()
+        await recent_writes.mark(row["grandparent_id"], row["grandchild_id"])
+        await response_cache.invalidate(
+            gift_tag(row["id"]),
+            user_tag(row["grandparent_id"]),
+            user_tag(row["grandchild_id"]),
+        )
+        return GiftRecordSchema.model_validate(row)
+
+    @staticmethod
+    async def update_status_bulk(
+        db: AsyncSession, gift_ids: List[uuid.UUID], next_status: GiftStatus
+    ) -> BulkStatusResult:
+        """
+        Moves many gifts to next_status with one conditional UPDATE and reports the gifts that
+        were missing or not in an allowed source status.
+        """
+        result = await db.execute(
+            GiftService._build_transition_statement(gift_ids, next_status)
+        )
+        rows = result.mappings().all()
+        updated = {row["id"] for row in rows}
         await db.commit()
-        await db.refresh(gift)
-        
-        return gift
-
-    @staticmethod
-    async def get_gifts_by_user(db: AsyncSession, user_id: str, is_grandparent: bool = True) -> List[Gift]:
-        from sqlalchemy.orm import selectinload
-        if is_grandparent:
-            query = select(Gift).where(Gift.grandparent_id == uuid.UUID(user_id)).options(selectinload(Gift.milestones), selectinload(Gift.media_messages))
-        else:
-            query = select(Gift).where(Gift.grandchild_id == uuid.UUID(user_id)).options(selectinload(Gift.milestones), selectinload(Gift.media_messages))
-        
+        outbox_dispatcher.wake()
+        await recent_writes.mark(
+            *(
+                uid
+                for row in rows
+                for uid in (row["grandparent_id"], row["grandchild_id"])
+            )
+        )
+        await response_cache.invalidate(
+            *{
+                tag
+                for row in rows
+                for tag in (
+                    gift_tag(row["id"]),
+                    user_tag(row["grandparent_id"]),
+                    user_tag(row["grandchild_id"]),
+                )
+            }
+        )
+
+        failed = []
+        missed = [gid for gid in dict.fromkeys(gift_ids) if gid not in updated]
+        if missed:
+            current = {
+                gid: GiftStatus(status)
+                for gid, status in (
+                    await db.execute(
+                        select(Gift.id, Gift.status).where(Gift.id.in_(missed))
+                    )
+                ).all()
+            }
+            for gid in missed:
+                if gid not in current:
+                    failed.append(
+                        StatusUpdateFailure(gift_id=gid, reason="Gift not found")
+                    )
+                    continue
+                try:
+                    GiftStateMachine.validate_transition(current[gid], next_status)
+                    reason = f"Gift status changed concurrently; it is now {current[gid].value}"
+                except StateMachineError as e:
+                    reason = str(e)
+                failed.append(
+                    StatusUpdateFailure(
+                        gift_id=gid, current_status=current[gid], reason=reason
+                    )
+                )
+
+        return BulkStatusResult(
+            next_status=next_status,
+            updated=[gid for gid in dict.fromkeys(gift_ids) if gid in updated],
+            failed=failed,
+        )
+
+    @staticmethod
+    def _status_notifications(moved, next_status: GiftStatus, now: datetime.datetime):
+        """
+        SELECT of outbox rows for the gifts in the `moved` CTE, per STATUS_NOTIFICATIONS; None when
+        next_status notifies nobody.
+        """
+        recipients = {
+            UserRole.grandparent: moved.c.grandparent_id,
+            UserRole.grandchild: moved.c.grandchild_id,
+            UserRole.trustee: literal(TRUSTEE_ID),
+        }
+        name = func.coalesce(moved.c.grandchild_name, "your grandchild")
+        selects = [
+            select(
+                func.gen_random_uuid(),
+                literal(None, String),
+                recipients[role],
+                OutboxService.role_literal(role),
+                literal(event_type),
+                func.replace(message, "{name}", name),
+                literal(None, String),
+                literal(now),
+                literal(now),
+            )
+            for role, event_type, message in STATUS_NOTIFICATIONS.get(next_status, [])
+        ]
+        if not selects:
+            return None
+        return selects[0] if len(selects) == 1 else union_all(*selects)
+
+    @staticmethod
+    def _build_transition_statement(gift_ids: List[uuid.UUID], next_status: GiftStatus):
+        """
+        UPDATE gifts SET status = :next WHERE id IN (:ids) AND status IN (:allowed_sources) RETURNING *,
+        with the allowed sources taken from the State Machine. The owners of the moved gifts get
+        their dashboard versions bumped, the status notifications queued and override windows opened
+        or closed by CTEs of the same statement.
+        """
+        allowed_sources = [
+            source.value for source in GiftStateMachine.get_allowed_sources(next_status)
+        ]
+        moved = (
+            update(Gift)
+            .where(Gift.id.in_(gift_ids), Gift.status.in_(allowed_sources))
+            .values(status=next_status.value)
+            .returning(*Gift.__table__.columns)
+            .cte("moved")
+        )
+        owners = union(
+            select(moved.c.grandparent_id, literal(1)),
+            select(moved.c.grandchild_id, literal(1)),
+        )
+        now = utcnow()
+        ctes = [build_version_bump_from(owners).cte("bump_versions")]
+        notifications = GiftService._status_notifications(moved, next_status, now)
+        if notifications is not None:
+            ctes.append(
+                OutboxService.build_insert_from(notifications).cte(
+                    "queue_notifications"
+                )
+            )
+        override_windows = GiftService._override_window_change(moved, next_status, now)
+        if override_windows is not None:
+            ctes.append(override_windows.cte("change_override_windows"))
+        return select(moved).add_cte(*ctes)
+
+    @staticmethod
+    def _override_window_change(moved, next_status: GiftStatus, now: datetime.datetime):
+        """
+        INSERT of an open override window for every gift in the `moved` CTE when it was rejected, or
+        UPDATE closing the open windows of gifts leaving Rejected; None for other statuses.
+        """
+        if next_status == GiftStatus.Rejected:
+            return insert(OverrideWindow).from_select(
+                ["id", "gift_id", "created_at", "expires_at", "status"],
+                select(
+                    func.gen_random_uuid(),
+                    moved.c.id,
+                    literal(now),
+                    literal(now + datetime.timedelta(days=OVERRIDE_WINDOW_DAYS)),
+                    cast(literal("Open"), OverrideWindow.status.type),
+                ),
+            )
+        closure = OVERRIDE_WINDOW_CLOSURES.get(next_status)
+        if closure is None:
+            return None
+        return (
+            update(OverrideWindow)
+            .where(
+                OverrideWindow.gift_id.in_(select(moved.c.id)),
+                OverrideWindow.status == "Open",
+            )
+            .values(status=closure)
+        )
+
+    @staticmethod
+    async def get_gifts_by_user(
+        db: AsyncSession,
+        user_id: str,
+        is_grandparent: bool = True,
+        limit: Optional[int] = None,
+        after: Optional[GiftKey] = None,
+    ) -> List[dict]:
+        """
+        Returns full gifts (milestones and media rows included) oldest first, as GiftSchema-shaped
+        dicts built straight from Core rows. With `limit`/`after` the listing is keyset-paginated on
+        (created_at, id), so new gifts land on the last page instead of shifting earlier ones.
+        """
+        owner = Gift.grandparent_id if is_grandparent else Gift.grandchild_id
+        query = GiftService._keyset(
+            select(*Gift.__table__.columns).where(owner == uuid.UUID(user_id)),
+            limit,
+            after,
+        )
+        return await GiftService._load_gift_dicts(db, query)
+
+    @staticmethod
+    async def get_gift_summaries_by_user(
+        db: AsyncSession,
+        user_id: str,
+        is_grandparent: bool = True,
+        limit: Optional[int] = None,
+        after: Optional[GiftKey] = None,
+    ) -> List[dict]:
+        """
+        Compact dashboard projection in one query: gift columns plus milestone progress
+        and media counts computed by correlated subqueries instead of loading child rows.
+        """
+        owner = Gift.grandparent_id if is_grandparent else Gift.grandchild_id
+        milestones_total = (
+            select(func.count(Milestone.id))
+            .where(Milestone.gift_id == Gift.id)
+            .correlate(Gift)
+            .scalar_subquery()
+        )
+        milestones_approved = (
+            select(func.count(Milestone.id))
+            .where(
+                Milestone.gift_id == Gift.id,
+                Milestone.status == MilestoneStatus.Approved.value,
+            )
+            .correlate(Gift)
+            .scalar_subquery()
+        )
+        media_count = (
+            select(func.count(MediaMessage.id))
+            .where(MediaMessage.gift_id == Gift.id)
+            .correlate(Gift)
+            .scalar_subquery()
+        )
+        query = select(
+            Gift.id,
+            Gift.grandparent_id,
+            Gift.grandchild_id,
+            Gift.grandchild_name,
+            Gift.corpus,
+            Gift.currency,
+            Gift.status,
+            Gift.risk_profile,
+            Gift.rule_type,
+            Gift.created_at,
+            milestones_total.label("milestones_total"),
+            milestones_approved.label("milestones_approved"),
+            media_count.label("media_count"),
+        ).where(owner == uuid.UUID(user_id))
+        query = GiftService._keyset(query, limit, after)
+
+        result = await db.execute(query)
+        return [dict(row) for row in result.mappings()]
+
+    @staticmethod
+    def _keyset(query, limit: Optional[int], after: Optional[GiftKey]):
+        query = query.order_by(Gift.created_at, Gift.id)
+        if after is not None:
+            query = query.where(tuple_(Gift.created_at, Gift.id) > tuple_(*after))
+        if limit is not None:
+            query = query.limit(limit)
+        return query
+
+    @staticmethod
+    def encode_cursor(row: dict) -> str:
+        return f"{row['created_at'].isoformat()}_{row['id']}"
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> GiftKey:
+        """
+        Inverse of encode_cursor; raises ValueError for anything else.
+        """
+        created_at, _, gift_id = cursor.partition("_")
+        return datetime.datetime.fromisoformat(created_at), uuid.UUID(gift_id)
+
+    @staticmethod
+    async def get_portfolio(
+        db: AsyncSession, user_id: str, currency: Currency = Currency.USD
+    ) -> PortfolioSchema:
+        """
+        Grandparent portfolio overview (spec 4.1.1). Sums are computed in one grouped query by
+        (grandchild, risk profile, currency); only those group rows are normalised to `currency`
+        here, so the work and payload grow with grandchildren, not with gifts.
+        """
+        gp_id = uuid.UUID(user_id)
+        query = (
+            select(
+                Gift.grandchild_id,
+                func.max(Gift.grandchild_name).label("grandchild_name"),
+                Gift.risk_profile,
+                Gift.currency,
+                func.count(Gift.id).label("gift_count"),
+                func.sum(Gift.corpus).label("corpus"),
+                func.coalesce(
+                    func.sum(Gift.corpus).filter(
+                        Gift.status.in_([s.value for s in ALLOCATED_STATUSES])
+                    ),
+                    0,
+                ).label("allocated"),
+            )
+            .where(Gift.grandparent_id == gp_id)
+            .group_by(Gift.grandchild_id, Gift.risk_profile, Gift.currency)
+        )
         result = await db.execute(query)
-        return result.scalars().all()
+
+        zero = Decimal(0)
+        grandchildren = {}
+        risk = {profile: {"gift_count": 0, "corpus": zero} for profile in RiskProfile}
+        for row in result.mappings():
+            corpus = convert_amount(row["corpus"], row["currency"], currency.value)
+            allocated = convert_amount(
+                row["allocated"], row["currency"], currency.value
+            )
+
+            child = grandchildren.setdefault(
+                row["grandchild_id"],
+                {
+                    "grandchild_id": row["grandchild_id"],
+                    "grandchild_name": row["grandchild_name"],
+                    "gift_count": 0,
+                    "corpus": zero,
+                    "allocated": zero,
+                },
+            )
+            child["gift_count"] += row["gift_count"]
+            child["corpus"] += corpus
+            child["allocated"] += allocated
+
+            bucket = risk[RiskProfile(row["risk_profile"])]
+            bucket["gift_count"] += row["gift_count"]
+            bucket["corpus"] += corpus
+
+        total = sum((c["corpus"] for c in grandchildren.values()), zero)
+        allocated = sum((c["allocated"] for c in grandchildren.values()), zero)
+        cents = Decimal("0.01")
+
+        return PortfolioSchema(
+            grandparent_id=gp_id,
+            currency=currency,
+            gift_count=sum(c["gift_count"] for c in grandchildren.values()),
+            total_corpus=total.quantize(cents),
+            allocated=allocated.quantize(cents),
+            released=(total - allocated).quantize(cents),
+            grandchildren=[
+                GrandchildAllocationSchema(
+                    **{
+                        **c,
+                        "corpus": c["corpus"].quantize(cents),
+                        "allocated": c["allocated"].quantize(cents),
+                    }
+                )
+                for c in grandchildren.values()
+            ],
+            risk_allocation=[
+                RiskAllocationSchema(
+                    risk_profile=profile,
+                    gift_count=bucket["gift_count"],
+                    corpus=bucket["corpus"].quantize(cents),
+                    percentage=(
+                        bucket["corpus"] * 100 / total if total else zero
+                    ).quantize(cents),
+                )
+                for profile, bucket in risk.items()
+            ],
+        )
+
+    @staticmethod
+    async def get_gift(db: AsyncSession, gift_id: str) -> dict:
+        gifts = await GiftService._load_gift_dicts(
+            db, select(*Gift.__table__.columns).where(Gift.id == uuid.UUID(gift_id))
+        )
+
+        if not gifts:
+            raise ValueError("Gift not found")
+
+        return gifts[0]
+
+    @staticmethod
+    async def _load_gift_dicts(db: AsyncSession, gift_query) -> List[dict]:
+        """
+        Runs the gift query, then loads milestones and media for those gifts with one IN query each
+        (the same round trips as selectinload, without ORM objects or Pydantic validation).
+        """
+        gift_rows = (await db.execute(gift_query)).mappings().all()
+        if not gift_rows:
+            return []
+
+        gift_ids = [row["id"] for row in gift_rows]
+        milestone_rows = (
+            (
+                await db.execute(
+                    select(*Milestone.__table__.columns).where(
+                        Milestone.gift_id.in_(gift_ids)
+                    )
+                )
+            )
+            .mappings()
+            .all()
+        )
+        media_rows = (
+            (
+                await db.execute(
+                    select(*MediaMessage.__table__.columns).where(
+                        MediaMessage.gift_id.in_(gift_ids)
+                    )
+                )
+            )
+            .mappings()
+            .all()
+        )
+        return GiftService._assemble_gifts(gift_rows, milestone_rows, media_rows)
+
+    @staticmethod
+    def _assemble_gifts(gift_rows, milestone_rows, media_rows) -> List[dict]:
+        """
+        Nests milestone and media rows under their gifts, keeping the GiftSchema field names.
+        """
+        gifts = [{**row, "milestones": [], "media_messages": []} for row in gift_rows]
+        by_id = {gift["id"]: gift for gift in gifts}
+        for row in milestone_rows:
+            by_id[row["gift_id"]]["milestones"].append(dict(row))
+        for row in media_rows:
+            by_id[row["gift_id"]]["media_messages"].append(dict(row))
+        return gifts
 
     @staticmethod
     async def delete_gift(db: AsyncSession, gift_id: str):
-        from sqlalchemy.orm import selectinload
         result = await db.execute(select(Gift).where(Gift.id == uuid.UUID(gift_id)))
         gift = result.scalar_one_or_none()
-        
+
         if not gift:
             raise ValueError("Gift not found")
-        
+
         await db.delete(gift)
+        await bump_user_versions(db, gift.grandparent_id, gift.grandchild_id)
         await db.commit()
-
+        await recent_writes.mark(gift.grandparent_id, gift.grandchild_id)
+        await response_cache.invalidate(
+            gift_tag(gift.id),
+            user_tag(gift.grandparent_id),
+            user_tag(gift.grandchild_id),
+        )
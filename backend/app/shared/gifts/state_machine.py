@@ -1,19 +1,22 @@
-from typing import Dict, List, Set, Tuple
+from typing import ClassVar, Dict, List, Set
+
 from app.shared.gifts.schemas import GiftStatus
 
+
 class StateMachineError(Exception):
     pass
 
+
 class GiftStateMachine:
     # Define valid transitions: source -> {targets}
-    _VALID_TRANSITIONS: Dict[GiftStatus, Set[GiftStatus]] = {
+    _VALID_TRANSITIONS: ClassVar[Dict[GiftStatus, Set[GiftStatus]]] = {
         GiftStatus.Draft: {GiftStatus.Active},
         GiftStatus.Active: {GiftStatus.Under_Review, GiftStatus.Completed},
         GiftStatus.Under_Review: {GiftStatus.Approved, GiftStatus.Rejected},
         GiftStatus.Approved: {GiftStatus.Active, GiftStatus.Completed},
         GiftStatus.Rejected: {GiftStatus.Active, GiftStatus.Redirected},
-        GiftStatus.Redirected: set(), # Terminal state for redirected funds
-        GiftStatus.Completed: set()    # Terminal state
+        GiftStatus.Redirected: set(),  # Terminal state for redirected funds
+        GiftStatus.Completed: set(),  # Terminal state
     }
 
     @classmethod
@@ -33,3 +36,14 @@ class GiftStateMachine:
     @classmethod
     def get_allowed_transitions(cls, current_status: GiftStatus) -> List[GiftStatus]:
         return list(cls._VALID_TRANSITIONS.get(current_status, set()))
+
+    @classmethod
+    def get_allowed_sources(cls, next_status: GiftStatus) -> List[GiftStatus]:
+        """
+        Inverse lookup: the statuses a gift may be in to move to next_status.
+        """
+        return [
+            source
+            for source, targets in cls._VALID_TRANSITIONS.items()
+            if next_status in targets
+        ]
@@ -0,0 +1,115 @@
+import hashlib
+import uuid
+from typing import Awaitable, Callable, Iterable, List
+
+from fastapi import Request, Response
+from sqlalchemy import literal, union
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.shared.gifts.models import Gift, UserVersion
+
+
+def build_version_bump(user_ids: Iterable[uuid.UUID]):
+    """
+    INSERT ... ON CONFLICT DO UPDATE that increments each user's version. Executed by
+    itself or attached as a CTE to the write it belongs to, so the bump shares the
+    write's transaction.
+    """
+    rows = [{"user_id": uid, "version": 1} for uid in dict.fromkeys(user_ids)]
+    return _on_conflict_increment(pg_insert(UserVersion).values(rows))
+
+
+def build_version_bump_from(user_ids_select):
+    """
+    Same as build_version_bump for user ids produced by a SELECT (e.g. the owners of a
+    gift).
+    """
+    return _on_conflict_increment(
+        pg_insert(UserVersion).from_select(["user_id", "version"], user_ids_select)
+    )
+
+
+def _on_conflict_increment(stmt):
+    return stmt.on_conflict_do_update(
+        index_elements=[UserVersion.user_id],
+        set_={"version": UserVersion.version + 1},
+    )
+
+
+def gift_owners(gift_ids_clause):
+    """
+    SELECT of (user_id, 1) for the grandparent and grandchild of the gifts matching the
+    clause.
+    """
+    return union(
+        select(Gift.grandparent_id, literal(1)).where(gift_ids_clause),
+        select(Gift.grandchild_id, literal(1)).where(gift_ids_clause),
+    )
+
+
+async def bump_user_versions(db: AsyncSession, *user_ids: uuid.UUID):
+    """
+    Bumps versions inside the caller's transaction; the caller commits.
+    """
+    if user_ids:
+        await db.execute(build_version_bump(user_ids))
+
+
+async def bump_gift_owner_versions(
+    db: AsyncSession, gift_id: uuid.UUID
+) -> List[uuid.UUID]:
+    """
+    Bumps the versions of the gift's grandparent and grandchild and returns their ids.
+    """
+    result = await db.execute(
+        build_version_bump_from(gift_owners(Gift.id == gift_id)).returning(
+            UserVersion.user_id
+        )
+    )
+    return result.scalars().all()
+
+
+async def get_user_version(db: AsyncSession, user_id: uuid.UUID) -> int:
+    result = await db.execute(
+        select(UserVersion.version).where(UserVersion.user_id == user_id)
+    )
+    return result.scalar_one_or_none() or 0
+
+
+def make_etag(key: str, version: int) -> str:
+    """
+    Strong ETag for one representation (`key` carries the route and query parameters) at
+    one version.
+    """
+    digest = hashlib.sha1(f"{key}:{version}".encode()).hexdigest()[:16]
+    return f'"{digest}-{version}"'
+
+
+async def etag_response(
+    request: Request,
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    key: str,
+    build: Callable[[str], Awaitable[Response]],
+) -> Response:
+    """
+    Answers 304 from the user's version alone when If-None-Match matches; otherwise
+    builds the response and stamps it with the ETag for the version read before the
+    data. `build` receives `key` suffixed with that version and must cache under it, so
+    a body cached at an older version (another worker's memory, a lagging replica
+    refill) is never served under a newer ETag.
+    """
+    version = await get_user_version(db, user_id)
+    etag = make_etag(key, version)
+    if_none_match = request.headers.get("if-none-match", "")
+    if (
+        etag in [tag.strip() for tag in if_none_match.split(",")]
+        or if_none_match.strip() == "*"
+    ):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    response = await build(f"{key}:v{version}")
+    response.headers["ETag"] = etag
+    return response
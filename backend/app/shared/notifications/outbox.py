@@ -0,0 +1,409 @@
+import asyncio
+import contextlib
+import datetime
+import logging
+import time
+import uuid
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import String, and_, cast, delete, func, literal, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.config import Settings
+from app.database import AsyncSessionLocal, recent_writes
+from app.shared.cache.service import notifications_tag, response_cache
+from app.shared.gifts.models import Gift, NotificationOutbox, OverrideWindow, utcnow
+from app.shared.gifts.schemas import NotificationCreate, UserRole
+from app.shared.notifications.service import NotificationService
+from app.shared.notifications.stream import lock_stream_order, notification_hub
+
+logger = logging.getLogger(__name__)
+
+# Failed rows are retried after 2, 4, 8 ... seconds, at most five minutes apart
+RETRY_BASE_SECONDS = 2.0
+RETRY_MAX_SECONDS = 300.0
+# Housekeeping cadence: override-expiry warnings and pruning of delivered rows
+HOUSEKEEPING_INTERVAL_SECONDS = 60.0
+OVERRIDE_WARNING_HOURS = 24
+# Delivered rows are kept this long so their dedup keys keep suppressing repeats
+OUTBOX_RETENTION_DAYS = 7
+
+OUTBOX_COLUMNS = [
+    "id",
+    "dedup_key",
+    "recipient_id",
+    "role",
+    "event_type",
+    "message",
+    "action_url",
+    "created_at",
+    "available_at",
+]
+
+
+def notification_row(row: dict) -> dict:
+    """
+    The notifications row an outbox row is delivered as; the outbox id and created_at
+    are reused.
+    """
+    return {
+        "id": row["id"],
+        "recipient_id": row["recipient_id"],
+        "role": row["role"],
+        "event_type": row["event_type"],
+        "message": row["message"],
+        "action_url": row["action_url"],
+        "is_read": False,
+        "created_at": row["created_at"],
+    }
+
+
+class OutboxService:
+    @staticmethod
+    def build_rows(
+        notifications: Iterable[NotificationCreate],
+        now: Optional[datetime.datetime] = None,
+    ) -> List[dict]:
+        now = now or utcnow()
+        return [
+            {
+                "id": uuid.uuid4(),
+                "dedup_key": n.dedup_key,
+                "recipient_id": n.recipient_id,
+                "role": n.role.value,
+                "event_type": n.event_type,
+                "message": n.message,
+                "action_url": n.action_url,
+                "created_at": now,
+                "available_at": now,
+            }
+            for n in notifications
+        ]
+
+    @staticmethod
+    def build_insert(rows: List[dict]):
+        """
+        Multi-row INSERT into the outbox; rows whose dedup_key is already present are
+        dropped. Executed on its own or as the tail of a larger statement (see
+        GiftService._build_creation_statement).
+        """
+        return (
+            pg_insert(NotificationOutbox)
+            .values(rows)
+            .on_conflict_do_nothing(index_elements=[NotificationOutbox.dedup_key])
+        )
+
+    @staticmethod
+    async def enqueue(
+        db: AsyncSession, notifications: Iterable[NotificationCreate]
+    ) -> int:
+        """
+        Queues notifications inside the caller's transaction, so they are delivered if
+        and only if the business change commits. Call outbox_dispatcher.wake() after the
+        commit for prompt delivery.
+        """
+        rows = OutboxService.build_rows(notifications)
+        if rows:
+            await db.execute(OutboxService.build_insert(rows))
+        return len(rows)
+
+    @staticmethod
+    def build_insert_from(rows_select):
+        """
+        INSERT ... SELECT into the outbox; the SELECT yields OUTBOX_COLUMNS in order.
+        Used to queue notifications for rows produced by the same statement (e.g. gifts
+        moved by a status update).
+        """
+        return (
+            pg_insert(NotificationOutbox)
+            .from_select(OUTBOX_COLUMNS, rows_select, include_defaults=False)
+            .on_conflict_do_nothing(index_elements=[NotificationOutbox.dedup_key])
+        )
+
+    @staticmethod
+    def role_literal(role: UserRole):
+        # Typed as the enum so the value survives UNION ALL type resolution
+        return cast(literal(role.value), NotificationOutbox.role.type)
+
+    @staticmethod
+    def build_override_warnings(now: datetime.datetime):
+        """
+        INSERT ... SELECT of one warning per open override window expiring within
+        OVERRIDE_WARNING_HOURS. Keyed on the window id, so repeated scans enqueue each
+        warning once.
+        """
+        warnings = (
+            select(
+                func.gen_random_uuid(),
+                literal("override_expiring:") + cast(OverrideWindow.id, String),
+                Gift.grandparent_id,
+                OutboxService.role_literal(UserRole.grandparent),
+                literal("override_window_expiring"),
+                func.concat(
+                    "The override window for ",
+                    func.coalesce(Gift.grandchild_name, "your grandchild"),
+                    "'s gift closes within 24 hours. "
+                    "After that the amount is redirected to your chosen NGO.",
+                ),
+                literal(None, String),
+                literal(now),
+                literal(now),
+            )
+            .join(Gift, Gift.id == OverrideWindow.gift_id)
+            .where(
+                OverrideWindow.status == "Open",
+                OverrideWindow.expires_at > now,
+                OverrideWindow.expires_at
+                <= now + datetime.timedelta(hours=OVERRIDE_WARNING_HOURS),
+            )
+        )
+        return OutboxService.build_insert_from(warnings)
+
+    @staticmethod
+    async def get_stats(db: AsyncSession, max_attempts: int) -> Dict[str, Any]:
+        pending = NotificationOutbox.dispatched_at.is_(None)
+        row = (
+            (
+                await db.execute(
+                    select(
+                        func.count()
+                        .filter(
+                            and_(pending, NotificationOutbox.attempts < max_attempts)
+                        )
+                        .label("pending"),
+                        func.count()
+                        .filter(
+                            and_(pending, NotificationOutbox.attempts >= max_attempts)
+                        )
+                        .label("parked"),
+                        func.min(NotificationOutbox.created_at)
+                        .filter(pending)
+                        .label("oldest_pending_at"),
+                    )
+                )
+            )
+            .mappings()
+            .one()
+        )
+        return dict(row)
+
+
+class OutboxDispatcher:
+    """
+    Background task draining notification_outbox into notifications in batches.
+
+    Rows are claimed with FOR UPDATE SKIP LOCKED, so every worker can run a dispatcher.
+    The outbox id and created_at are reused as the notification key and inserted with ON
+    CONFLICT DO NOTHING, so a batch that is redelivered after a crash is not duplicated.
+    When a batch fails it is retried row by row inside savepoints; rows that still fail
+    are rescheduled with exponential backoff and parked after max_attempts.
+    """
+
+    def __init__(
+        self,
+        session_factory=AsyncSessionLocal,
+        batch_size: int = 100,
+        poll_interval: float = 1.0,
+        max_attempts: int = 5,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.dispatched = 0
+        self.batches = 0
+        self.failures = 0
+        self.last_error = None
+        self._wake = asyncio.Event()
+        self._task = None
+        self._next_housekeeping = 0.0
+
+    def wake(self):
+        """
+        Starts the next batch now instead of at the next poll. Called after committing
+        outbox rows.
+        """
+        self._wake.set()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if not self.running:
+            # Created here so it belongs to the serving event loop
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def run(self):
+        while True:
+            try:
+                await self.housekeeping()
+                claimed = await self.dispatch_batch()
+            except Exception as e:  # noqa: BLE001
+                self.last_error = str(e)
+                logger.warning("Notification outbox dispatch failed: %s", e)
+                claimed = 0
+            # A full batch means more rows are probably waiting
+            if claimed < self.batch_size:
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+                self._wake.clear()
+
+    async def dispatch_batch(self) -> int:
+        """
+        Delivers one batch and returns the number of rows claimed.
+        """
+        now = utcnow()
+        async with self.session_factory() as db:
+            rows = (
+                (
+                    await db.execute(
+                        select(*NotificationOutbox.__table__.columns)
+                        .where(
+                            NotificationOutbox.dispatched_at.is_(None),
+                            NotificationOutbox.available_at <= now,
+                            NotificationOutbox.attempts < self.max_attempts,
+                        )
+                        .order_by(NotificationOutbox.available_at)
+                        .limit(self.batch_size)
+                        .with_for_update(skip_locked=True)
+                    )
+                )
+                .mappings()
+                .all()
+            )
+            if not rows:
+                return 0
+            # Held until the commit below, so this batch is numbered after every batch
+            # committed before it to the same recipients
+            await lock_stream_order(db, (row["recipient_id"] for row in rows))
+            delivered = await self._deliver(db, rows, now)
+            await db.commit()
+
+        self.batches += 1
+        self.dispatched += len(delivered)
+        recipients = {row["recipient_id"] for row in delivered}
+        if recipients:
+            await recent_writes.mark(*recipients)
+            await response_cache.invalidate(
+                *(notifications_tag(uid) for uid in recipients)
+            )
+        notification_hub.publish_local(notification_row(row) for row in delivered)
+        return len(rows)
+
+    async def _deliver(
+        self, db: AsyncSession, rows: List[dict], now: datetime.datetime
+    ) -> List[dict]:
+        try:
+            async with db.begin_nested():
+                await self._insert(db, rows, now)
+            return rows
+        except Exception as e:  # noqa: BLE001
+            if len(rows) == 1:
+                await self._reschedule(db, rows[0], e, now)
+                return []
+
+        # Isolate the rows that fail so they do not hold back the rest of the batch
+        delivered = []
+        for row in rows:
+            try:
+                async with db.begin_nested():
+                    await self._insert(db, [row], now)
+                delivered.append(row)
+            except Exception as e:  # noqa: BLE001
+                await self._reschedule(db, row, e, now)
+        return delivered
+
+    @staticmethod
+    async def _insert(db: AsyncSession, rows: List[dict], now: datetime.datetime):
+        await db.execute(
+            NotificationService.build_insert([notification_row(row) for row in rows])
+        )
+        await db.execute(
+            update(NotificationOutbox)
+            .where(NotificationOutbox.id.in_([row["id"] for row in rows]))
+            .values(dispatched_at=now)
+        )
+
+    async def _reschedule(
+        self, db: AsyncSession, row: dict, error: Exception, now: datetime.datetime
+    ):
+        attempts = row["attempts"] + 1
+        delay = min(RETRY_BASE_SECONDS * 2 ** row["attempts"], RETRY_MAX_SECONDS)
+        # The driver's message, without the statement SQLAlchemy wraps around it
+        message = str(getattr(error, "orig", None) or error)
+        self.failures += 1
+        self.last_error = message
+        if attempts >= self.max_attempts:
+            logger.error(
+                "Parking outbox row %s after %d attempts: %s",
+                row["id"],
+                attempts,
+                message,
+            )
+        else:
+            logger.warning(
+                "Outbox row %s failed (attempt %d), retrying in %.0fs: %s",
+                row["id"],
+                attempts,
+                delay,
+                message,
+            )
+        await db.execute(
+            update(NotificationOutbox)
+            .where(NotificationOutbox.id == row["id"])
+            .values(
+                attempts=attempts,
+                available_at=now + datetime.timedelta(seconds=delay),
+                last_error=message[:1000],
+            )
+        )
+
+    async def housekeeping(self):
+        """
+        Enqueues override-expiry warnings and prunes old delivered rows, at most once
+        per interval.
+        """
+        if time.monotonic() < self._next_housekeeping:
+            return
+        self._next_housekeeping = time.monotonic() + HOUSEKEEPING_INTERVAL_SECONDS
+        now = utcnow()
+        async with self.session_factory() as db:
+            await db.execute(OutboxService.build_override_warnings(now))
+            await db.execute(
+                delete(NotificationOutbox).where(
+                    NotificationOutbox.dispatched_at
+                    < now - datetime.timedelta(days=OUTBOX_RETENTION_DAYS)
+                )
+            )
+            await db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "batch_size": self.batch_size,
+            "max_attempts": self.max_attempts,
+            "dispatched": self.dispatched,
+            "batches": self.batches,
+            "failures": self.failures,
+            "last_error": self.last_error,
+        }
+
+
+outbox_dispatcher = OutboxDispatcher()
+
+
+def configure_outbox(settings: Settings):
+    outbox_dispatcher.batch_size = settings.outbox_batch_size
+    outbox_dispatcher.poll_interval = settings.outbox_poll_interval
+    outbox_dispatcher.max_attempts = settings.outbox_max_attempts
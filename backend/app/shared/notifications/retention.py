@@ -0,0 +1,247 @@
+import asyncio
+import contextlib
+import datetime
+import logging
+import re
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import column, exists, func, literal, select, table, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import Settings
+from app.database import AsyncSessionLocal, recent_writes
+from app.shared.cache.service import notifications_tag, response_cache
+from app.shared.gifts.models import UserVersion, utcnow
+from app.shared.gifts.versions import build_version_bump_from
+
+logger = logging.getLogger(__name__)
+
+PARTITION_NAME = re.compile(r"^notifications_(\d{4})_(\d{2})$")
+# Partitions past retention are renamed to this prefix when archived instead of dropped
+ARCHIVE_PREFIX = "archived_"
+RETENTION_INTERVAL_SECONDS = 3600.0
+# pg_try_advisory_xact_lock key, so one worker at a time maintains the partitions
+MAINTENANCE_LOCK_ID = 7_240_020
+# DDL waits at most this long for locks held by feed queries, then retries next interval
+LOCK_TIMEOUT = "5s"
+
+
+def month_start(moment: datetime.datetime) -> datetime.date:
+    return datetime.date(moment.year, moment.month, 1)
+
+
+def add_months(month: datetime.date, months: int) -> datetime.date:
+    index = month.year * 12 + month.month - 1 + months
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: datetime.date) -> str:
+    return f"notifications_{month:%Y_%m}"
+
+
+class NotificationRetention:
+    """
+    Maintains the monthly partitions of notifications: creates them `months_ahead` in
+    advance and drops (or, with `archive`, detaches and renames) those wholly older than
+    `retention_months`, so feed queries and vacuum only ever touch recent months. A
+    partition that still holds unread rows is kept until they are read, so nobody loses
+    notifications they have not seen.
+    """
+
+    def __init__(
+        self,
+        session_factory=AsyncSessionLocal,
+        retention_months: int = 12,
+        months_ahead: int = 3,
+        archive: bool = False,
+        interval: float = RETENTION_INTERVAL_SECONDS,
+    ):
+        self.session_factory = session_factory
+        self.retention_months = retention_months
+        self.months_ahead = months_ahead
+        self.archive = archive
+        self.interval = interval
+        self.last_run = None
+        self.last_error = None
+        self._task = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if not self.running:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def run(self):
+        while True:
+            try:
+                await self.maintain()
+            except Exception as e:  # noqa: BLE001
+                self.last_error = str(e)
+                logger.warning("Notification partition maintenance failed: %s", e)
+            await asyncio.sleep(self.interval)
+
+    async def maintain(
+        self, now: Optional[datetime.datetime] = None
+    ) -> Dict[str, List[str]]:
+        """
+        One maintenance pass; returns the partitions created, expired and kept past
+        retention for their unread rows (all empty when another worker holds the
+        maintenance lock).
+        """
+        now = now or utcnow()
+        current = month_start(now)
+        changes = {"created": [], "expired": [], "kept": []}
+        affected = set()
+        async with self.session_factory() as db:
+            if not (
+                await db.execute(
+                    select(func.pg_try_advisory_xact_lock(MAINTENANCE_LOCK_ID))
+                )
+            ).scalar():
+                return changes
+            await db.execute(text(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'"))
+            existing = await self.list_partitions(db)
+
+            for offset in range(self.months_ahead + 1):
+                month = add_months(current, offset)
+                if month not in existing:
+                    await self._create(db, month)
+                    changes["created"].append(partition_name(month))
+
+            cutoff = add_months(current, -self.retention_months)
+            for month in sorted(existing):
+                if add_months(month, 1) <= cutoff:
+                    recipients = await self._expire(db, month)
+                    if recipients is None:
+                        changes["kept"].append(partition_name(month))
+                    else:
+                        affected.update(recipients)
+                        changes["expired"].append(partition_name(month))
+            await db.commit()
+
+        self.last_run = now
+        if affected:
+            await recent_writes.mark(*affected)
+            await response_cache.invalidate(
+                *(notifications_tag(uid) for uid in affected)
+            )
+        if changes["created"] or changes["expired"]:
+            logger.info(
+                "Notification partitions created %s, expired %s",
+                changes["created"],
+                changes["expired"],
+            )
+        if changes["kept"]:
+            logger.info(
+                "Notification partitions %s are past retention "
+                "but still hold unread rows",
+                changes["kept"],
+            )
+        return changes
+
+    @staticmethod
+    async def list_partitions(db: AsyncSession) -> List[datetime.date]:
+        result = await db.execute(
+            text(
+                "SELECT c.relname FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = 'notifications'::regclass"
+            )
+        )
+        months = []
+        for name in result.scalars():
+            match = PARTITION_NAME.match(name)
+            if match:
+                months.append(datetime.date(int(match[1]), int(match[2]), 1))
+        return months
+
+    @staticmethod
+    async def _create(db: AsyncSession, month: datetime.date):
+        # Built standalone and attached, which locks the parent less than CREATE ...
+        # PARTITION OF. Rows that already landed in the default partition move across
+        # first.
+        name = partition_name(month)
+        bounds = {"start": month, "end": add_months(month, 1)}
+        await db.execute(
+            text(
+                f"CREATE TABLE {name} "
+                "(LIKE notifications INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+            )
+        )
+        await db.execute(
+            text(
+                "WITH moved AS (DELETE FROM notifications_default "
+                "WHERE created_at >= :start AND created_at < :end RETURNING *) "
+                f"INSERT INTO {name} SELECT * FROM moved"
+            ),
+            bounds,
+        )
+        await db.execute(
+            text(
+                f"ALTER TABLE notifications ATTACH PARTITION {name} "
+                f"FOR VALUES FROM ('{bounds['start']}') TO ('{bounds['end']}')"
+            )
+        )
+
+    async def _expire(self, db: AsyncSession, month: datetime.date) -> Optional[List]:
+        """
+        Drops or archives one partition and returns the recipients whose feeds lost rows
+        with it; None, leaving it in place, while any of its rows are unread.
+        """
+        name = partition_name(month)
+        partition = table(name, column("recipient_id"), column("is_read"))
+        # Taken before the check so it still holds when the partition goes
+        await db.execute(text(f"LOCK TABLE {name} IN ACCESS EXCLUSIVE MODE"))
+        if (
+            await db.execute(select(exists().where(partition.c.is_read == False)))
+        ).scalar():
+            return None
+        recipients = select(partition.c.recipient_id, literal(1)).distinct()
+        result = await db.execute(
+            build_version_bump_from(recipients).returning(UserVersion.user_id)
+        )
+        affected = result.scalars().all()
+        if self.archive:
+            await db.execute(text(f"ALTER TABLE notifications DETACH PARTITION {name}"))
+            await db.execute(
+                text(f"ALTER TABLE {name} RENAME TO {ARCHIVE_PREFIX}{name}")
+            )
+        else:
+            await db.execute(text(f"DROP TABLE {name}"))
+        return affected
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "retention_months": self.retention_months,
+            "months_ahead": self.months_ahead,
+            "archive": self.archive,
+            "last_run": self.last_run,
+            "last_error": self.last_error,
+        }
+
+
+notification_retention = NotificationRetention()
+
+
+def configure_retention(settings: Settings):
+    notification_retention.retention_months = settings.notifications_retention_months
+    notification_retention.months_ahead = settings.notifications_partitions_ahead
+    notification_retention.archive = settings.notifications_archive_expired
+
+
+if __name__ == "__main__":
+    # One pass from cron instead of (or as well as) the in-process task
+    from app.config import get_settings
+
+    configure_retention(get_settings())
+    print(asyncio.run(notification_retention.maintain()))
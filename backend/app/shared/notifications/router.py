@@ -1,15 +1,133 @@
-from fastapi import APIRouter, Depends, HTTPException
+import uuid
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.database import get_db
-from app.shared.notifications.service import NotificationService
-from app.shared.gifts.schemas import NotificationSchema
-from typing import List
+
+from app.database import get_db, get_user_read_db
+from app.shared.cache.service import cached_response, notifications_tag
+from app.shared.gifts.schemas import (
+    MarkReadResult,
+    NotificationIds,
+    NotificationSchema,
+    UnreadCountSchema,
+)
+from app.shared.gifts.versions import etag_response
+from app.shared.notifications.service import NotificationService, NotificationStatus
+from app.shared.notifications.stream import notification_events
+from app.shared.responses import FastJSONResponse, dumps
 
 router = APIRouter(prefix="/notifications", tags=["Notifications"])
 
-@router.get("/{user_id}", response_model=List[NotificationSchema])
-async def get_notifications(user_id: str, db: AsyncSession = Depends(get_db)):
-    return await NotificationService.get_unread_for_user(db, user_id)
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+@router.get(
+    "/{user_id}",
+    response_model=List[NotificationSchema],
+    response_class=FastJSONResponse,
+)
+async def get_notifications(
+    user_id: uuid.UUID,
+    request: Request,
+    status: NotificationStatus = "unread",
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_user_read_db),
+):
+    """
+    The user's notifications newest first, `limit` per page. When more remain, the X-Next-Cursor
+    header carries the `cursor` for the next page.
+    """
+    try:
+        before = NotificationService.decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    next_page = {}
+
+    async def load():
+        rows = await NotificationService.get_for_user(
+            db, user_id, status, limit=limit + 1, before=before
+        )
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_page["X-Next-Cursor"] = NotificationService.encode_cursor(rows[-1])
+        return rows
+
+    key = f"notifications:{user_id}:{status}:{limit}:{cursor}"
+    return await etag_response(
+        request,
+        db,
+        user_id,
+        key,
+        lambda versioned_key: cached_response(
+            versioned_key,
+            load,
+            tags=[notifications_tag(user_id)],
+            headers=lambda _: next_page,
+            encode=dumps,
+        ),
+    )
+
+
+@router.get(
+    "/{user_id}/unread-count",
+    response_model=UnreadCountSchema,
+    response_class=FastJSONResponse,
+)
+async def get_unread_count(
+    user_id: uuid.UUID, request: Request, db: AsyncSession = Depends(get_user_read_db)
+):
+    """
+    Badge count from the maintained per-user counter: one primary-key lookup however many are unread.
+    """
+
+    async def build(_):
+        unread = await NotificationService.get_unread_count(db, user_id)
+        return FastJSONResponse({"user_id": user_id, "unread": unread})
+
+    return await etag_response(
+        request, db, user_id, f"notifications:{user_id}:unread-count", build
+    )
+
+
+@router.patch("/read", response_model=MarkReadResult)
+async def mark_many_read(payload: NotificationIds, db: AsyncSession = Depends(get_db)):
+    """
+    Marks the listed notifications read in one statement; ids already read or unknown are ignored.
+    """
+    return {
+        "marked": await NotificationService.mark_many_as_read(
+            db, payload.notification_ids
+        )
+    }
+
+
+@router.patch("/{user_id}/read-all", response_model=MarkReadResult)
+async def mark_all_read(user_id: uuid.UUID, db: AsyncSession = Depends(get_db)):
+    return {"marked": await NotificationService.mark_all_as_read(db, user_id)}
+
+
+@router.get("/{user_id}/stream")
+async def stream_notifications(
+    user_id: uuid.UUID,
+    last_event_id: Optional[str] = None,
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID"),
+):
+    """
+    Server-Sent Events feed of the user's new notifications, replacing polling of GET /{user_id}.
+    Browsers resend Last-Event-ID on reconnect; pass `last_event_id` (e.g. the newest id from
+    GET /{user_id}) to resume on the first connection. No session is held while the stream is open.
+    """
+    return StreamingResponse(
+        notification_events(user_id, last_event_id_header or last_event_id),
+        media_type="text/event-stream",
+        # Keep proxies from buffering or caching the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 
 @router.patch("/{notification_id}/read", response_model=NotificationSchema)
 async def mark_read(notification_id: str, db: AsyncSession = Depends(get_db)):
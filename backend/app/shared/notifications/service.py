@@ -1,52 +1,224 @@
+import datetime
+import uuid
+from typing import Iterable, List, Literal, Optional, Tuple
+
+from sqlalchemy import func, literal, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from app.shared.gifts.models import Notification
+
+from app.database import recent_writes
+from app.shared.cache.service import notifications_tag, response_cache
+from app.shared.gifts.models import Notification, NotificationCounter, utcnow
 from app.shared.gifts.schemas import UserRole
-import uuid
-from typing import List
+from app.shared.gifts.versions import build_version_bump, build_version_bump_from
+from app.shared.notifications.stream import (
+    build_notify,
+    lock_stream_order,
+    notification_hub,
+)
+
+NotificationStatus = Literal["unread", "read", "all"]
+# (created_at, id) of the last notification on a page
+FeedKey = Tuple[datetime.datetime, uuid.UUID]
+
 
 class NotificationService:
+    @staticmethod
+    def build_insert(rows: List[dict]):
+        """
+        One multi-row INSERT, with the recipients' feed versions and unread counters bumped by attached
+        CTEs and every inserted row announced to open streams via pg_notify. Rows whose id already exists are skipped
+        (and not announced), so redelivering an outbox batch cannot duplicate notifications.
+        """
+        inserted = (
+            pg_insert(Notification)
+            .values(rows)
+            .on_conflict_do_nothing(
+                index_elements=[Notification.id, Notification.created_at]
+            )
+            .returning(*Notification.__table__.columns)
+            .cte("inserted")
+        )
+        per_user = select(inserted.c.recipient_id, func.count()).group_by(
+            inserted.c.recipient_id
+        )
+        count_unread = pg_insert(NotificationCounter).from_select(
+            ["user_id", "unread"], per_user
+        )
+        count_unread = count_unread.on_conflict_do_update(
+            index_elements=[NotificationCounter.user_id],
+            set_={"unread": NotificationCounter.unread + count_unread.excluded.unread},
+        )
+        return build_notify(inserted).add_cte(
+            build_version_bump(row["recipient_id"] for row in rows).cte(
+                "bump_versions"
+            ),
+            count_unread.cte("count_unread"),
+        )
+
     @staticmethod
     async def create_notification(
-        db: AsyncSession, 
-        recipient_id: str, 
-        role: UserRole, 
-        event_type: str, 
+        db: AsyncSession,
+        recipient_id: str,
+        role: UserRole,
+        event_type: str,
         message: str,
-        action_url: str = None
+        action_url: Optional[str] = None,
     ) -> Notification:
-        notification = Notification(
-            id=uuid.uuid4(),
-            recipient_id=uuid.UUID(recipient_id),
-            role=role,
-            event_type=event_type,
-            message=message,
-            action_url=action_url,
-            is_read=False
-        )
-        db.add(notification)
+        """
+        Creates and commits a single notification. Writes that notify as a side effect queue theirs
+        in their own transaction with OutboxService.enqueue instead.
+        """
+        row = {
+            "id": uuid.uuid4(),
+            "recipient_id": uuid.UUID(str(recipient_id)),
+            "role": role.value,
+            "event_type": event_type,
+            "message": message,
+            "action_url": action_url,
+            "is_read": False,
+            "created_at": utcnow(),
+        }
+        await lock_stream_order(db, [row["recipient_id"]])
+        await db.execute(NotificationService.build_insert([row]))
         await db.commit()
-        await db.refresh(notification)
-        return notification
+        await recent_writes.mark(row["recipient_id"])
+        await response_cache.invalidate(notifications_tag(row["recipient_id"]))
+        notification_hub.publish_local([row])
+        return Notification(**row)
 
     @staticmethod
-    async def get_unread_for_user(db: AsyncSession, user_id: str) -> List[Notification]:
-        result = await db.execute(
-            select(Notification)
-            .where(Notification.recipient_id == uuid.UUID(user_id))
-            .where(Notification.is_read == False)
-            .order_by(Notification.created_at.desc())
+    async def get_for_user(
+        db: AsyncSession,
+        user_id: uuid.UUID,
+        status: NotificationStatus = "unread",
+        limit: Optional[int] = None,
+        before: Optional[FeedKey] = None,
+    ) -> List[dict]:
+        """
+        The user's notifications newest first. With `limit`/`before` the feed is keyset-paginated on
+        (created_at, id), so deep pages cost the same as the first; unread feeds use the partial index.
+        """
+        query = select(*Notification.__table__.columns).where(
+            Notification.recipient_id == user_id
         )
-        return result.scalars().all()
+        if status == "unread":
+            query = query.where(Notification.is_read == False)
+        elif status == "read":
+            query = query.where(Notification.is_read == True)
+        if before is not None:
+            query = query.where(
+                tuple_(Notification.created_at, Notification.id) < tuple_(*before)
+            )
+        query = query.order_by(Notification.created_at.desc(), Notification.id.desc())
+        if limit is not None:
+            query = query.limit(limit)
+        result = await db.execute(query)
+        return [dict(row) for row in result.mappings()]
+
+    @staticmethod
+    def encode_cursor(row: dict) -> str:
+        return f"{row['created_at'].isoformat()}_{row['id']}"
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> FeedKey:
+        """
+        Inverse of encode_cursor; raises ValueError for anything else.
+        """
+        created_at, _, notification_id = cursor.partition("_")
+        return datetime.datetime.fromisoformat(created_at), uuid.UUID(notification_id)
 
     @staticmethod
-    async def mark_as_read(db: AsyncSession, notification_id: str) -> Notification:
+    async def get_unread_count(db: AsyncSession, user_id: uuid.UUID) -> int:
         result = await db.execute(
-            select(Notification).where(Notification.id == uuid.UUID(notification_id))
+            select(NotificationCounter.unread).where(
+                NotificationCounter.user_id == user_id
+            )
         )
-        notification = result.scalar_one_or_none()
-        if notification:
-            notification.is_read = True
+        return result.scalar_one_or_none() or 0
+
+    @staticmethod
+    def build_mark_read(clause, returning=(Notification.id, Notification.recipient_id)):
+        """
+        One UPDATE marking the unread notifications matching `clause` read. Attached CTEs lower the
+        unread counters by the rows actually changed and bump the recipients' versions, so repeating
+        it changes nothing. Yields the `returning` columns of every notification marked.
+        """
+        marked = (
+            update(Notification)
+            .where(clause, Notification.is_read == False)
+            .values(is_read=True)
+            .returning(*dict.fromkeys([*returning, Notification.recipient_id]))
+            .cte("marked")
+        )
+        per_user = (
+            select(marked.c.recipient_id, func.count().label("marked"))
+            .group_by(marked.c.recipient_id)
+            .cte("marked_per_user")
+        )
+        count_read = (
+            update(NotificationCounter)
+            .where(NotificationCounter.user_id == per_user.c.recipient_id)
+            .values(
+                unread=func.greatest(NotificationCounter.unread - per_user.c.marked, 0)
+            )
+        )
+        return select(*marked.c).add_cte(
+            count_read.cte("count_read"),
+            build_version_bump_from(select(per_user.c.recipient_id, literal(1))).cte(
+                "bump_versions"
+            ),
+        )
+
+    @staticmethod
+    async def _commit_read(db: AsyncSession, recipient_ids: Iterable[uuid.UUID]):
+        recipients = set(recipient_ids)
+        if recipients:
             await db.commit()
-            await db.refresh(notification)
-        return notification
+            await recent_writes.mark(*recipients)
+            await response_cache.invalidate(
+                *(notifications_tag(uid) for uid in recipients)
+            )
+
+    @staticmethod
+    async def mark_all_as_read(db: AsyncSession, user_id: uuid.UUID) -> int:
+        result = await db.execute(
+            NotificationService.build_mark_read(Notification.recipient_id == user_id)
+        )
+        marked = result.mappings().all()
+        await NotificationService._commit_read(db, [user_id] if marked else [])
+        return len(marked)
+
+    @staticmethod
+    async def mark_many_as_read(
+        db: AsyncSession, notification_ids: List[uuid.UUID]
+    ) -> int:
+        result = await db.execute(
+            NotificationService.build_mark_read(Notification.id.in_(notification_ids))
+        )
+        marked = result.mappings().all()
+        await NotificationService._commit_read(
+            db, (row["recipient_id"] for row in marked)
+        )
+        return len(marked)
+
+    @staticmethod
+    async def mark_as_read(db: AsyncSession, notification_id: str) -> Optional[dict]:
+        notification_id = uuid.UUID(notification_id)
+        columns = Notification.__table__.columns
+        result = await db.execute(
+            NotificationService.build_mark_read(
+                Notification.id == notification_id, columns
+            )
+        )
+        row = result.mappings().one_or_none()
+        if row is None:
+            # Already read, or missing: nothing changed
+            result = await db.execute(
+                select(*columns).where(Notification.id == notification_id)
+            )
+            row = result.mappings().one_or_none()
+            return dict(row) if row else None
+        await NotificationService._commit_read(db, [row["recipient_id"]])
+        return dict(row)
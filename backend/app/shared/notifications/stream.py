@@ -0,0 +1,370 @@
+import asyncio
+import collections
+import contextlib
+import json
+import logging
+import uuid
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import case, func, literal
+from sqlalchemy.dialects.postgresql import ARRAY, TEXT
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app import database
+from app.config import Settings
+from app.shared.gifts.models import Notification
+from app.shared.responses import dumps
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "notifications"
+# Postgres rejects NOTIFY payloads of 8000 bytes or more; bigger rows are announced by
+# id only
+MAX_NOTIFY_PAYLOAD = 7900
+# Events buffered per connection before a slow client is resynced from the database
+# instead
+SUBSCRIBER_QUEUE_SIZE = 100
+# Notifications loaded per resync query
+RESYNC_LIMIT = 500
+# Client reconnect delay sent in the `retry:` field
+RECONNECT_MS = 3000
+# Key space of the per-recipient advisory locks held from the first insert into
+# notifications until commit (see lock_stream_order)
+STREAM_ORDER_LOCK_SPACE = 0x6E6F7469
+
+# Queue markers: reload from the database after the last event sent / end the stream
+RESYNC = object()
+CLOSE = object()
+
+# seq of the last notification sent; the order resumes follow
+StreamKey = int
+
+
+async def lock_stream_order(db: AsyncSession, recipient_ids: Iterable[uuid.UUID]):
+    """
+    Serializes writers of notifications for the same recipients until they commit, so
+    each recipient's seq values are handed out in commit order. A stream that has seen
+    seq N can then never be handed a row of its user below N later, which created_at
+    (assigned before the transaction, or at enqueue time for the outbox) cannot promise.
+    Writers for other recipients are not held up. Call it in the writing transaction
+    before inserting, and commit promptly afterwards.
+    """
+    recipients = sorted({str(recipient_id) for recipient_id in recipient_ids})
+    if not recipients:
+        return
+    # Taken in key order in one statement, so batches sharing recipients cannot deadlock
+    keys = (
+        select(
+            func.hashtext(func.unnest(literal(recipients, ARRAY(TEXT)))).label("key")
+        )
+        .distinct()
+        .order_by("key")
+        .subquery()
+    )
+    await db.execute(
+        select(func.pg_advisory_xact_lock(STREAM_ORDER_LOCK_SPACE, keys.c.key))
+    )
+
+
+def build_notify(inserted):
+    """
+    SELECT pg_notify(...) for every row of the `inserted` CTE (INSERT ... RETURNING into
+    notifications). NOTIFY is transactional, so listeners hear about rows only once they
+    commit.
+    """
+    payload = func.row_to_json(inserted.table_valued()).cast(TEXT)
+    reference = func.json_build_object(
+        "id", inserted.c.id, "recipient_id", inserted.c.recipient_id
+    ).cast(TEXT)
+    return select(
+        func.pg_notify(
+            CHANNEL,
+            case(
+                (func.octet_length(payload) < MAX_NOTIFY_PAYLOAD, payload),
+                else_=reference,
+            ),
+        )
+    ).select_from(inserted)
+
+
+class NotificationHub:
+    """
+    In-process pub/sub of delivered notifications, keyed by recipient. Fed by the
+    worker's NotificationListener when LISTEN is running, or directly by the writer
+    otherwise.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self.listening = False
+        self.heartbeat_seconds = 15.0
+        self.max_stream_seconds = 300.0
+        self.published = 0
+        self.overflows = 0
+
+    def subscribe(self, user_id) -> asyncio.Queue:
+        queue = asyncio.Queue(SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.setdefault(str(user_id), set()).add(queue)
+        return queue
+
+    def unsubscribe(self, user_id, queue: asyncio.Queue):
+        queues = self._subscribers.get(str(user_id))
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[str(user_id)]
+
+    def publish(self, notification: Dict[str, Any]):
+        """
+        Hands a notification to the recipient's open streams. Only `id` and
+        `recipient_id` are guaranteed; streams load anything else from the database.
+        """
+        self.published += 1
+        for queue in self._subscribers.get(str(notification["recipient_id"]), ()):
+            try:
+                queue.put_nowait(notification)
+            except asyncio.QueueFull:
+                # Replace the backlog with one reload from the database
+                self.overflows += 1
+                self._reset(queue, RESYNC)
+
+    def publish_local(self, notifications: Iterable[Dict[str, Any]]):
+        """
+        Publishes rows this worker just committed, unless the listener will relay them
+        anyway. Rows without their seq are loaded by the streams from the database, in
+        seq order.
+        """
+        if not self.listening:
+            for notification in notifications:
+                self.publish(notification)
+
+    def resync_all(self):
+        for queues in self._subscribers.values():
+            for queue in queues:
+                self._reset(queue, RESYNC)
+
+    def close(self):
+        for queues in self._subscribers.values():
+            for queue in queues:
+                self._reset(queue, CLOSE)
+
+    @staticmethod
+    def _reset(queue: asyncio.Queue, marker):
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(marker)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "listening": self.listening,
+            "users": len(self._subscribers),
+            "streams": sum(len(queues) for queues in self._subscribers.values()),
+            "published": self.published,
+            "overflows": self.overflows,
+        }
+
+
+notification_hub = NotificationHub()
+
+
+class NotificationListener:
+    """
+    Keeps one primary connection per worker LISTENing on the notifications channel and
+    republishes every payload to the hub, so rows committed by any worker reach this
+    worker's streams. The connection is re-established with backoff; open streams are
+    resynced afterwards because events may have been missed meanwhile.
+    """
+
+    def __init__(self, hub: NotificationHub, engine=None):
+        self.hub = hub
+        self.engine = engine
+        self.connects = 0
+        self.last_error = None
+        self._task = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def run(self):
+        delay = 1.0
+        while True:
+            try:
+                await self._listen()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:  # noqa: BLE001
+                self.last_error = str(e)
+                logger.warning("Notification LISTEN connection failed: %s", e)
+            self.hub.resync_all()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30.0)
+
+    async def _listen(self):
+        # Read at call time: the engine is built on first use and rebuilt by create_app
+        async with (self.engine or database.get_engine()).connect() as conn:
+            raw = (await conn.get_raw_connection()).driver_connection
+            lost = asyncio.Event()
+            raw.add_termination_listener(lambda _: lost.set())
+            await raw.add_listener(CHANNEL, self._on_notify)
+            self.connects += 1
+            self.hub.listening = True
+            if self.connects > 1:
+                self.hub.resync_all()
+            try:
+                await lost.wait()
+            finally:
+                self.hub.listening = False
+                if lost.is_set():
+                    await conn.invalidate()
+                else:
+                    # Returned to the pool, so stop listening first
+                    await raw.remove_listener(CHANNEL, self._on_notify)
+
+    def _on_notify(self, connection, pid, channel, payload):
+        try:
+            self.hub.publish(json.loads(payload))
+        except (ValueError, KeyError) as e:
+            logger.warning("Ignoring malformed notification payload: %s", e)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "connects": self.connects,
+            "last_error": self.last_error,
+        }
+
+
+notification_listener = NotificationListener(notification_hub)
+
+
+def configure_stream(settings: Settings):
+    notification_hub.heartbeat_seconds = settings.notifications_stream_heartbeat_seconds
+    notification_hub.max_stream_seconds = settings.notifications_stream_max_seconds
+
+
+async def key_of(user_id: uuid.UUID, event_id: Optional[str]) -> Optional[StreamKey]:
+    """
+    Resume position for a Last-Event-ID: the seq sent as the event id, or the seq of one
+    of the user's notifications given by id (as listed by the feed). None for anything
+    else.
+    """
+    if event_id is not None and event_id.isdigit():
+        return int(event_id)
+    try:
+        notification_id = uuid.UUID(event_id)
+    except (TypeError, ValueError):
+        return None
+    async with database.AsyncSessionLocal() as db:
+        return (
+            await db.execute(
+                select(Notification.seq).where(
+                    Notification.id == notification_id,
+                    Notification.recipient_id == user_id,
+                )
+            )
+        ).scalar_one_or_none()
+
+
+async def latest_key(user_id: uuid.UUID) -> StreamKey:
+    """
+    The seq of the user's newest committed notification, or 0. Rows still being written
+    get a higher seq (see lock_stream_order), so a stream starting here misses none of
+    them.
+    """
+    async with database.AsyncSessionLocal() as db:
+        return (
+            await db.execute(
+                select(func.coalesce(func.max(Notification.seq), 0)).where(
+                    Notification.recipient_id == user_id
+                )
+            )
+        ).scalar_one()
+
+
+async def load_after(user_id: uuid.UUID, after: StreamKey) -> List[Dict[str, Any]]:
+    """
+    The user's notifications with a seq above `after`, in seq order, read from the
+    primary so rows announced by NOTIFY are visible.
+    """
+    async with database.AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(*Notification.__table__.columns)
+            .where(Notification.recipient_id == user_id, Notification.seq > after)
+            .order_by(Notification.seq)
+            .limit(RESYNC_LIMIT)
+        )
+        return [dict(row) for row in result.mappings()]
+
+
+def _event(notification: Dict[str, Any]) -> bytes:
+    return b"id: %d\nevent: notification\ndata: %s\n\n" % (
+        int(notification["seq"]),
+        dumps(notification),
+    )
+
+
+async def notification_events(
+    user_id: uuid.UUID, last_event_id: Optional[str] = None
+) -> AsyncIterator[bytes]:
+    """
+    Server-Sent Events for one user's new notifications. With `last_event_id` everything
+    after that notification is replayed first. Comment lines keep idle connections
+    alive, and the stream ends after max_stream_seconds so clients reconnect (with
+    Last-Event-ID) and spread over workers.
+    """
+    hub = notification_hub
+    # Subscribe before reading the backlog so nothing falls between the two
+    queue = hub.subscribe(user_id)
+    try:
+        yield b"retry: %d\n\n" % RECONNECT_MS
+        last = await key_of(user_id, last_event_id) if last_event_id else None
+        # Live events already sent by a backlog or resync query are skipped
+        recent = collections.deque(maxlen=RESYNC_LIMIT * 2)
+        if last is None:
+            last = await latest_key(user_id)
+            pending = []
+        else:
+            pending = await load_after(user_id, last)
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + hub.max_stream_seconds
+        while True:
+            for notification in pending:
+                if notification["id"] in recent:
+                    continue
+                recent.append(notification["id"])
+                last = max(last, int(notification["seq"]))
+                yield _event(notification)
+
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return
+            try:
+                item = await asyncio.wait_for(
+                    queue.get(), min(hub.heartbeat_seconds, remaining)
+                )
+            except TimeoutError:
+                yield b": heartbeat\n\n"
+                pending = []
+                continue
+            if item is CLOSE:
+                return
+            if item is RESYNC or "seq" not in item:
+                # Overflowed queue, lost LISTEN connection, a payload too big for NOTIFY
+                # or a local publish: rows committed up to this one are all loaded, in
+                # seq order
+                pending = await load_after(user_id, last)
+            else:
+                item["id"] = uuid.UUID(str(item["id"]))
+                pending = [item]
+    finally:
+        hub.unsubscribe(user_id, queue)
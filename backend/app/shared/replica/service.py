@@ -0,0 +1,131 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.shared.cache.backends import CacheBackend
+
+logger = logging.getLogger(__name__)
+
+# Seconds of replay lag on a standby; 0 when it has replayed everything it received (an
+# idle primary leaves pg_last_xact_replay_timestamp() old without any real lag) or is
+# not a standby.
+REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN pg_is_in_recovery() AND pg_last_wal_receive_lsn() IS DISTINCT FROM
+        pg_last_wal_replay_lsn()
+        THEN COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+        ELSE 0
+    END
+""")
+
+
+class ReplicaMonitor:
+    """
+    Decides whether reads may go to the replica. Lag is measured at most once per check
+    interval; a missing, unreachable or lagging replica sends reads to the primary.
+    """
+
+    def __init__(
+        self,
+        engine: Optional[AsyncEngine],
+        max_lag_seconds: float,
+        check_interval_seconds: float = 1.0,
+        check_timeout_seconds: float = 1.0,
+    ):
+        self.engine = engine
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval_seconds = check_interval_seconds
+        self.check_timeout_seconds = check_timeout_seconds
+        self.lag_seconds: Optional[float] = None
+        self.healthy = False
+        self.checked_at: Optional[float] = None
+        self.errors = 0
+        self._lock = asyncio.Lock()
+
+    async def is_usable(self) -> bool:
+        if self.engine is None:
+            return False
+        if self._stale():
+            async with self._lock:
+                # Another request may have refreshed it while this one waited
+                if self._stale():
+                    await self._check()
+        return self.healthy
+
+    def _stale(self) -> bool:
+        return (
+            self.checked_at is None
+            or time.monotonic() - self.checked_at >= self.check_interval_seconds
+        )
+
+    async def _check(self):
+        try:
+            self.lag_seconds = await asyncio.wait_for(
+                self._measure_lag(), self.check_timeout_seconds
+            )
+            self.healthy = self.lag_seconds <= self.max_lag_seconds
+            if not self.healthy:
+                logger.warning(
+                    "Replica lag %.1fs exceeds %.1fs; reading from primary",
+                    self.lag_seconds,
+                    self.max_lag_seconds,
+                )
+        except Exception as e:  # noqa: BLE001
+            self.errors += 1
+            self.healthy = False
+            logger.warning("Replica check failed, reading from primary: %s", e)
+        finally:
+            self.checked_at = time.monotonic()
+
+    async def _measure_lag(self) -> float:
+        async with self.engine.connect() as conn:
+            return float((await conn.execute(REPLICA_LAG_SQL)).scalar())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "configured": self.engine is not None,
+            "healthy": self.healthy,
+            "lag_seconds": self.lag_seconds,
+            "max_lag_seconds": self.max_lag_seconds,
+            "errors": self.errors,
+        }
+
+
+class RecentWrites:
+    """
+    Read-your-writes markers: after a write commits, each affected user is marked for
+    `window_seconds` and their reads go to the primary until it expires. The window must
+    be at least the tolerated replica lag, so that a replica serving the user has seen
+    the write.
+    """
+
+    def __init__(self, backend: CacheBackend, window_seconds: float):
+        self.backend = backend
+        self.window_seconds = window_seconds
+
+    @staticmethod
+    def _key(user_id) -> str:
+        return f"recent-write:{user_id}"
+
+    async def mark(self, *user_ids):
+        if self.window_seconds <= 0:
+            return
+        try:
+            for user_id in dict.fromkeys(user_ids):
+                await self.backend.set(self._key(user_id), b"1", self.window_seconds)
+        except Exception as e:  # noqa: BLE001
+            logger.warning("Recording recent write failed for %s: %s", user_ids, e)
+
+    async def is_recent(self, user_id) -> bool:
+        if user_id is None or self.window_seconds <= 0:
+            return False
+        try:
+            return await self.backend.get(self._key(user_id)) is not None
+        except Exception as e:  # noqa: BLE001
+            # Unknown: the primary is always safe
+            logger.warning("Reading recent-write marker failed for %s: %s", user_id, e)
+            return True
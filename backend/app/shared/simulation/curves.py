@@ -0,0 +1,65 @@
+from collections import OrderedDict
+from typing import Any, Dict, Tuple
+
+from app.config import Settings
+
+
+class UnitCurveCache:
+    """
+    LRU of unit growth curves (a corpus of 1) keyed by (annual rate, years, step in
+    months). Projections are pure and linear in the corpus, so every gift on the same
+    profile and horizon is that one curve scaled by its corpus; a warm cache leaves no
+    compounding to do per request.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[Tuple[float, int, int], Any] = OrderedDict()
+
+    def get(self, annual_rate: float, years: int, step_months: int):
+        """
+        The read-only curve sampled at months 0, step_months ... years * 12.
+        """
+        key = (annual_rate, years, step_months)
+        curve = self._entries.get(key)
+        if curve is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return curve
+
+        from app.shared.simulation import engine
+
+        self.misses += 1
+        curve = engine.unit_curve(annual_rate, years * 12, step_months)
+        # Shared by every caller; scaling must never write into it
+        curve.flags.writeable = False
+        self._entries[key] = curve
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return curve
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+
+unit_curves = UnitCurveCache()
+
+
+def configure_curves(settings: Settings):
+    unit_curves.clear()
+    unit_curves.max_entries = settings.simulation_curve_cache_size
@@ -0,0 +1,233 @@
+"""
+NumPy projection engine. Curves for many gifts are computed together in float64;
+conversion to 2-decimal Decimal happens only when responses are built (see to_cents).
+Imported lazily by SimulationService so NumPy stays out of the API's import path.
+"""
+
+from decimal import ROUND_HALF_EVEN, Decimal
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+CENT = Decimal("0.01")
+# Values are rounded to this many places before the half-even cent rounding, so float
+# noise around a half-cent tie (0.5449999999999999) rounds the way the exact Decimal
+# value (0.545) does
+TIE_DIGITS = 8
+TIE_SCALE = 10**TIE_DIGITS
+# Largest magnitude whose scaled value fits int64; the few values above it take the slow
+# path
+FAST_LIMIT = 9e10
+
+
+def month_offsets(months: int, step: int) -> np.ndarray:
+    """
+    Sample points 0, step, 2 * step ... months. `step` must divide 12 and `months` is a
+    whole number of years, so the horizon is always the last point and shorter horizons
+    are prefixes.
+    """
+    if step < 1 or 12 % step:
+        raise ValueError(f"step_months must divide 12, got {step}")
+    return np.arange(0, months + 1, step, dtype=np.float64)
+
+
+def unit_curve(annual_rate: float, months: int, step: int = 1) -> np.ndarray:
+    """
+    Growth of a corpus of 1 at `annual_rate`, sampled at month_offsets(months, step).
+    """
+    return np.power(1.0 + annual_rate, month_offsets(months, step) / 12.0)
+
+
+def scale_curves(
+    corpus: Sequence[float], curves: Sequence[np.ndarray], rows: Sequence[int]
+) -> np.ndarray:
+    """
+    Row i is corpus[i] times curves[rows[i]]; the curves must have equal lengths.
+    """
+    return (
+        np.asarray(corpus, dtype=np.float64)[:, None]
+        * np.stack(curves)[np.asarray(rows)]
+    )
+
+
+def growth_curves(
+    corpus: Sequence[float], annual_rates: Sequence[float], months: int, step: int = 1
+) -> np.ndarray:
+    """
+    Compounded values with shape (len(corpus), points): row i is corpus[i] grown at
+    annual_rates[i] and sampled at month_offsets(months, step). Growing by (1 + r) ** (m
+    / 12) is monthly compounding at (1 + r) ** (1 / 12) - 1, which lands exactly on the
+    annual CAGR at year ends.
+    """
+    corpus = np.asarray(corpus, dtype=np.float64)
+    growth = 1.0 + np.asarray(annual_rates, dtype=np.float64)
+    return corpus[:, None] * np.power(
+        growth[:, None], month_offsets(months, step)[None, :] / 12.0
+    )
+
+
+def prefixes(curves: np.ndarray, lengths: Sequence[int]) -> np.ndarray:
+    """
+    The first lengths[i] points of each row of `curves`, concatenated row by row.
+    """
+    return curves[np.arange(curves.shape[1])[None, :] < np.asarray(lengths)[:, None]]
+
+
+def to_cents(values: np.ndarray) -> List[Decimal]:
+    """
+    Float values as 2-decimal Decimals, rounded half-even like round(Decimal, 2).
+    Rounding is done on int64 units of 10 ** -TIE_DIGITS so only the final Decimal
+    construction is per value.
+    """
+    values = np.asarray(values, dtype=np.float64).ravel()
+    fast = np.abs(values) < FAST_LIMIT
+    units = np.rint(np.where(fast, values, 0.0) * TIE_SCALE).astype(np.int64)
+    cents, rest = np.divmod(units, TIE_SCALE // 100)
+    half = TIE_SCALE // 200
+    cents += (rest > half) | ((rest == half) & (cents % 2 == 1))
+    result = [Decimal(cent) * CENT for cent in cents.tolist()]
+    for index in np.flatnonzero(~fast).tolist():
+        result[index] = Decimal(repr(values[index].item())).quantize(
+            CENT, ROUND_HALF_EVEN
+        )
+    return result
+
+
+# Monte Carlo: paths are drawn in blocks of CHUNK_PATHS, each from its own child of the
+# run's seed, so a run is reproducible from (seed, paths) however the blocks are
+# scheduled. Each block is reduced to a histogram of log growth per month, which keeps
+# memory independent of the path count and lets blocks from different processes be
+# merged by adding counts.
+CHUNK_PATHS = 2048
+HISTOGRAM_BINS = 2048
+# Histograms span this many standard deviations either side of the expected log growth
+HISTOGRAM_SIGMAS = 6.0
+
+
+def path_blocks(paths: int) -> List[Tuple[int, int]]:
+    """
+    (block index, paths in block) covering `paths` paths.
+    """
+    return [
+        (block, min(CHUNK_PATHS, paths - start))
+        for block, start in enumerate(range(0, paths, CHUNK_PATHS))
+    ]
+
+
+def monthly_log_params(annual_rate: float, volatility: float) -> Tuple[float, float]:
+    """
+    Mean and standard deviation of one month's log return. The median path compounds at
+    exactly `annual_rate`, so P50 follows the deterministic growth curve.
+    """
+    return np.log1p(annual_rate) / 12.0, volatility / np.sqrt(12.0)
+
+
+def histogram_grid(
+    annual_rate: float, volatility: float, months: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Lower edge and bin width of the log-growth histogram for months 1 .. months.
+    """
+    mean, std = monthly_log_params(annual_rate, volatility)
+    elapsed = np.arange(1, months + 1, dtype=np.float64)
+    spread = HISTOGRAM_SIGMAS * max(std, 1e-9) * np.sqrt(elapsed)
+    return mean * elapsed - spread, 2.0 * spread / HISTOGRAM_BINS
+
+
+def monte_carlo_block(
+    annual_rate: float,
+    volatility: float,
+    months: int,
+    paths: int,
+    seed: int,
+    block: int,
+) -> np.ndarray:
+    """
+    Log-growth histogram counts, shape (months, HISTOGRAM_BINS), of `paths` monthly
+    return paths drawn for block `block` of `seed`. Top-level so it can run in a worker
+    process.
+    """
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(block,)))
+    mean, std = monthly_log_params(annual_rate, volatility)
+    growth = rng.normal(mean, std, size=(paths, months))
+    np.cumsum(growth, axis=1, out=growth)
+    low, width = histogram_grid(annual_rate, volatility, months)
+    growth -= low
+    growth /= width
+    bins = np.clip(growth, 0, HISTOGRAM_BINS - 1).astype(np.int64)
+    bins += np.arange(months, dtype=np.int64) * HISTOGRAM_BINS
+    return (
+        np.bincount(bins.ravel(), minlength=months * HISTOGRAM_BINS)
+        .astype(np.int32)
+        .reshape(months, HISTOGRAM_BINS)
+    )
+
+
+def histogram_percentiles(
+    counts: np.ndarray, low: np.ndarray, width: np.ndarray, percentiles: Sequence[float]
+) -> np.ndarray:
+    """
+    Percentiles of each row of `counts`, shape (len(percentiles), rows), interpolated
+    linearly within the bin that holds them.
+    """
+    cumulative = np.cumsum(counts, axis=1, dtype=np.int64)
+    total = cumulative[:, -1]
+    result = []
+    for percentile in percentiles:
+        target = total * (percentile / 100.0)
+        index = np.minimum(
+            (cumulative < target[:, None]).sum(axis=1), counts.shape[1] - 1
+        )
+        in_bin = np.take_along_axis(counts, index[:, None], axis=1)[:, 0]
+        before = np.take_along_axis(cumulative, index[:, None], axis=1)[:, 0] - in_bin
+        fraction = np.where(in_bin > 0, (target - before) / np.maximum(in_bin, 1), 0.5)
+        result.append(low + width * (index + fraction))
+    return np.array(result)
+
+
+def band_values(corpus: float, log_bands: np.ndarray) -> np.ndarray:
+    """
+    Wealth for percentile rows of log growth over months 1 .. n, with month 0 (the
+    corpus itself) prepended to each row.
+    """
+    values = np.empty((log_bands.shape[0], log_bands.shape[1] + 1))
+    values[:, 0] = corpus
+    values[:, 1:] = corpus * np.exp(log_bands)
+    return values
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Indices of `threshold` points chosen by Largest-Triangle-Three-Buckets: the first
+    and last points, then per bucket the point forming the largest triangle with the
+    point kept from the previous bucket and the mean of the next one, so peaks and
+    troughs survive downsampling. Every index is returned when `threshold` is at least
+    len(x) or below 3.
+    """
+    count = len(x)
+    if threshold >= count or threshold < 3:
+        return np.arange(count)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # Bucket b covers [edges[b], edges[b + 1]); the last edge is the final point, kept
+    # as is
+    edges = (
+        np.arange(threshold - 1, dtype=np.int64) * (count - 2) // (threshold - 2) + 1
+    )
+    bounds = np.append(edges, count)
+    mean_x = np.add.reduceat(x, bounds[:-1]) / np.diff(bounds)
+    mean_y = np.add.reduceat(y, bounds[:-1]) / np.diff(bounds)
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, count - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        ax, ay = x[previous], y[previous]
+        area = np.abs(
+            (ax - mean_x[bucket + 1]) * (y[start:end] - ay)
+            - (ax - x[start:end]) * (mean_y[bucket + 1] - ay)
+        )
+        previous = start + int(np.argmax(area))
+        selected[bucket + 1] = previous
+    return selected
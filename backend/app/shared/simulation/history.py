@@ -0,0 +1,131 @@
+import datetime
+import os
+from typing import Any, Dict, Optional
+
+from app.config import Settings
+from app.shared.gifts.schemas import RiskProfile
+
+# Mock dataset shipped with the app (spec 4.7): one .npy file of daily fund values per
+# profile
+BUNDLED_HISTORY_DIR = os.path.join(os.path.dirname(__file__), "data")
+HISTORY_START = "2005-01-03"
+HISTORY_END = "2026-01-01"
+HISTORY_SEED = 4_700
+# Share of each profile's volatility driven by a common market factor, so the mock funds
+# fall and recover together
+MARKET_BETA = {
+    RiskProfile.Conservative: 0.25,
+    RiskProfile.Balanced: 0.55,
+    RiskProfile.Growth: 0.95,
+}
+
+
+def history_path(directory: str, profile: RiskProfile) -> str:
+    return os.path.join(directory, f"{profile.value.lower()}.npy")
+
+
+class HistoryStore:
+    """
+    Historical fund values per risk profile, as structured (date, value) arrays
+    memory-mapped from `directory` on first use and kept for the life of the process.
+    Range reads are views into the map, so only the pages of the requested dates are
+    ever read from disk.
+    """
+
+    def __init__(self, directory: str = BUNDLED_HISTORY_DIR):
+        self.directory = directory
+        self._series: Dict[RiskProfile, Any] = {}
+
+    def series(self, profile: RiskProfile):
+        series = self._series.get(profile)
+        if series is None:
+            import numpy as np
+
+            series = np.load(history_path(self.directory, profile), mmap_mode="r")
+            self._series[profile] = series
+        return series
+
+    def between(
+        self,
+        profile: RiskProfile,
+        start: Optional[datetime.date],
+        end: Optional[datetime.date],
+    ):
+        """
+        The rows dated from `start` to `end`, both inclusive and either open-ended.
+        """
+        import numpy as np
+
+        series = self.series(profile)
+        dates = series["date"]
+        first = (
+            0
+            if start is None
+            else int(np.searchsorted(dates, np.datetime64(start, "D"), "left"))
+        )
+        last = (
+            len(series)
+            if end is None
+            else int(np.searchsorted(dates, np.datetime64(end, "D"), "right"))
+        )
+        return series[first:last]
+
+    def close(self):
+        self._series.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "directory": self.directory,
+            "loaded": {
+                profile.value: {"points": len(series), "bytes": series.nbytes}
+                for profile, series in self._series.items()
+            },
+        }
+
+
+history_store = HistoryStore()
+
+
+def configure_history(settings: Settings):
+    history_store.close()
+    history_store.directory = settings.simulation_history_dir or BUNDLED_HISTORY_DIR
+
+
+def generate_history(
+    directory: str = BUNDLED_HISTORY_DIR,
+    start: str = HISTORY_START,
+    end: str = HISTORY_END,
+    seed: int = HISTORY_SEED,
+):
+    """
+    Writes the mock dataset: business-day values of a fund per profile, starting at 100
+    and compounding at the profile's CAGR and volatility.
+    """
+    import numpy as np
+
+    from app.shared.simulation.service import SimulationService
+
+    days = np.arange(start, end, dtype="datetime64[D]")
+    days = days[np.is_busday(days)]
+    rng = np.random.default_rng(seed)
+    market = rng.standard_normal(len(days))
+    os.makedirs(directory, exist_ok=True)
+    for profile in RiskProfile:
+        rate = float(SimulationService.annual_rate(profile))
+        daily = float(SimulationService.annual_volatility(profile)) / np.sqrt(252)
+        beta = MARKET_BETA[profile]
+        noise = beta * market + np.sqrt(1 - beta**2) * rng.standard_normal(len(days))
+        log_returns = np.log1p(rate) / 252 + daily * noise
+        log_returns[0] = 0.0
+        series = np.empty(
+            len(days), dtype=[("date", "datetime64[D]"), ("value", "<f8")]
+        )
+        series["date"] = days
+        series["value"] = 100.0 * np.exp(np.cumsum(log_returns))
+        np.save(history_path(directory, profile), series)
+
+
+if __name__ == "__main__":
+    # Regenerates the bundled mock dataset
+    generate_history()
+    print(f"Wrote {[history_path(BUNDLED_HISTORY_DIR, p) for p in RiskProfile]}")
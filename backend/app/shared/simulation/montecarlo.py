@@ -0,0 +1,109 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Dict, Optional
+
+from app.config import Settings
+
+BAND_PERCENTILES = (10, 50, 90)
+
+
+class MonteCarloRunner:
+    """
+    Runs Monte Carlo simulations off the event loop. Runs below `pool_min_paths` paths
+    (or all runs, without `workers`) go through one thread; larger ones are spread block
+    by block over a pool of `workers` processes. Blocks are merged as they finish, so at
+    most one histogram per worker is held besides the running total, and the bands do
+    not depend on which path was taken.
+    """
+
+    def __init__(self, workers: int = 0, pool_min_paths: int = 50_000):
+        self.workers = workers
+        self.pool_min_paths = pool_min_paths
+        self.runs = 0
+        self.pooled_runs = 0
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # Forking a process that runs an event loop and DB connections is unsafe;
+            # workers only need NumPy and the engine module
+            self._pool = ProcessPoolExecutor(
+                self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    async def run(
+        self, annual_rate: float, volatility: float, months: int, paths: int, seed: int
+    ):
+        """
+        Log-growth percentiles for months 1 .. months, shape (len(BAND_PERCENTILES),
+        months).
+        """
+        from app.shared.simulation import engine
+
+        blocks = engine.path_blocks(paths)
+        self.runs += 1
+        if self.workers and paths >= self.pool_min_paths:
+            self.pooled_runs += 1
+            loop = asyncio.get_running_loop()
+            pool = self._get_pool()
+            pending = [
+                loop.run_in_executor(
+                    pool,
+                    engine.monte_carlo_block,
+                    annual_rate,
+                    volatility,
+                    months,
+                    size,
+                    seed,
+                    block,
+                )
+                for block, size in blocks
+            ]
+            counts = None
+            for finished in asyncio.as_completed(pending):
+                block_counts = await finished
+                counts = block_counts if counts is None else counts + block_counts
+        else:
+            counts = await asyncio.to_thread(
+                partial(self._run_serial, annual_rate, volatility, months, seed, blocks)
+            )
+        low, width = engine.histogram_grid(annual_rate, volatility, months)
+        return engine.histogram_percentiles(counts, low, width, BAND_PERCENTILES)
+
+    @staticmethod
+    def _run_serial(annual_rate, volatility, months, seed, blocks):
+        from app.shared.simulation import engine
+
+        counts = None
+        for block, size in blocks:
+            block_counts = engine.monte_carlo_block(
+                annual_rate, volatility, months, size, seed, block
+            )
+            counts = block_counts if counts is None else counts + block_counts
+        return counts
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "pool_min_paths": self.pool_min_paths,
+            "pool_started": self._pool is not None,
+            "runs": self.runs,
+            "pooled_runs": self.pooled_runs,
+        }
+
+
+monte_carlo_runner = MonteCarloRunner()
+
+
+def configure_montecarlo(settings: Settings):
+    monte_carlo_runner.close()
+    monte_carlo_runner.workers = settings.simulation_workers
+    monte_carlo_runner.pool_min_paths = settings.simulation_pool_min_paths
@@ -1,26 +1,137 @@
-from fastapi import APIRouter, Depends, HTTPException
+import datetime
+import uuid
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.database import get_db
+from sqlalchemy.future import select
+
+from app.database import get_read_db, get_user_read_db
+from app.shared.cache.service import cached_response, gift_tag, user_tag
 from app.shared.gifts.models import Gift
+from app.shared.gifts.schemas import Currency, RiskProfile
+from app.shared.gifts.versions import etag_response
 from app.shared.simulation.service import SimulationService
-from sqlalchemy.future import select
-import uuid
 
 router = APIRouter(prefix="/simulation", tags=["Simulation"])
 
+
 @router.get("/growth/{gift_id}")
-async def get_growth_projection(gift_id: str, db: AsyncSession = Depends(get_db)):
-    """
-    Returns wealth projection for a specific gift based on its risk profile and corpus.
-    """
-    result = await db.execute(select(Gift).where(Gift.id == uuid.UUID(gift_id)))
-    gift = result.scalar_one_or_none()
-    
-    if not gift:
-        raise HTTPException(status_code=404, detail="Gift not found")
-        
-    return await SimulationService.get_growth_projection(
-        gift.corpus, 
-        gift.risk_profile,
-        years=15 # Standard 15 year projection
+async def get_growth_projection(
+    gift_id: uuid.UUID,
+    years: int = Query(15, ge=1, le=50),
+    step_months: int = Query(12, ge=1, le=12),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Returns wealth projection for a specific gift based on its risk profile and corpus, one
+    point every `step_months` months (a divisor of 12) over `years`; yearly over 15 years by default.
+    """
+
+    async def load():
+        result = await db.execute(select(Gift).where(Gift.id == gift_id))
+        gift = result.scalar_one_or_none()
+
+        if not gift:
+            raise HTTPException(status_code=404, detail="Gift not found")
+
+        try:
+            return await SimulationService.get_growth_projection(
+                gift.corpus, gift.risk_profile, years=years, step_months=step_months
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    return await cached_response(
+        f"simulation:growth:{gift_id}:{years}:{step_months}",
+        load,
+        tags=[gift_tag(gift_id)],
+    )
+
+
+@router.get("/montecarlo/{gift_id}")
+async def get_monte_carlo_bands(
+    gift_id: uuid.UUID,
+    years: int = Query(15, ge=1, le=50),
+    paths: int = Query(10_000, ge=1_000, le=100_000),
+    seed: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Monthly P10 / P50 / P90 wealth bands for a gift from `paths` seeded random return paths of its
+    risk profile. Reproducible: the same seed returns the same bands.
+    """
+
+    async def load():
+        result = await db.execute(select(Gift).where(Gift.id == gift_id))
+        gift = result.scalar_one_or_none()
+
+        if not gift:
+            raise HTTPException(status_code=404, detail="Gift not found")
+
+        return await SimulationService.get_monte_carlo_bands(
+            gift.corpus, gift.risk_profile, years=years, paths=paths, seed=seed
+        )
+
+    return await cached_response(
+        f"simulation:montecarlo:{gift_id}:{years}:{paths}:{seed}",
+        load,
+        tags=[gift_tag(gift_id)],
+    )
+
+
+@router.get("/portfolio/{user_id}")
+async def get_portfolio_projection(
+    user_id: uuid.UUID,
+    request: Request,
+    currency: Currency = Currency.USD,
+    years: int = Query(15, ge=1, le=50),
+    step_months: int = Query(12, ge=1, le=12),
+    db: AsyncSession = Depends(get_user_read_db),
+):
+    """
+    Growth projections of all of a grandparent's gifts plus their total, in one currency, for the
+    dynamic growth chart. Replaces one /growth call per gift.
+    """
+
+    async def load():
+        try:
+            return await SimulationService.get_portfolio_projection(
+                db, user_id, currency, years=years, step_months=step_months
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    key = f"simulation:portfolio:{user_id}:{currency.value}:{years}:{step_months}"
+    return await etag_response(
+        request,
+        db,
+        user_id,
+        key,
+        lambda versioned_key: cached_response(
+            versioned_key, load, tags=[user_tag(user_id)]
+        ),
+    )
+
+
+@router.get("/history/{profile}")
+async def get_fund_history(
+    profile: RiskProfile,
+    start: Optional[datetime.date] = None,
+    end: Optional[datetime.date] = None,
+    points: int = Query(500, ge=3, le=5_000),
+):
+    """
+    Historical fund chart for a risk profile (mock dataset), optionally limited to a date range and
+    downsampled server-side to at most `points` points.
+    """
+
+    async def load():
+        try:
+            return await SimulationService.get_history(profile, start, end, points)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    return await cached_response(
+        f"simulation:history:{profile.value}:{start}:{end}:{points}", load
     )
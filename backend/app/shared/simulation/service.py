@@ -1,46 +1,250 @@
+import datetime
+import uuid
 from decimal import Decimal
-from typing import List, Dict
-from app.shared.gifts.schemas import RiskProfile
+from typing import Any, ClassVar, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.shared.gifts.models import Gift
+from app.shared.gifts.schemas import Currency, RiskProfile
+from app.shared.simulation.curves import unit_curves
+from app.shared.simulation.history import history_store
+from app.shared.simulation.montecarlo import monte_carlo_runner
+from app.shared.utils import convert_amount
+
+# (corpus, risk profile, years) of one projection
+ProjectionRequest = Tuple[Decimal, RiskProfile, int]
+
 
 class SimulationService:
     # Industry-standard-ish mock CAGR for simulation
-    _CAGR_MAP = {
+    _CAGR_MAP: ClassVar[Dict[RiskProfile, Decimal]] = {
         RiskProfile.Conservative: Decimal("0.06"),
         RiskProfile.Balanced: Decimal("0.09"),
-        RiskProfile.Growth: Decimal("0.12")
+        RiskProfile.Growth: Decimal("0.12"),
+    }
+    # Annual volatility of returns for Monte Carlo paths
+    _VOLATILITY_MAP: ClassVar[Dict[RiskProfile, Decimal]] = {
+        RiskProfile.Conservative: Decimal("0.05"),
+        RiskProfile.Balanced: Decimal("0.10"),
+        RiskProfile.Growth: Decimal("0.16"),
     }
 
+    @classmethod
+    def annual_rate(cls, risk_profile: RiskProfile) -> Decimal:
+        return cls._CAGR_MAP.get(risk_profile, Decimal("0.09"))
+
+    @classmethod
+    def annual_volatility(cls, risk_profile: RiskProfile) -> Decimal:
+        return cls._VOLATILITY_MAP.get(risk_profile, Decimal("0.10"))
+
+    @classmethod
+    def _curves(
+        cls, requests: Sequence[ProjectionRequest], step_months: int, years: int
+    ):
+        """
+        Curves over `years`, each the memoized unit curve of its profile scaled by the corpus.
+        """
+        # NumPy is only loaded once a projection is requested
+        from app.shared.simulation import engine
+
+        if not requests:
+            return engine.growth_curves([], [], years * 12, step_months)
+        rates = [float(cls.annual_rate(profile)) for _, profile, _ in requests]
+        rows = {rate: row for row, rate in enumerate(dict.fromkeys(rates))}
+        return engine.scale_curves(
+            [float(corpus) for corpus, _, _ in requests],
+            [unit_curves.get(rate, years, step_months) for rate in rows],
+            [rows[rate] for rate in rates],
+        )
+
+    @staticmethod
+    def _chart_points(months: int, step_months: int) -> List[Tuple[int, int, str]]:
+        return [
+            (
+                month,
+                month // 12,
+                f"Year {month // 12}" if month % 12 == 0 else f"Month {month}",
+            )
+            for month in range(0, months + 1, step_months)
+        ]
+
+    @staticmethod
+    def _series(
+        points: List[Tuple[int, int, str]], values: Sequence[Decimal]
+    ) -> List[Dict[str, Any]]:
+        return [
+            {"month": month, "year": year, "value": value, "label": label}
+            for (month, year, label), value in zip(points, values)
+        ]
+
+    @classmethod
+    def project_many(
+        cls, requests: Sequence[ProjectionRequest], step_months: int = 12
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Projections for many gifts in one vectorized NumPy call, sampled every `step_months`
+        months (a divisor of 12). Each projection is a list of chart points.
+        """
+        from app.shared.simulation import engine
+
+        if not requests:
+            return []
+        horizon = max(years for _, _, years in requests)
+        curves = cls._curves(requests, step_months, horizon)
+        # Shorter horizons are prefixes of the longest; only their points are converted
+        lengths = [years * 12 // step_months + 1 for _, _, years in requests]
+        values = engine.to_cents(engine.prefixes(curves, lengths))
+        points = cls._chart_points(horizon * 12, step_months)
+        projections, start = [], 0
+        for length in lengths:
+            projections.append(cls._series(points, values[start : start + length]))
+            start += length
+        return projections
+
+    @classmethod
+    async def get_portfolio_projection(
+        cls,
+        db: AsyncSession,
+        grandparent_id: uuid.UUID,
+        currency: Currency = Currency.USD,
+        years: int = 15,
+        step_months: int = 12,
+    ) -> Dict[str, Any]:
+        """
+        Growth of every gift of a grandparent, loaded in one query and projected in one batch, in
+        `currency`. The total is summed before rounding, so it can differ by a few cents from the
+        sum of the rounded per-gift series.
+        """
+        from app.shared.simulation import engine
+
+        result = await db.execute(
+            select(
+                Gift.id,
+                Gift.grandchild_id,
+                Gift.grandchild_name,
+                Gift.corpus,
+                Gift.currency,
+                Gift.risk_profile,
+            )
+            .where(Gift.grandparent_id == grandparent_id)
+            .order_by(Gift.id)
+        )
+        gifts = result.mappings().all()
+        corpora = [
+            convert_amount(gift["corpus"], gift["currency"], currency.value)
+            for gift in gifts
+        ]
+        curves = cls._curves(
+            [
+                (corpus, RiskProfile(gift["risk_profile"]), years)
+                for corpus, gift in zip(corpora, gifts)
+            ],
+            step_months,
+            years,
+        )
+        points = cls._chart_points(years * 12, step_months)
+        width = len(points)
+        values = engine.to_cents(curves)
+        return {
+            "grandparent_id": grandparent_id,
+            "currency": currency,
+            "gifts": [
+                {
+                    "gift_id": gift["id"],
+                    "grandchild_id": gift["grandchild_id"],
+                    "grandchild_name": gift["grandchild_name"],
+                    "risk_profile": gift["risk_profile"],
+                    "corpus": values[index * width],
+                    "series": cls._series(
+                        points, values[index * width : (index + 1) * width]
+                    ),
+                }
+                for index, gift in enumerate(gifts)
+            ],
+            "total": cls._series(points, engine.to_cents(curves.sum(axis=0))),
+        }
+
     @classmethod
     async def get_growth_projection(
-        cls, 
-        initial_corpus: Decimal, 
-        risk_profile: RiskProfile, 
-        years: int = 10
+        cls,
+        initial_corpus: Decimal,
+        risk_profile: RiskProfile,
+        years: int = 10,
+        step_months: int = 12,
     ) -> List[Dict[str, any]]:
         """
-        Generates a growth projection for the next N years.
-        Returns a list of monthly data points for chart integration.
-        """
-        cagr = cls._CAGR_MAP.get(risk_profile, Decimal("0.09"))
-        monthly_rate = (1 + cagr) ** (Decimal("1") / Decimal("12")) - 1
-        
-        projection = []
-        current_value = initial_corpus
-        
-        # We'll return 12 data points (end of each year) or more? 
-        # For a 10 year chart, let's return yearly points.
-        for year in range(years + 1):
-            projection.append({
-                "year": year,
-                "value": round(current_value, 2),
-                "label": f"Year {year}"
-            })
-            current_value = current_value * (1 + cagr)
-            
-        return projection
+        Generates a growth projection for the next N years, one chart point every `step_months`
+        months (yearly by default, monthly with 1).
+        """
+        return cls.project_many([(initial_corpus, risk_profile, years)], step_months)[0]
+
+    @classmethod
+    async def get_monte_carlo_bands(
+        cls,
+        initial_corpus: Decimal,
+        risk_profile: RiskProfile,
+        years: int = 15,
+        paths: int = 10_000,
+        seed: int = 0,
+    ) -> List[Dict[str, Any]]:
+        """
+        P10 / P50 / P90 of `paths` random monthly return paths for the risk profile, one point per
+        month. The same seed and path count always give the same bands.
+        """
+        from app.shared.simulation import engine
+
+        months = years * 12
+        bands = await monte_carlo_runner.run(
+            float(cls.annual_rate(risk_profile)),
+            float(cls.annual_volatility(risk_profile)),
+            months,
+            paths,
+            seed,
+        )
+        p10, p50, p90 = (
+            engine.to_cents(row)
+            for row in engine.band_values(float(initial_corpus), bands)
+        )
+        return [
+            {
+                "month": month,
+                "year": month // 12,
+                "p10": p10[month],
+                "p50": p50[month],
+                "p90": p90[month],
+                "label": f"Year {month // 12}" if month % 12 == 0 else f"Month {month}",
+            }
+            for month in range(months + 1)
+        ]
+
+    @staticmethod
+    async def get_history(
+        risk_profile: RiskProfile,
+        start: Optional[datetime.date] = None,
+        end: Optional[datetime.date] = None,
+        points: int = 500,
+    ) -> List[Dict[str, Any]]:
+        """
+        Historical fund values for the risk profile from `start` to `end` (inclusive), downsampled
+        with LTTB to at most `points` points so the chart keeps its shape whatever the range.
+        """
+        from app.shared.simulation import engine
+
+        if start and end and start > end:
+            raise ValueError("start must not be after end")
+        series = history_store.between(risk_profile, start, end)
+        dates = series["date"]
+        values = series["value"]
+        keep = engine.lttb(dates.astype("int64"), values, points)
+        return [
+            {"date": date, "value": value}
+            for date, value in zip(dates[keep].tolist(), engine.to_cents(values[keep]))
+        ]
 
     @classmethod
     def calculate_cagr(cls, initial: Decimal, final: Decimal, years: float) -> Decimal:
         if years == 0:
-            return Decimal("0")
-        return (final / initial) ** (Decimal("1") / Decimal(str(years))) - 1
+            return Decimal(0)
+        return (final / initial) ** (Decimal(1) / Decimal(str(years))) - 1
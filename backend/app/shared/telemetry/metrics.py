@@ -0,0 +1,255 @@
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+# Request latency buckets in seconds (Prometheus client defaults)
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.075,
+    0.1,
+    0.25,
+    0.5,
+    0.75,
+    1.0,
+    2.5,
+    5.0,
+    7.5,
+    10.0,
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self.values: Dict[Tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        return [
+            f"{self.name}{_labels(self.labelnames, key)} {_number(value)}"
+            for key, value in self.values.items()
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels, value: float):
+        self.values[labels] = value
+
+
+class CallbackMetric(Metric):
+    """
+    Gauge or counter whose samples are read at scrape time from state kept elsewhere
+    (e.g. the pool).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str],
+        collect: Callable[[], Iterable[Tuple[Tuple, float]]],
+        kind: str = "gauge",
+    ):
+        super().__init__(name, help, labelnames)
+        self.collect = collect
+        self.kind = kind
+
+    def render(self) -> List[str]:
+        return [
+            f"{self.name}{_labels(self.labelnames, key)} {_number(value)}"
+            for key, value in self.collect()
+        ]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [per-bucket counts (last one is +Inf)], sum
+        self.series: Dict[Tuple, list] = {}
+
+    def observe(self, *labels, value: float):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def render(self) -> List[str]:
+        lines = []
+        for key, (counts, total) in self.series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="' + _number(bound) + '"'
+                lines.append(
+                    f"{self.name}_bucket{_labels(self.labelnames, key, le)} "
+                    f"{cumulative}"
+                )
+            lines.append(
+                f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}"
+            )
+            lines.append(
+                f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}"
+            )
+        return lines
+
+    @contextmanager
+    def time(self, *labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(*labels, value=time.perf_counter() - started)
+
+
+class Registry:
+    """
+    Metrics of this worker, rendered in the Prometheus text exposition format. Updates
+    are plain dict operations on the event loop thread, cheap enough to stay on in
+    production.
+    """
+
+    def __init__(self):
+        self.metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.header())
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+HTTP_REQUEST_DURATION = registry.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "HTTP request latency by route template.",
+        ("method", "route"),
+    )
+)
+HTTP_REQUESTS = registry.register(
+    Counter(
+        "http_requests_total",
+        "HTTP responses by route template and status code.",
+        ("method", "route", "status"),
+    )
+)
+HTTP_IN_FLIGHT = registry.register(
+    Gauge("http_requests_in_flight", "HTTP requests currently being served.")
+)
+DB_STATEMENTS = registry.register(
+    Counter(
+        "db_statements_total", "SQL statements executed, by route template.", ("route",)
+    )
+)
+DB_TIME = registry.register(
+    Counter(
+        "db_time_seconds_total",
+        "Time spent executing SQL statements, by route template.",
+        ("route",),
+    )
+)
+DB_POOL_WAIT = registry.register(
+    Histogram(
+        "db_pool_wait_seconds",
+        "Time to check a connection out of the pool, including opening new ones.",
+        ("pool",),
+    )
+)
+DB_POOL_CONNECT = registry.register(
+    Histogram(
+        "db_pool_connect_seconds", "Time to open a new database connection.", ("pool",)
+    )
+)
+OPENAI_REQUEST_DURATION = registry.register(
+    Histogram(
+        "openai_request_duration_seconds",
+        "OpenAI API call latency by operation.",
+        ("operation",),
+        buckets=(0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0),
+    )
+)
+OPENAI_ERRORS = registry.register(
+    Counter(
+        "openai_errors_total",
+        "Failed OpenAI API calls by operation and exception type.",
+        ("operation", "error"),
+    )
+)
+
+
+@contextmanager
+def track_openai(operation: str):
+    """
+    Times one OpenAI call and counts it as an error if it raises.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        OPENAI_ERRORS.inc(operation, type(e).__name__)
+        raise
+    finally:
+        OPENAI_REQUEST_DURATION.observe(operation, value=time.perf_counter() - started)
@@ -0,0 +1,104 @@
+import logging
+import time
+
+from app.shared.telemetry.metrics import (
+    DB_STATEMENTS,
+    DB_TIME,
+    HTTP_IN_FLIGHT,
+    HTTP_REQUEST_DURATION,
+    HTTP_REQUESTS,
+)
+from app.shared.telemetry.sql import STATEMENT_PREVIEW_CHARS, sql_metrics, start_request
+
+logger = logging.getLogger(__name__)
+
+# Label for requests no route matched, so unknown paths cannot inflate label cardinality
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def route_template(scope) -> str:
+    """
+    Path template of the matched route (e.g. /gifts/{gift_id}).
+    """
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """
+    Records in-flight requests, latency per route template and response status counts.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            route = route_template(scope)
+            HTTP_REQUEST_DURATION.observe(
+                scope["method"], route, value=time.perf_counter() - started
+            )
+            HTTP_REQUESTS.inc(scope["method"], route, str(status["code"]))
+
+
+class SQLInstrumentationMiddleware:
+    """
+    Counts the statements each HTTP request runs, adds a Server-Timing header with the
+    statement count, total DB time and slowest statement, aggregates them per route and
+    warns when a statement shape repeats more than `repeat_threshold` times (an N+1
+    pattern).
+
+    The header reflects statements run before the response starts; metrics cover the
+    whole request, including streamed bodies.
+    """
+
+    def __init__(self, app, repeat_threshold: int = 5):
+        self.app = app
+        self.repeat_threshold = repeat_threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = start_request()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start" and stats.statements:
+                message.setdefault("headers", []).append(
+                    (b"server-timing", stats.server_timing().encode())
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            route = route_template(scope)
+            sql_metrics.observe(route, stats)
+            DB_STATEMENTS.inc(route, amount=stats.statements)
+            DB_TIME.inc(route, amount=stats.db_time_ms / 1000)
+            for shape, count in stats.repeated(self.repeat_threshold).items():
+                sql_metrics.routes[route]["repeat_warnings"] += 1
+                logger.warning(
+                    "Possible N+1 on %s %s: statement ran %d times: %s",
+                    scope["method"],
+                    route,
+                    count,
+                    shape[:STATEMENT_PREVIEW_CHARS],
+                )
@@ -0,0 +1,101 @@
+import time
+from collections import deque
+from typing import Deque, Dict, Type
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.shared.telemetry.metrics import DB_POOL_CONNECT, DB_POOL_WAIT
+
+# Recent samples kept per series for the percentile figures
+SAMPLE_WINDOW = 1024
+
+
+def _summary(samples: Deque[float]) -> Dict[str, float]:
+    if not samples:
+        return {"count": 0, "mean_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "mean_ms": round(sum(ordered) / len(ordered), 3),
+        "p50_ms": round(ordered[len(ordered) // 2], 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        "max_ms": round(ordered[-1], 3),
+    }
+
+
+class PoolMetrics:
+    """
+    Connection pool telemetry for one engine: live pool occupancy plus counters and
+    recent samples of checkout wait time (including any new connection being opened) and
+    connect latency.
+    """
+
+    def __init__(self, name: str = "primary"):
+        self.name = name
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.wait_ms: Deque[float] = deque(maxlen=SAMPLE_WINDOW)
+        self.connect_ms: Deque[float] = deque(maxlen=SAMPLE_WINDOW)
+
+    def pool_class(self) -> Type[AsyncAdaptedQueuePool]:
+        """
+        Pool class reporting into these metrics. The metrics live on the class so pools
+        recreated by engine.dispose() keep reporting.
+        """
+        return type("InstrumentedPool", (InstrumentedPool,), {"metrics": self})
+
+    def attach(self, engine: AsyncEngine):
+        """
+        Times each new DBAPI connection: do_connect fires before connecting, connect
+        after, both with the same connection record.
+        """
+
+        @event.listens_for(engine.sync_engine, "do_connect")
+        def _connect_started(dialect, conn_rec, cargs, cparams):
+            conn_rec.info["connect_started"] = time.perf_counter()
+
+        @event.listens_for(engine.sync_engine, "connect")
+        def _connected(dbapi_connection, connection_record):
+            started = connection_record.info.pop("connect_started", None)
+            if started is not None:
+                elapsed = time.perf_counter() - started
+                self.connects += 1
+                self.connect_ms.append(elapsed * 1000)
+                DB_POOL_CONNECT.observe(self.name, value=elapsed)
+
+    def stats(self, engine: AsyncEngine) -> dict:
+        pool = engine.pool
+        return {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow,
+            "timeout_seconds": pool.timeout(),
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "connects": self.connects,
+            "wait": _summary(self.wait_ms),
+            "connect": _summary(self.connect_ms),
+        }
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        elapsed = time.perf_counter() - started
+        self.metrics.checkouts += 1
+        self.metrics.wait_ms.append(elapsed * 1000)
+        DB_POOL_WAIT.observe(self.metrics.name, value=elapsed)
+        return record
@@ -0,0 +1,189 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import database
+from app.shared.notifications.outbox import OutboxService, outbox_dispatcher
+from app.shared.notifications.retention import (
+    NotificationRetention,
+    notification_retention,
+)
+from app.shared.notifications.stream import notification_hub, notification_listener
+from app.shared.simulation.curves import unit_curves
+from app.shared.simulation.history import history_store
+from app.shared.simulation.montecarlo import monte_carlo_runner
+from app.shared.telemetry.metrics import CONTENT_TYPE, CallbackMetric, registry
+from app.shared.telemetry.sql import sql_metrics
+
+router = APIRouter(prefix="/internal", tags=["Internal"])
+# Served at the conventional scrape path, outside /internal
+metrics_router = APIRouter(tags=["Internal"])
+
+
+def _pools():
+    # Read through the module: engines are built on first use and rebuilt by create_app
+    yield "primary", database.get_engine(), database.pool_metrics
+    if database.replica_engine is not None:
+        yield "replica", database.replica_engine, database.replica_pool_metrics
+
+
+POOL_SERIES = (
+    ("db_pool_size", "Configured pool size.", "gauge", lambda e, m: e.pool.size()),
+    (
+        "db_pool_checked_out",
+        "Connections currently checked out.",
+        "gauge",
+        lambda e, m: e.pool.checkedout(),
+    ),
+    (
+        "db_pool_checked_in",
+        "Idle connections in the pool.",
+        "gauge",
+        lambda e, m: e.pool.checkedin(),
+    ),
+    (
+        "db_pool_overflow",
+        "Connections open beyond the pool size.",
+        "gauge",
+        lambda e, m: max(e.pool.overflow(), 0),
+    ),
+    (
+        "db_pool_checkouts_total",
+        "Connection checkouts.",
+        "counter",
+        lambda e, m: m.checkouts,
+    ),
+    (
+        "db_pool_timeouts_total",
+        "Checkouts that timed out waiting for a connection.",
+        "counter",
+        lambda e, m: m.timeouts,
+    ),
+    (
+        "db_pool_connects_total",
+        "New database connections opened.",
+        "counter",
+        lambda e, m: m.connects,
+    ),
+)
+
+for name, help, kind, read in POOL_SERIES:
+    registry.register(
+        CallbackMetric(
+            name,
+            help,
+            ("pool",),
+            lambda read=read: [((label,), read(e, m)) for label, e, m in _pools()],
+            kind,
+        )
+    )
+
+registry.register(
+    CallbackMetric(
+        "notification_outbox_dispatched_total",
+        "Notifications delivered from the outbox by this worker.",
+        (),
+        lambda: [((), outbox_dispatcher.dispatched)],
+        "counter",
+    )
+)
+registry.register(
+    CallbackMetric(
+        "notification_outbox_failures_total",
+        "Outbox rows that failed delivery and were rescheduled.",
+        (),
+        lambda: [((), outbox_dispatcher.failures)],
+        "counter",
+    )
+)
+registry.register(
+    CallbackMetric(
+        "notification_streams",
+        "Open notification streams on this worker.",
+        (),
+        lambda: [((), notification_hub.stats()["streams"])],
+        "gauge",
+    )
+)
+
+
+@metrics_router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Prometheus scrape endpoint for this worker.
+    """
+    return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
+
+
+@router.get("/pool")
+async def get_pool_stats():
+    """
+    Connection pool occupancy, checkout wait and connect latency for this worker.
+    """
+    return database.pool_metrics.stats(database.get_engine())
+
+
+@router.get("/replica")
+async def get_replica_stats():
+    """
+    Replica health as last measured, plus its pool when one is configured.
+    """
+    database.get_engine()
+    stats = database.replica_monitor.stats()
+    if database.replica_engine is not None:
+        stats["pool"] = database.replica_pool_metrics.stats(database.replica_engine)
+    return stats
+
+
+@router.get("/outbox")
+async def get_outbox_stats(db: AsyncSession = Depends(database.get_db)):
+    """
+    Notification outbox backlog (pending, parked after max attempts) and this worker's
+    dispatcher.
+    """
+    return {
+        **await OutboxService.get_stats(db, outbox_dispatcher.max_attempts),
+        "dispatcher": outbox_dispatcher.stats(),
+    }
+
+
+@router.get("/streams")
+async def get_stream_stats():
+    """
+    Open notification streams on this worker and the state of its LISTEN connection.
+    """
+    return {**notification_hub.stats(), "listener": notification_listener.stats()}
+
+
+@router.get("/retention")
+async def get_retention_stats(db: AsyncSession = Depends(database.get_db)):
+    """
+    Monthly notification partitions currently attached and this worker's maintenance
+    task.
+    """
+    months = await NotificationRetention.list_partitions(db)
+    return {
+        "partitions": [f"{month:%Y-%m}" for month in sorted(months)],
+        **notification_retention.stats(),
+    }
+
+
+@router.get("/simulation")
+async def get_simulation_stats():
+    """
+    Memoized projection curves, Monte Carlo runs and mapped fund histories on this
+    worker.
+    """
+    return {
+        "unit_curves": unit_curves.stats(),
+        "montecarlo": monte_carlo_runner.stats(),
+        "history": history_store.stats(),
+    }
+
+
+@router.get("/sql")
+async def get_sql_stats():
+    """
+    Statement counts and DB time per route template, with the slowest statement seen.
+    """
+    return sql_metrics.stats()
@@ -0,0 +1,153 @@
+import logging
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+# Statements longer than this are truncated in metrics and warnings
+STATEMENT_PREVIEW_CHARS = 200
+
+_BIND_LISTS = re.compile(r"\$\d+(?:\s*,\s*\$\d+)*")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """
+    Normalizes a statement so repeats compare equal: whitespace collapsed and positional
+    bind lists (expanded IN (...) or multi-row VALUES) reduced to a single placeholder.
+    """
+    return _BIND_LISTS.sub("$?", _WHITESPACE.sub(" ", statement).strip())
+
+
+class RequestSQLStats:
+    """
+    Statements executed on behalf of one request.
+    """
+
+    def __init__(self):
+        self.statements = 0
+        self.db_time_ms = 0.0
+        self.slowest_ms = 0.0
+        self.slowest_statement: Optional[str] = None
+        self.shapes: Counter = Counter()
+
+    def record(self, statement: str, elapsed_ms: float):
+        self.statements += 1
+        self.db_time_ms += elapsed_ms
+        if elapsed_ms >= self.slowest_ms:
+            self.slowest_ms = elapsed_ms
+            self.slowest_statement = statement
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated(self, threshold: int) -> Dict[str, int]:
+        return {
+            shape: count for shape, count in self.shapes.items() if count > threshold
+        }
+
+    def server_timing(self) -> str:
+        noun = "statement" if self.statements == 1 else "statements"
+        return (
+            f'db;dur={self.db_time_ms:.3f};desc="{self.statements} {noun}", '
+            f"db-slowest;dur={self.slowest_ms:.3f}"
+        )
+
+
+_current: ContextVar[Optional[RequestSQLStats]] = ContextVar(
+    "request_sql_stats", default=None
+)
+
+
+def current_stats() -> Optional[RequestSQLStats]:
+    return _current.get()
+
+
+def start_request() -> RequestSQLStats:
+    stats = RequestSQLStats()
+    _current.set(stats)
+    return stats
+
+
+def instrument_engine(engine: AsyncEngine):
+    """
+    Times every cursor execution and charges it to the request in the current context,
+    if any. The async engine runs these sync events in the calling task's context.
+    """
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if _current.get() is not None:
+            conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        _finish(conn, statement)
+
+    @event.listens_for(engine.sync_engine, "handle_error")
+    def _failed(exception_context):
+        # A failing statement never reaches after_cursor_execute; its time still counts
+        if (
+            exception_context.connection is not None
+            and exception_context.statement is not None
+        ):
+            _finish(exception_context.connection, exception_context.statement)
+
+
+def _finish(conn, statement: str):
+    started = conn.info.get("query_started")
+    if started:
+        elapsed_ms = (time.perf_counter() - started.pop()) * 1000
+        stats = _current.get()
+        if stats is not None:
+            stats.record(statement, elapsed_ms)
+
+
+class RouteSQLMetrics:
+    """
+    Per-route aggregates of the request stats, keyed by route template.
+    """
+
+    def __init__(self):
+        self.routes: Dict[str, Dict[str, Any]] = {}
+
+    def observe(self, route: str, stats: RequestSQLStats):
+        entry = self.routes.setdefault(
+            route,
+            {
+                "requests": 0,
+                "statements": 0,
+                "db_time_ms": 0.0,
+                "max_statements": 0,
+                "slowest_ms": 0.0,
+                "slowest_statement": None,
+                "repeat_warnings": 0,
+            },
+        )
+        entry["requests"] += 1
+        entry["statements"] += stats.statements
+        entry["db_time_ms"] += stats.db_time_ms
+        entry["max_statements"] = max(entry["max_statements"], stats.statements)
+        if stats.slowest_ms > entry["slowest_ms"]:
+            entry["slowest_ms"] = stats.slowest_ms
+            entry["slowest_statement"] = (stats.slowest_statement or "")[
+                :STATEMENT_PREVIEW_CHARS
+            ]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            route: {
+                **entry,
+                "db_time_ms": round(entry["db_time_ms"], 3),
+                "slowest_ms": round(entry["slowest_ms"], 3),
+                "avg_statements": round(entry["statements"] / entry["requests"], 2),
+            }
+            for route, entry in sorted(self.routes.items())
+        }
+
+
+sql_metrics = RouteSQLMetrics()
@@ -3,8 +3,22 @@ from decimal import Decimal
 # Fixed FX rate as per T024
 FX_USD_TO_INR = Decimal("83.5")
 
+
 def convert_usd_to_inr(usd_amount: Decimal) -> Decimal:
     return usd_amount * FX_USD_TO_INR
 
+
 def convert_inr_to_usd(inr_amount: Decimal) -> Decimal:
     return inr_amount / FX_USD_TO_INR
+
+
+def convert_amount(amount: Decimal, from_currency: str, to_currency: str) -> Decimal:
+    if from_currency == to_currency:
+        return amount
+    if from_currency == "USD" and to_currency == "INR":
+        return convert_usd_to_inr(amount)
+    if from_currency == "INR" and to_currency == "USD":
+        return convert_inr_to_usd(amount)
+    raise ValueError(
+        f"Unsupported currency conversion {from_currency} -> {to_currency}"
+    )
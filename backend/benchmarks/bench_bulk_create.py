@@ -0,0 +1,59 @@
+r"""
+Benchmark for POST /gifts/bulk: per-gift cost as the batch grows, vs one create_gift
+call per gift.
+
+Usage (from backend/, against a disposable database):
+    DATABASE_URL=postgresql+asyncpg://... \
+        python -m benchmarks.bench_bulk_create --runs 20
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+from app.database import AsyncSessionLocal
+from app.shared.gifts.service import GiftService
+from benchmarks.bench_create_gift import make_payload
+from benchmarks.common import RoundTripCounter
+
+BATCH_SIZES = (1, 10, 50, 200, 500)
+
+
+async def per_gift_ms(
+    batch_size: int, runs: int, counter: RoundTripCounter, bulk: bool
+):
+    samples, trips = [], []
+    for _ in range(runs):
+        grandparent_id = str(uuid.uuid4())
+        payloads = [make_payload() for _ in range(batch_size)]
+        async with AsyncSessionLocal() as db:
+            counter.reset()
+            started = time.perf_counter()
+            if bulk:
+                await GiftService.create_gifts_bulk(db, grandparent_id, payloads)
+            else:
+                for payload in payloads:
+                    await GiftService.create_gift(db, grandparent_id, payload)
+            samples.append((time.perf_counter() - started) * 1000 / batch_size)
+            trips.append(counter.reset() / batch_size)
+    return statistics.median(samples), statistics.mean(trips)
+
+
+async def main(runs: int):
+    counter = RoundTripCounter()
+    for batch_size in BATCH_SIZES:
+        loop_ms, loop_trips = await per_gift_ms(batch_size, runs, counter, bulk=False)
+        bulk_ms, bulk_trips = await per_gift_ms(batch_size, runs, counter, bulk=True)
+        print(
+            f"batch={batch_size:<4} per-gift: "
+            f"loop {loop_ms:.3f}ms ({loop_trips:.2f} trips)  "
+            f"bulk {bulk_ms:.3f}ms ({bulk_trips:.2f} trips)"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=20)
+    asyncio.run(main(parser.parse_args().runs))
@@ -0,0 +1,143 @@
+r"""
+Benchmark for POST /gifts/ creation: legacy per-row/commit path vs the single-statement
+path.
+
+Usage (from backend/, against a disposable database):
+    DATABASE_URL=postgresql+asyncpg://... \
+        python -m benchmarks.bench_create_gift --runs 200
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+from decimal import Decimal
+
+from sqlalchemy.future import select
+from sqlalchemy.orm import selectinload
+
+from app.database import AsyncSessionLocal
+from app.shared.gifts.models import Gift, Milestone, User
+from app.shared.gifts.schemas import (
+    GiftCreate,
+    GiftStatus,
+    MilestoneCreate,
+    MilestoneStatus,
+    UserRole,
+)
+from app.shared.gifts.service import TRUSTEE_ID, GiftService
+from app.shared.notifications.service import NotificationService
+from benchmarks.common import RoundTripCounter, summarize
+
+
+async def legacy_create_gift(db, grandparent_id: str, gift_data: GiftCreate) -> Gift:
+    """
+    Reproduction of the previous GiftService.create_gift: 3 lookups, 2 commits,
+    re-fetch, 2 notification commits.
+    """
+    gp_id = uuid.UUID(grandparent_id)
+    if not (
+        await db.execute(select(User).where(User.id == gp_id))
+    ).scalar_one_or_none():
+        db.add(User(id=gp_id, name="Grandparent", role="grandparent"))
+    if not (
+        await db.execute(select(User).where(User.id == gift_data.grandchild_id))
+    ).scalar_one_or_none():
+        db.add(
+            User(
+                id=gift_data.grandchild_id,
+                name=gift_data.grandchild_name or "Grandchild",
+                role="grandchild",
+            )
+        )
+    if not (
+        await db.execute(select(User).where(User.id == TRUSTEE_ID))
+    ).scalar_one_or_none():
+        db.add(User(id=TRUSTEE_ID, name="Trustee", role="trustee"))
+    await db.commit()
+
+    new_gift = Gift(
+        id=uuid.uuid4(),
+        grandparent_id=gp_id,
+        grandchild_id=gift_data.grandchild_id,
+        grandchild_name=gift_data.grandchild_name,
+        corpus=gift_data.corpus,
+        currency=gift_data.currency,
+        message=gift_data.message,
+        status=GiftStatus.Active,
+        risk_profile=gift_data.risk_profile,
+        rule_type=gift_data.rule_type,
+        fallback_ngo_id=gift_data.fallback_ngo_id,
+    )
+    db.add(new_gift)
+    for m in gift_data.milestones:
+        db.add(
+            Milestone(
+                id=uuid.uuid4(),
+                gift_id=new_gift.id,
+                type=m.type,
+                percentage=m.percentage,
+                status=MilestoneStatus.Pending,
+            )
+        )
+    await db.commit()
+
+    result = await db.execute(
+        select(Gift)
+        .where(Gift.id == new_gift.id)
+        .options(selectinload(Gift.milestones), selectinload(Gift.media_messages))
+    )
+    loaded = result.scalar_one()
+    await NotificationService.create_notification(
+        db,
+        str(gp_id),
+        UserRole.grandparent,
+        "gift_created",
+        "Your gift has been created.",
+    )
+    await NotificationService.create_notification(
+        db,
+        str(gift_data.grandchild_id),
+        UserRole.grandchild,
+        "gift_received",
+        "You have received a new gift!",
+    )
+    return loaded
+
+
+def make_payload() -> GiftCreate:
+    return GiftCreate(
+        grandchild_id=uuid.uuid4(),
+        grandchild_name="Bench Grandchild",
+        corpus=Decimal(10000),
+        milestones=[
+            MilestoneCreate(type="Graduation", percentage=50),
+            MilestoneCreate(type="First Job", percentage=50),
+        ],
+    )
+
+
+async def run(label: str, create, runs: int, counter: RoundTripCounter) -> str:
+    grandparent_id = str(uuid.uuid4())
+    samples, trips = [], []
+    for _ in range(runs):
+        payload = make_payload()
+        async with AsyncSessionLocal() as db:
+            counter.reset()
+            started = time.perf_counter()
+            await create(db, grandparent_id, payload)
+            samples.append((time.perf_counter() - started) * 1000)
+            trips.append(counter.reset())
+    return summarize(label, samples, trips)
+
+
+async def main(runs: int):
+    counter = RoundTripCounter()
+    print(await run("before", legacy_create_gift, runs, counter))
+    print(await run("after", GiftService.create_gift, runs, counter))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=200)
+    asyncio.run(main(parser.parse_args().runs))
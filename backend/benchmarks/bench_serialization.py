@@ -0,0 +1,120 @@
+"""
+Benchmark for dashboard serialization: ORM objects validated through List[GiftSchema]
+and encoded by the stdlib (the previous path) vs Core row dicts assembled by GiftService
+and encoded by app.shared.responses.dumps. No database is needed; rows are synthesized
+in memory.
+
+Usage (from backend/):
+    python -m benchmarks.bench_serialization --runs 20
+"""
+
+import argparse
+import datetime
+import json
+import statistics
+import time
+import uuid
+from decimal import Decimal
+from typing import List
+
+from pydantic import TypeAdapter
+
+from app.shared.gifts.models import Gift, MediaMessage, Milestone
+from app.shared.gifts.schemas import GiftSchema
+from app.shared.gifts.service import GiftService
+from app.shared.responses import dumps
+
+GIFT_COUNTS = (10, 1_000, 10_000)
+
+
+def make_rows(count: int):
+    gifts, milestones, media = [], [], []
+    grandparent_id = uuid.uuid4()
+    created_at = datetime.datetime(2026, 1, 1, 12, 30, 15, 123456)
+    for _ in range(count):
+        gift_id = uuid.uuid4()
+        gifts.append(
+            {
+                "id": gift_id,
+                "grandparent_id": grandparent_id,
+                "grandchild_id": uuid.uuid4(),
+                "grandchild_name": "Aarav",
+                "message": "For your first big step",
+                "corpus": Decimal("25000.00"),
+                "currency": "USD",
+                "status": "Active",
+                "risk_profile": "Balanced",
+                "rule_type": "Milestone",
+                "fallback_ngo_id": None,
+                "created_at": created_at,
+            }
+        )
+        for kind, share in (("Graduation", 60), ("First Job", 40)):
+            milestones.append(
+                {
+                    "id": uuid.uuid4(),
+                    "gift_id": gift_id,
+                    "type": kind,
+                    "percentage": share,
+                    "status": "Pending",
+                }
+            )
+        for kind in ("text", "photo"):
+            media.append(
+                {
+                    "id": uuid.uuid4(),
+                    "gift_id": gift_id,
+                    "uploader_id": grandparent_id,
+                    "type": kind,
+                    "file_path": f"static/media/{uuid.uuid4()}.bin",
+                    "created_at": created_at,
+                }
+            )
+    return gifts, milestones, media
+
+
+def make_orm_objects(gift_rows, milestone_rows, media_rows):
+    gifts = {
+        row["id"]: Gift(**row, milestones=[], media_messages=[]) for row in gift_rows
+    }
+    for row in milestone_rows:
+        gifts[row["gift_id"]].milestones.append(Milestone(**row))
+    for row in media_rows:
+        gifts[row["gift_id"]].media_messages.append(MediaMessage(**row))
+    return list(gifts.values())
+
+
+def measure(fn, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main(runs: int):
+    adapter = TypeAdapter(List[GiftSchema])
+    for count in GIFT_COUNTS:
+        rows = make_rows(count)
+        orm_gifts = make_orm_objects(*rows)
+
+        def schema_path(orm_gifts=orm_gifts):
+            validated = adapter.validate_python(orm_gifts, from_attributes=True)
+            return json.dumps(adapter.dump_python(validated, mode="json")).encode()
+
+        def row_path(rows=rows):
+            return dumps(GiftService._assemble_gifts(*rows))
+
+        assert json.loads(schema_path()) == json.loads(row_path())
+        before, after = measure(schema_path, runs), measure(row_path, runs)
+        print(
+            f"{count:>6} gifts  schema+json {before:9.2f} ms   "
+            f"rows+dumps {after:9.2f} ms   {before / after:5.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=20)
+    main(parser.parse_args().runs)
@@ -0,0 +1,63 @@
+"""
+Benchmark for cold start: runs `python -X importtime -c "import app.main"` in fresh
+interpreters and reports the median cumulative import time of app.main plus the slowest
+modules. The same measurement backs the import-time budget in tests/startup.
+
+Usage (from backend/):
+    python -m benchmarks.bench_startup --runs 7
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_times(module: str = "app.main") -> Tuple[Dict[str, int], set]:
+    """
+    Imports `module` in a new interpreter. Returns the cumulative import time in
+    microseconds of every module it pulled in, and the set of modules loaded once the
+    import finished.
+    """
+    code = f"import sys, {module}; print(','.join(sorted(sys.modules)))"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        times[name.strip()] = int(cumulative)
+    return times, set(result.stdout.strip().split(","))
+
+
+def main(runs: int, top: int):
+    samples, last = [], {}
+    for _ in range(runs):
+        last, _ = import_times()
+        samples.append(last["app.main"] / 1000)
+    print(
+        f"import app.main  runs={runs}  median={statistics.median(samples):.0f}ms  "
+        f"min={min(samples):.0f}ms"
+    )
+    for name, cumulative in sorted(last.items(), key=lambda item: -item[1])[
+        1 : top + 1
+    ]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+    main(args.runs, args.top)
@@ -0,0 +1,36 @@
+import statistics
+
+from sqlalchemy import event
+
+from app.database import get_engine
+
+
+class RoundTripCounter:
+    """
+    Counts database round trips issued through the shared engine:
+    every executed statement plus each BEGIN / COMMIT / ROLLBACK.
+    """
+
+    def __init__(self):
+        self.count = 0
+        sync_engine = get_engine().sync_engine
+        event.listen(sync_engine, "before_cursor_execute", self._bump)
+        event.listen(sync_engine, "begin", self._bump)
+        event.listen(sync_engine, "commit", self._bump)
+        event.listen(sync_engine, "rollback", self._bump)
+
+    def _bump(self, *args, **kwargs):
+        self.count += 1
+
+    def reset(self) -> int:
+        count, self.count = self.count, 0
+        return count
+
+
+def summarize(label: str, samples_ms: list, round_trips: list) -> str:
+    cuts = statistics.quantiles(samples_ms, n=100)
+    return (
+        f"{label:<12} runs={len(samples_ms):<5} "
+        f"round_trips/op={statistics.mean(round_trips):.1f}  "
+        f"p50={cuts[49]:.2f}ms  p99={cuts[98]:.2f}ms"
+    )
@@ -1,14 +1,25 @@
 import asyncio
+
+from sqlalchemy import select
+
 from app.database import AsyncSessionLocal
+from app.modules.export.service import EXPORT_BATCH_SIZE
 from app.shared.gifts.models import Gift
-from sqlalchemy import select
+
 
 async def main():
     async with AsyncSessionLocal() as session:
-        result = await session.execute(select(Gift))
-        gifts = result.scalars().all()
-        for g in gifts:
-            print(f"ID: {g.id}, GC_ID: {g.grandchild_id}, GC_Name: {g.grandchild_name}, Status: {g.status}")
+        # Server-side cursor: rows are fetched in batches instead of loading every gift at once
+        result = await session.stream(
+            select(
+                Gift.id, Gift.grandchild_id, Gift.grandchild_name, Gift.status
+            ).execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        async for g in result:
+            print(
+                f"ID: {g.id}, GC_ID: {g.grandchild_id}, GC_Name: {g.grandchild_name}, Status: {g.status}"
+            )
+
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,61 @@
+r"""
+Streams gifts (with milestones) or notifications to a file or stdout as NDJSON or CSV.
+
+    python export_gifts.py gifts --format csv --status Active \
+        --from 2026-01-01 -o gifts.csv
+    python export_gifts.py notifications --recipient <uuid>
+"""
+
+import argparse
+import asyncio
+import contextlib
+import datetime
+import sys
+import uuid
+
+from app.database import AsyncSessionLocal
+from app.modules.export.service import ExportService
+from app.shared.gifts.schemas import GiftStatus
+
+
+async def main(args, out):
+    dates = {"created_from": args.created_from, "created_to": args.created_to}
+    async with AsyncSessionLocal() as session:
+        if args.table == "gifts":
+            body = ExportService.export_gifts(
+                session,
+                args.format,
+                status=args.status,
+                grandparent_id=args.grandparent,
+                **dates
+            )
+        else:
+            body = ExportService.export_notifications(
+                session, args.format, recipient_id=args.recipient, **dates
+            )
+        async for chunk in body:
+            out.write(chunk)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("table", choices=["gifts", "notifications"])
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    parser.add_argument("--status", type=GiftStatus, help="gifts only")
+    parser.add_argument("--grandparent", type=uuid.UUID, help="gifts only")
+    parser.add_argument("--recipient", type=uuid.UUID, help="notifications only")
+    parser.add_argument(
+        "--from", dest="created_from", type=datetime.datetime.fromisoformat
+    )
+    parser.add_argument("--to", dest="created_to", type=datetime.datetime.fromisoformat)
+    parser.add_argument("-o", "--output", help="defaults to stdout")
+    args = parser.parse_args()
+    # stdout is left open for the interpreter
+    with (
+        open(args.output, "wb")
+        if args.output
+        else contextlib.nullcontext(sys.stdout.buffer)
+    ) as out:
+        asyncio.run(main(args, out))
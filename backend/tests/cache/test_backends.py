@@ -0,0 +1,150 @@
+import asyncio
+import time
+
+import pytest
+
+from app.shared.cache.backends import InMemoryBackend, RedisBackend
+
+
+class RespStandIn:
+    """
+    Minimal in-process server for the subset of the Redis protocol the cache uses.
+    """
+
+    def __init__(self):
+        self.data = {}
+        self.sets = {}
+        self.commands = []
+        # Seconds to stall before each of the next replies
+        self.delays = []
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                count = int((await reader.readuntil(b"\r\n"))[1:-2])
+                args = []
+                for _ in range(count):
+                    length = int((await reader.readuntil(b"\r\n"))[1:-2])
+                    args.append((await reader.readexactly(length + 2))[:-2])
+                reply = self._reply(args)
+                if self.delays:
+                    await asyncio.sleep(self.delays.pop(0))
+                writer.write(reply)
+                await writer.drain()
+        except asyncio.IncompleteReadError:
+            writer.close()
+
+    def _reply(self, args):
+        command = args[0].decode().upper()
+        self.commands.append(command)
+        if command == "GET":
+            entry = self.data.get(args[1])
+            if entry is None or entry[1] <= time.monotonic():
+                return b"$-1\r\n"
+            return b"$%d\r\n%s\r\n" % (len(entry[0]), entry[0])
+        if command == "SET":
+            self.data[args[1]] = (args[2], time.monotonic() + int(args[4]) / 1000)
+            return b"+OK\r\n"
+        if command == "SADD":
+            self.sets.setdefault(args[1], set()).update(args[2:])
+            return b":1\r\n"
+        if command == "PEXPIRE":
+            return b":1\r\n"
+        if command == "SMEMBERS":
+            members = self.sets.get(args[1], set())
+            return b"*%d\r\n" % len(members) + b"".join(
+                b"$%d\r\n%s\r\n" % (len(m), m) for m in members
+            )
+        if command == "DEL":
+            removed = sum(
+                1
+                for key in args[1:]
+                if self.data.pop(key, None) or self.sets.pop(key, None)
+            )
+            return b":%d\r\n" % removed
+        return b"-ERR unknown command\r\n"
+
+
+@pytest.mark.asyncio
+async def test_memory_backend_lru_eviction():
+    backend = InMemoryBackend(max_entries=2)
+    await backend.set("a", b"1", 60)
+    await backend.set("b", b"2", 60)
+    assert await backend.get("a") == b"1"  # "a" becomes most recently used
+
+    await backend.set("c", b"3", 60)
+
+    assert await backend.get("b") is None
+    assert await backend.get("a") == b"1"
+    assert backend.evictions == 1
+    assert backend.size() == 2
+
+
+@pytest.mark.asyncio
+async def test_memory_backend_ttl_expiry():
+    backend = InMemoryBackend()
+    await backend.set("a", b"1", 0.01)
+    await asyncio.sleep(0.02)
+    assert await backend.get("a") is None
+    assert backend.size() == 0
+
+
+@pytest.mark.asyncio
+async def test_memory_backend_invalidates_only_tagged_entries():
+    backend = InMemoryBackend()
+    await backend.set("dashboard:gp1", b"1", 60, tags=["user:gp1", "gift:g1"])
+    await backend.set("dashboard:gp2", b"2", 60, tags=["user:gp2", "gift:g2"])
+
+    assert await backend.invalidate_tags(["gift:g1"]) == 1
+
+    assert await backend.get("dashboard:gp1") is None
+    assert await backend.get("dashboard:gp2") == b"2"
+
+
+@pytest.mark.asyncio
+async def test_redis_backend_against_stand_in():
+    server = RespStandIn()
+    port = await server.start()
+    backend = RedisBackend(f"redis://127.0.0.1:{port}/0")
+    try:
+        await backend.set("dashboard:gp1", b'{"a": 1}', 60, tags=["user:gp1"])
+        await backend.set("dashboard:gp2", b"[]", 60, tags=["user:gp2"])
+        assert await backend.get("dashboard:gp1") == b'{"a": 1}'
+
+        assert await backend.invalidate_tags(["user:gp1"]) == 1
+
+        assert await backend.get("dashboard:gp1") is None
+        assert await backend.get("dashboard:gp2") == b"[]"
+        assert server.commands.count("SET") == 2
+    finally:
+        await backend.close()
+        await server.stop()
+
+
+@pytest.mark.asyncio
+async def test_redis_backend_drops_connection_after_a_timeout():
+    server = RespStandIn()
+    port = await server.start()
+    backend = RedisBackend(f"redis://127.0.0.1:{port}/0", timeout=0.05)
+    try:
+        await backend.set("dashboard:gp1", b"mine", 60)
+        await backend.set("dashboard:gp2", b"theirs", 60)
+        server.delays = [0.2]
+
+        with pytest.raises(asyncio.TimeoutError):
+            await backend.get("dashboard:gp1")
+
+        # The late reply for gp1 is never read as the reply for gp2
+        await asyncio.sleep(0.2)
+        assert await backend.get("dashboard:gp2") == b"theirs"
+    finally:
+        await backend.close()
+        await server.stop()
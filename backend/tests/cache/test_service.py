@@ -0,0 +1,73 @@
+import uuid
+from typing import List
+
+import pytest
+
+import app.shared.cache.service as cache_service
+from app.shared.cache.backends import CacheBackend, InMemoryBackend
+from app.shared.cache.service import ResponseCache, cached_response
+from app.shared.gifts.schemas import UserRole, UserSchema
+
+
+class FailingBackend(CacheBackend):
+    name = "failing"
+
+    async def get(self, key):
+        raise ConnectionError("down")
+
+    async def set(self, key, value, ttl_seconds, tags=()):
+        raise ConnectionError("down")
+
+    async def invalidate_tags(self, tags):
+        raise ConnectionError("down")
+
+
+@pytest.fixture
+def fresh_cache(monkeypatch):
+    cache = ResponseCache(InMemoryBackend(), ttl_seconds=60)
+    monkeypatch.setattr(cache_service, "response_cache", cache)
+    return cache
+
+
+@pytest.mark.asyncio
+async def test_cached_response_read_through(fresh_cache):
+    calls = []
+    user = UserSchema(id=uuid.uuid4(), name="Arjun", role=UserRole.grandchild)
+
+    async def load():
+        calls.append(1)
+        return [user]
+
+    first = await cached_response(
+        "users:all",
+        load,
+        List[UserSchema],
+        tags=["users"],
+        headers=lambda _: {"X-Next-Cursor": "abc"},
+    )
+    second = await cached_response("users:all", load, List[UserSchema], tags=["users"])
+
+    assert len(calls) == 1
+    assert first.body == second.body
+    assert second.headers["X-Next-Cursor"] == "abc"
+    assert fresh_cache.stats()["hits"] == 1
+    assert fresh_cache.stats()["misses"] == 1
+
+    await fresh_cache.invalidate("users")
+    await cached_response("users:all", load, List[UserSchema], tags=["users"])
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_backend_failures_fall_back_to_loader(monkeypatch):
+    cache = ResponseCache(FailingBackend())
+    monkeypatch.setattr(cache_service, "response_cache", cache)
+
+    async def load():
+        return []
+
+    response = await cached_response("users:all", load, List[UserSchema])
+    await cache.invalidate("users")
+
+    assert response.body == b"[]"
+    assert cache.stats()["errors"] == 3
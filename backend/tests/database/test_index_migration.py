@@ -0,0 +1,57 @@
+import importlib.util
+import pathlib
+from unittest.mock import MagicMock
+
+import app.shared.gifts.models  # noqa: F401 - registers the tables on Base.metadata
+from app.database import Base
+
+VERSIONS_DIR = pathlib.Path(__file__).resolve().parents[2] / "alembic" / "versions"
+
+
+def _load_revision(filename):
+    spec = importlib.util.spec_from_file_location(filename, VERSIONS_DIR / filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.op = MagicMock()
+    return module
+
+
+def _revisions_in_order():
+    revisions = {
+        module.down_revision: module
+        for module in (_load_revision(path.name) for path in VERSIONS_DIR.glob("*.py"))
+    }
+    down_revision = None
+    while down_revision in revisions:
+        revision = revisions.pop(down_revision)
+        yield revision
+        down_revision = revision.revision
+    assert not revisions, "migrations do not form a single chain"
+
+
+def test_migrations_create_every_model_index():
+    created = {}
+    for revision in _revisions_in_order():
+        revision.upgrade()
+        created.update(
+            (call.args[0], (call.args[1], call.args[2]))
+            for call in revision.op.create_index.call_args_list
+        )
+        for call in revision.op.drop_index.call_args_list:
+            created.pop(call.args[0], None)
+    declared = {
+        index.name: (table.name, [column.name for column in index.columns])
+        for table in Base.metadata.tables.values()
+        for index in table.indexes
+    }
+    assert created == declared
+
+
+def test_migration_downgrade_drops_what_it_created():
+    revision = _load_revision("b19859b94414_add_hot_lookup_indexes.py")
+    revision.upgrade()
+    revision.downgrade()
+
+    created = {call.args[0] for call in revision.op.create_index.call_args_list}
+    dropped = {call.args[0] for call in revision.op.drop_index.call_args_list}
+    assert created == dropped
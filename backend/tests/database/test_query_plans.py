@@ -0,0 +1,240 @@
+r"""
+Query-plan regression suite: seeds a large synthetic dataset into a disposable Postgres
+database and checks through EXPLAIN that the SELECTs issued by each service call use
+indexes.
+
+Runs only when TEST_DATABASE_URL points at a database that may be dropped and
+recreated, e.g.
+    TEST_DATABASE_URL=postgresql+asyncpg://postgres@localhost/giftforge_test \
+        pytest tests/database
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import uuid
+
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.database import Base
+from app.modules.media.service import MediaService
+from app.modules.trustee.service import TrusteeService
+from app.modules.users.service import UserService
+from app.shared.gifts.service import GiftService
+from app.shared.notifications.service import NotificationService
+from app.shared.simulation.service import SimulationService
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(
+    not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set"
+)
+
+GRANDPARENTS = 2_000
+GRANDCHILDREN = 5_000
+GIFTS = 20_000
+NOTIFICATIONS = 60_000
+
+SEED_SQL = [
+    f"""INSERT INTO users (id, name, role)
+        SELECT md5('gp' || g)::uuid, 'Grandparent ' || g, 'grandparent'
+        FROM generate_series(0, {GRANDPARENTS - 1}) g""",
+    f"""INSERT INTO users (id, name, role)
+        SELECT md5('gc' || g)::uuid, 'Grandchild ' || g, 'grandchild'
+        FROM generate_series(0, {GRANDCHILDREN - 1}) g""",
+    f"""INSERT INTO gifts (id, grandparent_id, grandchild_id, grandchild_name, corpus,
+                           currency, status, risk_profile, rule_type)
+        SELECT md5('gift' || g)::uuid, md5('gp' || (g % {GRANDPARENTS}))::uuid,
+               md5('gc' || (g % {GRANDCHILDREN}))::uuid,
+               'Grandchild ' || (g % {GRANDCHILDREN}), 1000 + g,
+               (ARRAY['USD', 'INR'])[1 + g % 2]::currencies, 'Active',
+               (ARRAY['Conservative', 'Balanced', 'Growth'])[1 + g % 3]::risk_profiles,
+               'Milestone'
+        FROM generate_series(0, {GIFTS - 1}) g""",
+    f"""INSERT INTO milestones (id, gift_id, type, percentage, status)
+        SELECT gen_random_uuid(), md5('gift' || (g % {GIFTS}))::uuid,
+               'Milestone ' || g, 50, 'Pending'
+        FROM generate_series(0, {GIFTS * 2 - 1}) g""",
+    f"""INSERT INTO media_messages (id, gift_id, uploader_id, type, file_path,
+                                    created_at)
+        SELECT gen_random_uuid(), md5('gift' || g)::uuid,
+               md5('gp' || (g % {GRANDPARENTS}))::uuid, 'photo',
+               'static/media/' || g || '.jpeg', now() - g * interval '1 minute'
+        FROM generate_series(0, {GIFTS - 1}) g""",
+    f"""INSERT INTO notifications (id, recipient_id, role, event_type, message,
+                                   is_read, created_at)
+        SELECT md5('notification' || g)::uuid,
+               md5('gc' || (g % {GRANDCHILDREN}))::uuid, 'grandchild', 'gift_received',
+               'Notification ' || g, g % 5 <> 0, now() - g * interval '1 minute'
+        FROM generate_series(0, {NOTIFICATIONS - 1}) g""",
+    f"""INSERT INTO override_windows (id, gift_id, created_at, expires_at, status)
+        SELECT gen_random_uuid(), md5('gift' || g)::uuid,
+               now(), now() + (g % 14) * interval '1 day',
+               (ARRAY['Open', 'Overridden', 'Expired'])[1 + g % 3]::override_statuses
+        FROM generate_series(0, {GIFTS - 1}) g""",
+]
+
+
+def _seed_uuid(seed: str) -> str:
+    return str(uuid.UUID(hashlib.md5(seed.encode()).hexdigest()))
+
+
+async def _seed():
+    engine = create_async_engine(TEST_DATABASE_URL, poolclass=NullPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        for statement in SEED_SQL:
+            await conn.execute(text(statement))
+        await conn.execute(text("ANALYZE"))
+    await engine.dispose()
+
+
+@pytest.fixture(scope="module", autouse=True)
+def seeded_database():
+    asyncio.run(_seed())
+
+
+async def _explain_selects(call):
+    """
+    Runs `call(db)` on a fresh session, captures every SELECT it sends and returns their
+    EXPLAIN plans.
+    """
+    engine = create_async_engine(TEST_DATABASE_URL, poolclass=NullPool)
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", capture)
+    async with AsyncSession(engine, expire_on_commit=False) as db:
+        await call(db)
+    event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+    plans = []
+    async with engine.connect() as conn:
+        for statement, parameters in captured:
+            result = await conn.exec_driver_sql(
+                "EXPLAIN (FORMAT JSON) " + statement, parameters
+            )
+            plan = result.scalar_one()
+            plans.append(
+                (statement, json.loads(plan) if isinstance(plan, str) else plan)
+            )
+    await engine.dispose()
+    return plans
+
+
+def _plan_nodes(plan_node):
+    yield plan_node
+    for child in plan_node.get("Plans", []):
+        yield from _plan_nodes(child)
+
+
+def _node_types(plan_node):
+    for node in _plan_nodes(plan_node):
+        yield node["Node Type"], node.get("Relation Name")
+
+
+SERVICE_CALLS = {
+    "gifts_by_grandparent": lambda db: GiftService.get_gifts_by_user(
+        db, _seed_uuid("gp1"), True, limit=21
+    ),
+    "gifts_by_grandchild": lambda db: GiftService.get_gifts_by_user(
+        db, _seed_uuid("gc1"), False
+    ),
+    "gift_summaries": lambda db: GiftService.get_gift_summaries_by_user(
+        db, _seed_uuid("gp1"), True, limit=21
+    ),
+    "gift_detail": lambda db: GiftService.get_gift(db, _seed_uuid("gift1")),
+    "portfolio": lambda db: GiftService.get_portfolio(db, _seed_uuid("gp1")),
+    "portfolio_projection": lambda db: SimulationService.get_portfolio_projection(
+        db, uuid.UUID(_seed_uuid("gp1"))
+    ),
+    "unread_notifications": lambda db: NotificationService.get_for_user(
+        db, uuid.UUID(_seed_uuid("gc1")), "unread", limit=51
+    ),
+    "read_notifications": lambda db: NotificationService.get_for_user(
+        db, uuid.UUID(_seed_uuid("gc1")), "read", limit=51
+    ),
+    "mark_notification_read": lambda db: NotificationService.mark_as_read(
+        db, _seed_uuid("notification1")
+    ),
+    "media_for_gift": lambda db: MediaService.get_media_for_gift(
+        db, _seed_uuid("gift1")
+    ),
+    "user_by_id": lambda db: UserService.get_user_by_id(db, _seed_uuid("gp1")),
+}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("name", sorted(SERVICE_CALLS))
+async def test_service_queries_use_indexes(name):
+    plans = await _explain_selects(SERVICE_CALLS[name])
+
+    assert plans, f"{name} issued no SELECT"
+    for statement, plan in plans:
+        scans = list(_node_types(plan[0]["Plan"]))
+        seq_scans = [
+            relation for node_type, relation in scans if node_type == "Seq Scan"
+        ]
+        assert not seq_scans, f"{name} sequentially scans {seq_scans}:\n{statement}"
+
+
+@pytest.mark.asyncio
+async def test_milestone_approval_queries_use_indexes():
+    engine = create_async_engine(TEST_DATABASE_URL, poolclass=NullPool)
+    async with engine.connect() as conn:
+        milestone_id = (
+            await conn.execute(
+                text("SELECT id FROM milestones WHERE gift_id = :gift_id LIMIT 1"),
+                {"gift_id": _seed_uuid("gift2")},
+            )
+        ).scalar_one()
+    await engine.dispose()
+
+    plans = await _explain_selects(
+        lambda db: TrusteeService.process_milestone_submission(db, str(milestone_id))
+    )
+
+    for statement, plan in plans:
+        assert "Seq Scan" not in [
+            node_type for node_type, _ in _node_types(plan[0]["Plan"])
+        ], statement
+
+
+@pytest.mark.asyncio
+async def test_unread_notifications_use_partial_index():
+    plans = await _explain_selects(
+        lambda db: NotificationService.get_for_user(
+            db, uuid.UUID(_seed_uuid("gc1")), "unread", limit=51
+        )
+    )
+
+    # notifications is partitioned, so the plan names the partitions' copies of the
+    # index
+    engine = create_async_engine(TEST_DATABASE_URL, poolclass=NullPool)
+    async with engine.connect() as conn:
+        partition_indexes = (
+            (
+                await conn.execute(
+                    text(
+                        "SELECT c.relname FROM pg_inherits i "
+                        "JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = "
+                        "'ix_notifications_unread_recipient_id_created_at'::regclass"
+                    )
+                )
+            )
+            .scalars()
+            .all()
+        )
+    await engine.dispose()
+
+    ((_, plan),) = plans
+    used = {node.get("Index Name") for node in _plan_nodes(plan[0]["Plan"])}
+    assert used & set(partition_indexes), used
@@ -0,0 +1,119 @@
+import datetime
+import json
+import uuid
+from decimal import Decimal
+from unittest.mock import AsyncMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.modules.export.service import EXPORT_BATCH_SIZE, GIFT_COLUMNS, ExportService
+from app.shared.gifts.schemas import GiftStatus
+
+
+class FakeStream:
+    """Stands in for the AsyncResult returned by AsyncSession.stream()."""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def mappings(self):
+        return self
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for row in self.rows:
+            yield row
+
+
+def gift_row(gift_id, milestone_id=None, milestone_type=None):
+    row = {name: None for name in GIFT_COLUMNS}
+    row.update(
+        id=gift_id,
+        corpus=Decimal("250.00"),
+        status="Active",
+        created_at=datetime.datetime(2026, 5, 1, 8, 0),
+    )
+    row.update(
+        milestone_id=milestone_id,
+        milestone_type=milestone_type,
+        milestone_percentage=50,
+        milestone_status="Pending",
+    )
+    return row
+
+
+async def collect(chunks):
+    return b"".join([chunk async for chunk in chunks]).decode()
+
+
+def test_gift_query_filters_and_streams_in_batches():
+    grandparent_id = uuid.uuid4()
+    query = ExportService.build_gift_query(
+        status=GiftStatus.Under_Review,
+        grandparent_id=grandparent_id,
+        created_from=datetime.datetime(2026, 1, 1),
+        created_to=datetime.datetime(2026, 2, 1),
+    )
+
+    sql = str(query.compile(dialect=postgresql.dialect()))
+    assert "LEFT OUTER JOIN milestones" in sql
+    assert "gifts.status =" in sql
+    assert "gifts.grandparent_id =" in sql
+    assert "gifts.created_at >=" in sql and "gifts.created_at <" in sql
+    assert "ORDER BY gifts.id, milestones.id" in sql
+    assert query.get_execution_options()["yield_per"] == EXPORT_BATCH_SIZE
+
+
+@pytest.mark.asyncio
+async def test_gift_rows_are_grouped_with_their_milestones():
+    first, second = uuid.uuid4(), uuid.uuid4()
+    mock_db = AsyncMock()
+    mock_db.stream.return_value = FakeStream(
+        [
+            gift_row(first, uuid.uuid4(), "Graduation"),
+            gift_row(first, uuid.uuid4(), "First Job"),
+            gift_row(second),
+        ]
+    )
+
+    lines = (await collect(ExportService.export_gifts(mock_db, "ndjson"))).splitlines()
+
+    gifts = [json.loads(line) for line in lines]
+    assert [g["id"] for g in gifts] == [str(first), str(second)]
+    assert [m["type"] for m in gifts[0]["milestones"]] == ["Graduation", "First Job"]
+    assert gifts[1]["milestones"] == []
+    assert gifts[0]["corpus"] == "250.00"
+
+
+@pytest.mark.asyncio
+async def test_gift_csv_has_one_row_per_milestone():
+    first, second = uuid.uuid4(), uuid.uuid4()
+    mock_db = AsyncMock()
+    mock_db.stream.return_value = FakeStream(
+        [
+            gift_row(first, uuid.uuid4(), "Graduation"),
+            gift_row(first, uuid.uuid4(), "First Job"),
+            gift_row(second),
+        ]
+    )
+
+    lines = (await collect(ExportService.export_gifts(mock_db, "csv"))).splitlines()
+
+    assert lines[0].startswith("id,grandparent_id")
+    assert lines[0].endswith(
+        "milestone_id,milestone_type,milestone_percentage,milestone_status"
+    )
+    assert len(lines) == 4
+    assert "Graduation" in lines[1] and "2026-05-01T08:00:00" in lines[1]
+    assert lines[3].startswith(str(second)) and lines[3].endswith(",,,")
+
+
+@pytest.mark.asyncio
+async def test_empty_export_writes_nothing_for_ndjson():
+    mock_db = AsyncMock()
+    mock_db.stream.return_value = FakeStream([])
+
+    assert await collect(ExportService.export_notifications(mock_db, "ndjson")) == ""
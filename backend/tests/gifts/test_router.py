@@ -0,0 +1,37 @@
+import uuid
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.config import Settings
+from app.main import create_app
+from app.shared.gifts.router import MAX_BULK_GIFTS
+
+app = create_app(Settings(database_url="postgresql+asyncpg://u:p@localhost/x"))
+
+
+def _gift():
+    return {"grandchild_id": str(uuid.uuid4()), "corpus": "100", "milestones": []}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "count, status_code", [(MAX_BULK_GIFTS, 200), (MAX_BULK_GIFTS + 1, 422)]
+)
+async def test_bulk_create_caps_the_request(count, status_code):
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as ac:
+        with patch(
+            "app.shared.gifts.router.GiftService.create_gifts_bulk",
+            new_callable=AsyncMock,
+            return_value=[],
+        ) as create:
+            response = await ac.post(
+                f"/gifts/bulk?grandparent_id={uuid.uuid4()}",
+                json=[_gift() for _ in range(count)],
+            )
+
+    assert response.status_code == status_code
+    assert create.await_count == (status_code == 200)
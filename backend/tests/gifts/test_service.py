@@ -0,0 +1,416 @@
+import datetime
+import json
+import uuid
+from decimal import Decimal
+from typing import List
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from pydantic import TypeAdapter
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import DBAPIError, IntegrityError
+
+from app.shared.gifts import service as gift_service
+from app.shared.gifts.schemas import (
+    Currency,
+    GiftCreate,
+    GiftSchema,
+    GiftStatus,
+    MilestoneCreate,
+    MilestoneStatus,
+    RiskProfile,
+)
+from app.shared.gifts.service import BULK_WRITE_FAILED, GiftService
+from app.shared.gifts.state_machine import StateMachineError
+from app.shared.responses import dumps
+
+
+@pytest.mark.asyncio
+async def test_create_gift_single_statement_single_commit():
+    mock_db = AsyncMock()
+    grandparent_id = str(uuid.uuid4())
+    gift_data = GiftCreate(
+        grandchild_id=uuid.uuid4(),
+        grandchild_name="Arjun",
+        corpus=Decimal(10000),
+        milestones=[
+            MilestoneCreate(type="Graduation", percentage=60),
+            MilestoneCreate(type="First Job", percentage=40),
+        ],
+    )
+
+    result = await GiftService.create_gift(mock_db, grandparent_id, gift_data)
+
+    assert mock_db.execute.call_count == 1
+    assert mock_db.commit.call_count == 1
+    assert not mock_db.refresh.called
+    assert str(result.grandparent_id) == grandparent_id
+    assert result.status == GiftStatus.Active
+    assert [m.type for m in result.milestones] == ["Graduation", "First Job"]
+    assert all(
+        m.gift_id == result.id and m.status == MilestoneStatus.Pending
+        for m in result.milestones
+    )
+    assert result.media_messages == []
+
+
+def test_creation_statement_upserts_users():
+    user_rows = [{"id": uuid.uuid4(), "name": "Grandparent", "role": "grandparent"}]
+    gift_rows = [
+        {
+            "id": uuid.uuid4(),
+            "grandparent_id": user_rows[0]["id"],
+            "grandchild_id": uuid.uuid4(),
+            "corpus": Decimal(1),
+        }
+    ]
+    notification_rows = [
+        {
+            "id": uuid.uuid4(),
+            "recipient_id": user_rows[0]["id"],
+            "role": "grandparent",
+            "event_type": "e",
+            "message": "m",
+        }
+    ]
+
+    stmt = GiftService._build_creation_statement(
+        user_rows, gift_rows, [], notification_rows
+    )
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+
+    assert "ON CONFLICT (id) DO NOTHING" in sql
+    assert "INSERT INTO user_versions" in sql
+    assert "INSERT INTO gifts" in sql
+    assert "INSERT INTO milestones" not in sql
+    assert "INSERT INTO notification_outbox" in sql
+    assert sql.strip().startswith("WITH")
+
+
+@pytest.mark.asyncio
+async def test_create_gifts_bulk_reports_per_item_results():
+    mock_db = AsyncMock()
+    grandchild_id = uuid.uuid4()
+    gifts_data = [
+        GiftCreate(
+            grandchild_id=grandchild_id,
+            corpus=Decimal(5000),
+            milestones=[MilestoneCreate(type="Graduation", percentage=100)],
+        ),
+        GiftCreate(grandchild_id=grandchild_id, corpus=Decimal(0), milestones=[]),
+        GiftCreate(
+            grandchild_id=uuid.uuid4(),
+            corpus=Decimal(100),
+            milestones=[
+                MilestoneCreate(type="A", percentage=70),
+                MilestoneCreate(type="B", percentage=40),
+            ],
+        ),
+        GiftCreate(grandchild_id=uuid.uuid4(), corpus=Decimal(10000), milestones=[]),
+    ]
+
+    mock_db.begin_nested = MagicMock(return_value=AsyncMock())
+    results = await GiftService.create_gifts_bulk(
+        mock_db, str(uuid.uuid4()), gifts_data
+    )
+
+    assert [r.index for r in results] == [0, 1, 2, 3]
+    assert [r.status for r in results] == ["created", "failed", "failed", "created"]
+    assert "Corpus" in results[1].reason
+    assert results[0].gift.milestones[0].type == "Graduation"
+    assert mock_db.execute.call_count == 1
+    assert mock_db.commit.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_create_gifts_bulk_database_error_fails_valid_items():
+    mock_db = AsyncMock()
+    mock_db.begin_nested = MagicMock(return_value=AsyncMock())
+    mock_db.execute.side_effect = DBAPIError(
+        "INSERT INTO gifts ...", {"corpus": "1"}, Exception("connection lost")
+    )
+    gifts_data = [
+        GiftCreate(grandchild_id=uuid.uuid4(), corpus=Decimal(1), milestones=[])
+        for _ in range(3)
+    ]
+
+    results = await GiftService.create_gifts_bulk(
+        mock_db, str(uuid.uuid4()), gifts_data
+    )
+
+    # Neither the statement nor the driver message reaches the caller
+    assert all(r.status == "failed" and r.reason == BULK_WRITE_FAILED for r in results)
+    assert mock_db.rollback.called
+    assert not mock_db.commit.called
+
+
+@pytest.mark.asyncio
+async def test_create_gifts_bulk_failed_chunk_keeps_the_others(monkeypatch):
+    monkeypatch.setattr(gift_service, "BULK_CHUNK_SIZE", 2)
+    mock_db = AsyncMock()
+    mock_db.begin_nested = MagicMock(return_value=AsyncMock())
+    mock_db.execute.side_effect = [
+        MagicMock(),
+        IntegrityError("INSERT INTO gifts ...", {}, Exception("duplicate key")),
+        MagicMock(),
+    ]
+    gifts_data = [
+        GiftCreate(grandchild_id=uuid.uuid4(), corpus=Decimal(1), milestones=[])
+        for _ in range(5)
+    ]
+
+    results = await GiftService.create_gifts_bulk(
+        mock_db, str(uuid.uuid4()), gifts_data
+    )
+
+    assert [r.status for r in results] == [
+        "created",
+        "created",
+        "failed",
+        "failed",
+        "created",
+    ]
+    assert mock_db.begin_nested.call_count == 3
+    assert mock_db.commit.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_create_gifts_bulk_programming_error_is_raised():
+    mock_db = AsyncMock()
+    mock_db.begin_nested = MagicMock(return_value=AsyncMock())
+    mock_db.execute.side_effect = TypeError("bad row")
+
+    with pytest.raises(TypeError):
+        await GiftService.create_gifts_bulk(
+            mock_db,
+            str(uuid.uuid4()),
+            [GiftCreate(grandchild_id=uuid.uuid4(), corpus=Decimal(1), milestones=[])],
+        )
+    assert not mock_db.commit.called
+
+
+@pytest.mark.asyncio
+async def test_gift_summaries_keyset_query():
+    mock_db = AsyncMock()
+    mock_db.execute.return_value = MagicMock()
+    after = GiftService.decode_cursor(
+        GiftService.encode_cursor(
+            {
+                "created_at": datetime.datetime(2026, 10, 18, 9, 30, 0, 125),
+                "id": uuid.uuid4(),
+            }
+        )
+    )
+
+    await GiftService.get_gift_summaries_by_user(
+        mock_db, str(uuid.uuid4()), is_grandparent=False, limit=21, after=after
+    )
+
+    stmt = mock_db.execute.call_args.args[0]
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert "gifts.grandchild_id =" in sql
+    # Creation order, so gifts added later land on the last page
+    assert "(gifts.created_at, gifts.id) >" in sql
+    assert "ORDER BY gifts.created_at, gifts.id" in sql
+    assert after[0] == datetime.datetime(2026, 10, 18, 9, 30, 0, 125)
+    assert "LIMIT" in sql
+    assert "count(media_messages.id)" in sql
+    assert "JOIN" not in sql
+
+
+def test_assembled_gift_rows_serialize_like_gift_schema():
+    gift_id, grandparent_id = uuid.uuid4(), uuid.uuid4()
+    gift_rows = [
+        {
+            "id": gift_id,
+            "grandparent_id": grandparent_id,
+            "grandchild_id": uuid.uuid4(),
+            "grandchild_name": "Aarav",
+            "message": None,
+            "corpus": Decimal("1500.50"),
+            "currency": "INR",
+            "status": "Under Review",
+            "risk_profile": "Growth",
+            "rule_type": "Milestone",
+            "fallback_ngo_id": None,
+            "created_at": datetime.datetime(2026, 2, 27, 18, 0),
+        }
+    ]
+    milestone_rows = [
+        {
+            "id": uuid.uuid4(),
+            "gift_id": gift_id,
+            "type": "Graduation",
+            "percentage": 100,
+            "status": "Pending",
+        }
+    ]
+    media_rows = [
+        {
+            "id": uuid.uuid4(),
+            "gift_id": gift_id,
+            "uploader_id": grandparent_id,
+            "type": "photo",
+            "file_path": "static/media/a.png",
+            "created_at": datetime.datetime(2026, 3, 1, 9, 5, 7, 42),
+        }
+    ]
+
+    gifts = GiftService._assemble_gifts(gift_rows, milestone_rows, media_rows)
+
+    expected = TypeAdapter(List[GiftSchema]).dump_json(
+        TypeAdapter(List[GiftSchema]).validate_python(gifts)
+    )
+    assert json.loads(dumps(gifts)) == json.loads(expected)
+
+
+@pytest.mark.asyncio
+async def test_gift_dicts_skip_child_queries_when_empty():
+    mock_db = AsyncMock()
+    mock_db.execute.return_value = MagicMock()
+    mock_db.execute.return_value.mappings.return_value.all.return_value = []
+
+    gifts = await GiftService.get_gifts_by_user(mock_db, str(uuid.uuid4()), limit=10)
+
+    assert gifts == []
+    assert mock_db.execute.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_portfolio_normalises_grouped_rows():
+    mock_db = AsyncMock()
+    grandchild_id = uuid.uuid4()
+    rows = [
+        {
+            "grandchild_id": grandchild_id,
+            "grandchild_name": "Arjun",
+            "risk_profile": "Growth",
+            "currency": "USD",
+            "gift_count": 2,
+            "corpus": Decimal(100),
+            "allocated": Decimal(100),
+        },
+        {
+            "grandchild_id": grandchild_id,
+            "grandchild_name": "Arjun",
+            "risk_profile": "Balanced",
+            "currency": "INR",
+            "gift_count": 1,
+            "corpus": Decimal(16700),
+            "allocated": Decimal(0),
+        },
+    ]
+    mock_db.execute.return_value = MagicMock(mappings=lambda: rows)
+
+    portfolio = await GiftService.get_portfolio(
+        mock_db, str(uuid.uuid4()), Currency.USD
+    )
+
+    assert mock_db.execute.call_count == 1
+    assert "GROUP BY" in str(mock_db.execute.call_args.args[0])
+    assert portfolio.gift_count == 3
+    assert portfolio.total_corpus == Decimal("300.00")
+    assert portfolio.allocated == Decimal("100.00")
+    assert portfolio.released == Decimal("200.00")
+    assert len(portfolio.grandchildren) == 1
+    risk = {r.risk_profile: r for r in portfolio.risk_allocation}
+    assert risk[RiskProfile.Balanced].corpus == Decimal("200.00")
+    assert risk[RiskProfile.Growth].percentage == Decimal("33.33")
+    assert risk[RiskProfile.Conservative].gift_count == 0
+
+
+def _gift_row(status):
+    return {
+        "id": uuid.uuid4(),
+        "grandparent_id": uuid.uuid4(),
+        "grandchild_id": uuid.uuid4(),
+        "grandchild_name": None,
+        "message": None,
+        "corpus": Decimal(10),
+        "currency": "USD",
+        "status": status,
+        "risk_profile": "Balanced",
+        "rule_type": "Milestone",
+        "fallback_ngo_id": None,
+    }
+
+
+@pytest.mark.asyncio
+async def test_update_status_is_one_conditional_update():
+    mock_db = AsyncMock()
+    row = _gift_row("Under Review")
+    mock_db.execute.return_value = MagicMock(
+        mappings=lambda: MagicMock(one_or_none=lambda: row)
+    )
+
+    result = await GiftService.update_status(
+        mock_db, str(row["id"]), GiftStatus.Under_Review
+    )
+
+    assert result.status == GiftStatus.Under_Review
+    assert mock_db.execute.call_count == 1
+    assert mock_db.commit.call_count == 1
+    sql = str(mock_db.execute.call_args.args[0].compile(dialect=postgresql.dialect()))
+    assert sql.startswith("WITH moved AS \n(UPDATE gifts SET status=")
+    assert "gifts.status IN" in sql and "RETURNING" in sql
+    assert "INSERT INTO user_versions" in sql
+    # Withdrawal requested: grandparent and trustee are notified by the same statement
+    assert "INSERT INTO notification_outbox" in sql and "UNION ALL" in sql
+
+
+@pytest.mark.asyncio
+async def test_update_status_without_notifications_queues_nothing():
+    mock_db = AsyncMock()
+    row = _gift_row("Active")
+    mock_db.execute.return_value = MagicMock(
+        mappings=lambda: MagicMock(one_or_none=lambda: row)
+    )
+
+    await GiftService.update_status(mock_db, str(row["id"]), GiftStatus.Active)
+
+    sql = str(mock_db.execute.call_args.args[0].compile(dialect=postgresql.dialect()))
+    assert "notification_outbox" not in sql
+
+
+@pytest.mark.asyncio
+async def test_update_status_reports_invalid_transition():
+    mock_db = AsyncMock()
+    mock_db.execute.side_effect = [
+        MagicMock(mappings=lambda: MagicMock(one_or_none=lambda: None)),
+        MagicMock(scalar_one_or_none=lambda: "Completed"),
+    ]
+
+    with pytest.raises(StateMachineError):
+        await GiftService.update_status(mock_db, str(uuid.uuid4()), GiftStatus.Active)
+    assert mock_db.rollback.called
+    assert not mock_db.commit.called
+
+
+@pytest.mark.asyncio
+async def test_update_status_bulk_reports_failures():
+    mock_db = AsyncMock()
+    moved, wrong_state, missing = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    mock_db.execute.side_effect = [
+        MagicMock(
+            mappings=lambda: MagicMock(
+                all=lambda: [
+                    {
+                        "id": moved,
+                        "grandparent_id": uuid.uuid4(),
+                        "grandchild_id": uuid.uuid4(),
+                    }
+                ]
+            )
+        ),
+        MagicMock(all=lambda: [(wrong_state, "Completed")]),
+    ]
+
+    result = await GiftService.update_status_bulk(
+        mock_db, [moved, wrong_state, missing], GiftStatus.Under_Review
+    )
+
+    assert result.updated == [moved]
+    failures = {f.gift_id: f for f in result.failed}
+    assert failures[wrong_state].current_status == GiftStatus.Completed
+    assert "Invalid transition" in failures[wrong_state].reason
+    assert failures[missing].reason == "Gift not found"
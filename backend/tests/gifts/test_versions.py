@@ -0,0 +1,68 @@
+import uuid
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi import Response
+from sqlalchemy.dialects import postgresql
+
+from app.shared.gifts.versions import build_version_bump, etag_response, make_etag
+
+
+def _request(if_none_match=None):
+    request = MagicMock()
+    request.headers = {"if-none-match": if_none_match} if if_none_match else {}
+    return request
+
+
+def test_make_etag_is_strong_and_versioned():
+    etag = make_etag("gifts:grandparent:1:full:None:None", 3)
+    assert etag.startswith('"') and etag.endswith('-3"')
+    assert etag != make_etag("gifts:grandparent:1:summary:None:None", 3)
+    assert etag != make_etag("gifts:grandparent:1:full:None:None", 4)
+
+
+def test_version_bump_dedupes_and_increments():
+    user_id = uuid.uuid4()
+    stmt = build_version_bump([user_id, user_id])
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert (
+        "ON CONFLICT (user_id) DO UPDATE SET version = (user_versions.version +" in sql
+    )
+    assert (
+        len(stmt.compile(dialect=postgresql.dialect()).params) == 3
+    )  # one row + the increment
+
+
+@pytest.mark.asyncio
+async def test_etag_match_skips_build():
+    mock_db = AsyncMock()
+    mock_db.execute.return_value = MagicMock(scalar_one_or_none=lambda: 7)
+    build = AsyncMock()
+    etag = make_etag("notifications:u:unread", 7)
+
+    response = await etag_response(
+        _request(etag), mock_db, uuid.uuid4(), "notifications:u:unread", build
+    )
+
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert not build.called
+    assert mock_db.execute.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_etag_mismatch_builds_and_stamps():
+    mock_db = AsyncMock()
+    mock_db.execute.return_value = MagicMock(scalar_one_or_none=lambda: 8)
+    build = AsyncMock(
+        return_value=Response(content=b"[]", media_type="application/json")
+    )
+
+    response = await etag_response(
+        _request(make_etag("k", 7)), mock_db, uuid.uuid4(), "k", build
+    )
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] == make_etag("k", 8)
+    # The body is cached under the version its ETag names
+    build.assert_awaited_once_with("k:v8")
@@ -0,0 +1,253 @@
+import contextlib
+import datetime
+import os
+import uuid
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.database import Base
+from app.shared.gifts.models import utcnow
+from app.shared.gifts.schemas import GiftStatus, NotificationCreate, UserRole
+from app.shared.gifts.service import GiftService
+from app.shared.notifications.outbox import OutboxDispatcher, OutboxService
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+
+def _session_factory(db):
+    @contextlib.asynccontextmanager
+    async def factory():
+        yield db
+
+    return factory
+
+
+def _outbox_row(attempts=0):
+    now = utcnow()
+    return {
+        "id": uuid.uuid4(),
+        "dedup_key": None,
+        "recipient_id": uuid.uuid4(),
+        "role": "grandchild",
+        "event_type": "gift_received",
+        "message": "m",
+        "action_url": None,
+        "created_at": now,
+        "available_at": now,
+        "attempts": attempts,
+        "last_error": None,
+        "dispatched_at": None,
+    }
+
+
+def _claimed(rows):
+    return MagicMock(mappings=lambda: MagicMock(all=lambda: rows))
+
+
+def _sql(call):
+    return str(call.args[0].compile(dialect=postgresql.dialect()))
+
+
+def test_enqueue_statement_skips_duplicate_keys():
+    rows = OutboxService.build_rows(
+        [
+            NotificationCreate(
+                recipient_id=uuid.uuid4(),
+                role=UserRole.grandparent,
+                event_type="e",
+                message="m",
+                dedup_key="k",
+            )
+        ]
+    )
+
+    sql = str(OutboxService.build_insert(rows).compile(dialect=postgresql.dialect()))
+
+    assert sql.startswith("INSERT INTO notification_outbox")
+    assert "ON CONFLICT (dedup_key) DO NOTHING" in sql
+
+
+@pytest.mark.asyncio
+async def test_dispatch_batch_delivers_claimed_rows():
+    mock_db = AsyncMock()
+    mock_db.begin_nested = MagicMock(return_value=AsyncMock())
+    rows = [_outbox_row(), _outbox_row()]
+    mock_db.execute.side_effect = [
+        _claimed(rows),
+        MagicMock(),
+        MagicMock(),
+        MagicMock(),
+    ]
+    dispatcher = OutboxDispatcher(_session_factory(mock_db), batch_size=10)
+
+    assert await dispatcher.dispatch_batch() == 2
+
+    claim, lock, insert, mark = mock_db.execute.call_args_list
+    assert "FOR UPDATE SKIP LOCKED" in _sql(claim)
+    # Batches are numbered in commit order per recipient for streams resuming on seq
+    assert "pg_advisory_xact_lock" in _sql(lock) and "hashtext" in _sql(lock)
+    # Outbox keys are reused as notification keys, so a redelivered batch is a no-op
+    assert "ON CONFLICT (id, created_at) DO NOTHING" in _sql(insert)
+    assert "SET dispatched_at" in _sql(mark)
+    assert mock_db.commit.await_count == 1
+    assert dispatcher.dispatched == 2
+
+
+@pytest.mark.asyncio
+async def test_failing_row_is_rescheduled_without_blocking_the_batch():
+    mock_db = AsyncMock()
+    mock_db.begin_nested = MagicMock(return_value=AsyncMock())
+    good, bad = _outbox_row(), _outbox_row(attempts=2)
+    mock_db.execute.side_effect = [
+        _claimed([good, bad]),
+        MagicMock(),  # stream-order lock
+        Exception("batch failed"),  # whole batch
+        MagicMock(),
+        MagicMock(),  # good row: insert, mark dispatched
+        Exception("bad row"),  # bad row
+        MagicMock(),  # reschedule
+    ]
+    dispatcher = OutboxDispatcher(_session_factory(mock_db), batch_size=10)
+
+    assert await dispatcher.dispatch_batch() == 2
+
+    assert dispatcher.dispatched == 1
+    assert dispatcher.failures == 1
+    assert dispatcher.last_error == "bad row"
+    reschedule = mock_db.execute.call_args_list[-1]
+    assert "attempts" in _sql(reschedule) and "available_at" in _sql(reschedule)
+    params = reschedule.args[0].compile().params
+    assert params["attempts"] == 3
+    # Third failure backs off 2 * 2**2 seconds
+    assert params["available_at"] - utcnow() > datetime.timedelta(seconds=7)
+    assert mock_db.commit.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_dispatch_batch_with_empty_outbox_does_not_commit():
+    mock_db = AsyncMock()
+    mock_db.execute.return_value = _claimed([])
+    dispatcher = OutboxDispatcher(_session_factory(mock_db))
+
+    assert await dispatcher.dispatch_batch() == 0
+    assert not mock_db.commit.called
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+async def test_rejection_opens_an_override_window_that_warns_before_expiry():
+    engine = create_async_engine(TEST_DATABASE_URL, poolclass=NullPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    grandparent_id, grandchild_id, gift_id = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(
+                text(
+                    "INSERT INTO users (id, name, role) "
+                    "VALUES (:gp, 'Override test', 'grandparent'), "
+                    "(:gc, 'Asha', 'grandchild')"
+                ),
+                {"gp": grandparent_id, "gc": grandchild_id},
+            )
+            await conn.execute(
+                text(
+                    "INSERT INTO gifts (id, grandparent_id, grandchild_id, "
+                    "grandchild_name, corpus, currency, status, risk_profile, "
+                    "rule_type) "
+                    "VALUES (:id, :gp, :gc, 'Asha', 100, 'USD', 'Under Review', "
+                    "'Balanced', 'Milestone')"
+                ),
+                {"id": gift_id, "gp": grandparent_id, "gc": grandchild_id},
+            )
+
+        async with AsyncSession(engine) as db:
+            await GiftService.update_status(db, str(gift_id), GiftStatus.Rejected)
+
+        async def events():
+            async with engine.connect() as conn:
+                return (
+                    (
+                        await conn.execute(
+                            text(
+                                "SELECT event_type FROM notification_outbox "
+                                "WHERE recipient_id = :id ORDER BY created_at"
+                            ),
+                            {"id": grandparent_id},
+                        )
+                    )
+                    .scalars()
+                    .all()
+                )
+
+        async with engine.connect() as conn:
+            window = (
+                (
+                    await conn.execute(
+                        text(
+                            "SELECT id, status, expires_at - created_at AS length "
+                            "FROM override_windows WHERE gift_id = :id"
+                        ),
+                        {"id": gift_id},
+                    )
+                )
+                .mappings()
+                .one()
+            )
+        assert window["status"] == "Open" and window["length"] == datetime.timedelta(
+            days=7
+        )
+        assert await events() == ["override_window_opened"]
+
+        # Not yet within the warning period, then six days later; repeated scans warn
+        # once
+        for days in (0, 6, 6):
+            async with AsyncSession(engine) as db:
+                await db.execute(
+                    OutboxService.build_override_warnings(
+                        utcnow() + datetime.timedelta(days=days)
+                    )
+                )
+                await db.commit()
+        assert await events() == ["override_window_opened", "override_window_expiring"]
+
+        # Overriding closes the window, so it no longer warns
+        async with AsyncSession(engine) as db:
+            await GiftService.update_status(db, str(gift_id), GiftStatus.Active)
+        async with engine.connect() as conn:
+            status = (
+                await conn.execute(
+                    text("SELECT status FROM override_windows WHERE id = :id"),
+                    {"id": window["id"]},
+                )
+            ).scalar()
+        assert status == "Overridden"
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(
+                text(
+                    "DELETE FROM notification_outbox WHERE recipient_id IN (:gp, :gc)"
+                ),
+                {"gp": grandparent_id, "gc": grandchild_id},
+            )
+            await conn.execute(
+                text("DELETE FROM override_windows WHERE gift_id = :id"),
+                {"id": gift_id},
+            )
+            await conn.execute(
+                text("DELETE FROM gifts WHERE id = :id"), {"id": gift_id}
+            )
+            await conn.execute(
+                text("DELETE FROM user_versions WHERE user_id IN (:gp, :gc)"),
+                {"gp": grandparent_id, "gc": grandchild_id},
+            )
+            await conn.execute(
+                text("DELETE FROM users WHERE id IN (:gp, :gc)"),
+                {"gp": grandparent_id, "gc": grandchild_id},
+            )
+        await engine.dispose()
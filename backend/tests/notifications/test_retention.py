@@ -0,0 +1,166 @@
+import datetime
+import os
+import uuid
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.database import Base
+from app.shared.notifications.retention import (
+    NotificationRetention,
+    add_months,
+    partition_name,
+)
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+
+def test_month_arithmetic_crosses_years():
+    assert add_months(datetime.date(2026, 11, 1), 3) == datetime.date(2027, 2, 1)
+    assert add_months(datetime.date(2026, 1, 1), -13) == datetime.date(2024, 12, 1)
+    assert partition_name(datetime.date(2027, 2, 1)) == "notifications_2027_02"
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+@pytest.mark.parametrize("archive", [False, True])
+async def test_maintain_creates_partitions_and_expires_old_months_once_read(archive):
+    engine = create_async_engine(TEST_DATABASE_URL, poolclass=NullPool)
+    async with engine.begin() as conn:
+        await conn.execute(
+            text(
+                "DROP TABLE IF EXISTS archived_notifications_2025_01, "
+                "archived_notifications_2025_02"
+            )
+        )
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        user_id = uuid.uuid4()
+        await conn.execute(
+            text(
+                "INSERT INTO users (id, name, role) "
+                "VALUES (:id, 'Retention test', 'grandchild')"
+            ),
+            {"id": user_id},
+        )
+        for created_at, is_read in [
+            ("2025-01-10", False),
+            ("2025-01-20", True),
+            ("2026-10-18", False),
+        ]:
+            await conn.execute(
+                text(
+                    "INSERT INTO notifications (id, recipient_id, role, event_type, "
+                    "message, is_read, created_at) "
+                    "VALUES (gen_random_uuid(), :id, 'grandchild', 'e', 'm', "
+                    ":is_read, :created_at)"
+                ),
+                {
+                    "id": user_id,
+                    "is_read": is_read,
+                    "created_at": datetime.datetime.fromisoformat(created_at),
+                },
+            )
+        await conn.execute(
+            text("INSERT INTO notification_counters (user_id, unread) VALUES (:id, 2)"),
+            {"id": user_id},
+        )
+    retention = NotificationRetention(
+        lambda: AsyncSession(engine),
+        retention_months=12,
+        months_ahead=1,
+        archive=archive,
+    )
+
+    try:
+        # Rows already in the default partition move into the month created for them
+        assert await retention.maintain(datetime.datetime(2025, 1, 15)) == {
+            "created": ["notifications_2025_01", "notifications_2025_02"],
+            "expired": [],
+            "kept": [],
+        }
+        changes = await retention.maintain(datetime.datetime(2026, 10, 18))
+        # January still holds an unread row, so only February goes
+        assert changes == {
+            "created": ["notifications_2026_10", "notifications_2026_11"],
+            "expired": ["notifications_2025_02"],
+            "kept": ["notifications_2025_01"],
+        }
+
+        async def placement():
+            async with engine.connect() as conn:
+                return (
+                    await conn.execute(
+                        text(
+                            "SELECT tableoid::regclass::text, count(*) "
+                            "FROM notifications GROUP BY 1 ORDER BY 1"
+                        )
+                    )
+                ).all()
+
+        async def unread():
+            async with engine.connect() as conn:
+                return (
+                    await conn.execute(
+                        text(
+                            "SELECT unread FROM notification_counters "
+                            "WHERE user_id = :id"
+                        ),
+                        {"id": user_id},
+                    )
+                ).scalar()
+
+        assert await placement() == [
+            ("notifications_2025_01", 2),
+            ("notifications_2026_10", 1),
+        ]
+        assert await unread() == 2
+
+        # Once read, the month expires with the next pass
+        async with engine.begin() as conn:
+            await conn.execute(
+                text(
+                    "UPDATE notifications SET is_read = true "
+                    "WHERE created_at < '2025-02-01'"
+                )
+            )
+            await conn.execute(
+                text("UPDATE notification_counters SET unread = 1 WHERE user_id = :id"),
+                {"id": user_id},
+            )
+        assert await retention.maintain(datetime.datetime(2026, 10, 18)) == {
+            "created": [],
+            "expired": ["notifications_2025_01"],
+            "kept": [],
+        }
+        assert await placement() == [("notifications_2026_10", 1)]
+        assert await unread() == 1
+        async with engine.connect() as conn:
+            archived = (
+                await conn.execute(
+                    text(
+                        "SELECT to_regclass('archived_notifications_2025_01') "
+                        "IS NOT NULL"
+                    )
+                )
+            ).scalar()
+            assert archived == archive
+
+        # Nothing left to do
+        assert await retention.maintain(datetime.datetime(2026, 10, 18)) == {
+            "created": [],
+            "expired": [],
+            "kept": [],
+        }
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(
+                text(
+                    "DROP TABLE IF EXISTS archived_notifications_2025_01, "
+                    "archived_notifications_2025_02"
+                )
+            )
+            await conn.run_sync(Base.metadata.drop_all)
+        await engine.dispose()
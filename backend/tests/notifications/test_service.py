@@ -1,39 +1,170 @@
-import pytest
+import datetime
+import uuid
 from unittest.mock import AsyncMock, MagicMock
-from app.shared.notifications.service import NotificationService
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
 from app.shared.gifts.schemas import UserRole
-import uuid
+from app.shared.notifications.service import NotificationService
+
 
 @pytest.mark.asyncio
 async def test_notification_persistence():
     mock_db = AsyncMock()
     recipient_id = str(uuid.uuid4())
-    
+
     # Mock create
     result = await NotificationService.create_notification(
-        mock_db,
-        recipient_id,
-        UserRole.grandchild,
-        "test_event",
-        "Test message"
+        mock_db, recipient_id, UserRole.grandchild, "test_event", "Test message"
     )
-    
+
     assert str(result.recipient_id) == recipient_id
     assert result.event_type == "test_event"
     assert mock_db.commit.called
 
+
+def _marked(rows):
+    return MagicMock(
+        mappings=lambda: MagicMock(
+            all=lambda: rows, one_or_none=lambda: rows[0] if rows else None
+        )
+    )
+
+
+def _sql(call):
+    return str(call.args[0].compile(dialect=postgresql.dialect()))
+
+
 @pytest.mark.asyncio
 async def test_mark_as_read():
     mock_db = AsyncMock()
-    notif_id = str(uuid.uuid4())
-    
-    mock_notif = MagicMock()
-    mock_notif.id = uuid.UUID(notif_id)
-    mock_notif.is_read = False
-    
-    mock_db.execute.return_value = MagicMock(scalar_one_or_none=lambda: mock_notif)
-    
-    result = await NotificationService.mark_as_read(mock_db, notif_id)
-    
-    assert result.is_read == True
+    notif_id = uuid.uuid4()
+    mock_db.execute.return_value = _marked(
+        [{"id": notif_id, "recipient_id": uuid.uuid4(), "is_read": True}]
+    )
+
+    result = await NotificationService.mark_as_read(mock_db, str(notif_id))
+
+    assert result["is_read"] == True
+    # One UPDATE that also maintains the unread counter and version, no SELECT or refresh
+    mock_db.execute.assert_awaited_once()
+    statement = _sql(mock_db.execute.await_args)
+    assert (
+        "UPDATE notifications" in statement
+        and "UPDATE notification_counters" in statement
+    )
     assert mock_db.commit.called
+
+
+@pytest.mark.asyncio
+async def test_mark_as_read_when_already_read_does_not_commit():
+    mock_db = AsyncMock()
+    notif_id = uuid.uuid4()
+    mock_db.execute.side_effect = [
+        _marked([]),
+        _marked([{"id": notif_id, "is_read": True}]),
+    ]
+
+    result = await NotificationService.mark_as_read(mock_db, str(notif_id))
+
+    assert result["is_read"] == True
+    assert not mock_db.commit.called
+
+
+@pytest.mark.asyncio
+async def test_mark_all_as_read_is_one_statement():
+    mock_db = AsyncMock()
+    user_id = uuid.uuid4()
+    mock_db.execute.return_value = _marked(
+        [{"id": uuid.uuid4(), "recipient_id": user_id}] * 3
+    )
+
+    assert await NotificationService.mark_all_as_read(mock_db, user_id) == 3
+
+    mock_db.execute.assert_awaited_once()
+    statement = _sql(mock_db.execute.await_args)
+    # Only rows still unread are changed, so the counter drops by what was actually marked
+    assert "notifications.is_read = false" in statement
+    assert "notification_counters.unread - marked_per_user.marked" in statement
+    assert "bump_versions" in statement
+    assert mock_db.commit.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_mark_many_as_read_with_nothing_unread_skips_commit():
+    mock_db = AsyncMock()
+    mock_db.execute.return_value = _marked([])
+
+    assert (
+        await NotificationService.mark_many_as_read(
+            mock_db, [uuid.uuid4(), uuid.uuid4()]
+        )
+        == 0
+    )
+    assert not mock_db.commit.called
+
+
+@pytest.mark.asyncio
+async def test_get_unread_count_defaults_to_zero():
+    mock_db = AsyncMock()
+    mock_db.execute.return_value = MagicMock(scalar_one_or_none=lambda: None)
+
+    assert await NotificationService.get_unread_count(mock_db, uuid.uuid4()) == 0
+
+
+@pytest.mark.asyncio
+async def test_create_notification_inserts_in_one_statement():
+    mock_db = AsyncMock()
+    recipient_id = uuid.uuid4()
+
+    await NotificationService.create_notification(
+        mock_db, str(recipient_id), UserRole.grandchild, "test_event", "Test message"
+    )
+
+    # The recipient's stream-order lock, then one INSERT (with the version bump as a CTE)
+    lock, insert = mock_db.execute.await_args_list
+    assert "pg_advisory_xact_lock" in str(lock.args[0]) and "hashtext" in str(
+        lock.args[0]
+    )
+    assert mock_db.commit.await_count == 1
+    statement = str(insert.args[0].compile(dialect=postgresql.dialect()))
+    assert statement.count("INSERT INTO notifications") == 1
+    assert "bump_versions" in statement
+    # Counters grow by the rows actually inserted
+    assert (
+        "count_unread" in statement
+        and "FROM inserted GROUP BY inserted.recipient_id" in statement
+    )
+    # Inserted rows are announced to open streams when the transaction commits
+    assert "pg_notify" in statement
+
+
+@pytest.mark.asyncio
+async def test_get_for_user_is_keyset_paginated():
+    mock_db = AsyncMock()
+    mock_db.execute.return_value = MagicMock(mappings=list)
+    before = (datetime.datetime(2026, 10, 1, 12, 0), uuid.uuid4())
+
+    await NotificationService.get_for_user(
+        mock_db, uuid.uuid4(), "read", limit=51, before=before
+    )
+
+    statement = _sql(mock_db.execute.await_args)
+    assert "(notifications.created_at, notifications.id) < (" in statement
+    assert "ORDER BY notifications.created_at DESC, notifications.id DESC" in statement
+    assert "notifications.is_read = true" in statement
+    assert "LIMIT" in statement
+
+
+def test_feed_cursor_round_trips():
+    row = {
+        "created_at": datetime.datetime(2026, 10, 1, 12, 0, 0, 123456),
+        "id": uuid.uuid4(),
+    }
+
+    assert NotificationService.decode_cursor(
+        NotificationService.encode_cursor(row)
+    ) == (row["created_at"], row["id"])
+    with pytest.raises(ValueError):
+        NotificationService.decode_cursor("not-a-cursor")
@@ -0,0 +1,313 @@
+import asyncio
+import datetime
+import os
+import uuid
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app import database
+from app.database import Base
+from app.shared.gifts.models import utcnow
+from app.shared.notifications import stream
+from app.shared.notifications.service import NotificationService
+from app.shared.notifications.stream import (
+    RESYNC,
+    SUBSCRIBER_QUEUE_SIZE,
+    NotificationHub,
+    NotificationListener,
+)
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+
+def _notification(user_id, message="m", seq=1):
+    return {
+        "id": uuid.uuid4(),
+        "recipient_id": user_id,
+        "role": "grandchild",
+        "event_type": "e",
+        "message": message,
+        "is_read": False,
+        "action_url": None,
+        "created_at": utcnow(),
+        "seq": seq,
+    }
+
+
+def _payload(notification):
+    # As relayed from pg_notify
+    return {
+        **notification,
+        "id": str(notification["id"]),
+        "created_at": notification["created_at"].isoformat(),
+    }
+
+
+def test_hub_routes_by_recipient_and_resyncs_slow_streams():
+    hub = NotificationHub()
+    alice, bob = uuid.uuid4(), uuid.uuid4()
+    queue = hub.subscribe(alice)
+
+    hub.publish(_notification(bob))
+    assert queue.empty()
+
+    for _ in range(SUBSCRIBER_QUEUE_SIZE + 1):
+        hub.publish({"id": str(uuid.uuid4()), "recipient_id": str(alice)})
+    # The overflowing backlog is replaced by a single reload
+    assert queue.qsize() == 1 and queue.get_nowait() is RESYNC
+    assert hub.overflows == 1
+
+    hub.unsubscribe(alice, queue)
+    assert hub.stats()["streams"] == 0
+
+
+@pytest.mark.asyncio
+async def test_stream_replays_after_last_event_id_then_pushes_live_events():
+    hub = NotificationHub()
+    user_id = uuid.uuid4()
+    backlog = _notification(user_id, "missed", seq=5)
+    with patch.object(stream, "notification_hub", hub), patch.object(
+        stream, "load_after", AsyncMock(return_value=[backlog])
+    ) as load_after:
+        events = stream.notification_events(user_id, "4")
+        assert await events.__anext__() == b"retry: 3000\n\n"
+        assert (
+            await events.__anext__()
+            == b"id: 5\nevent: notification\ndata: %s\n\n" % stream.dumps(backlog)
+        )
+        load_after.assert_awaited_once_with(user_id, 4)
+
+        # Announced live, already sent by the backlog query: skipped
+        hub.publish(_payload(backlog))
+        live = _notification(user_id, "live", seq=6)
+        hub.publish(_payload(live))
+        chunk = (await events.__anext__()).decode()
+        await events.aclose()
+
+    assert chunk.startswith("id: 6\nevent: notification\ndata: {")
+    assert '"message":"live"' in chunk
+    assert hub.stats()["streams"] == 0
+
+
+@pytest.mark.asyncio
+async def test_idle_stream_sends_heartbeats_and_ends_at_max_lifetime():
+    hub = NotificationHub()
+    hub.heartbeat_seconds = 0.01
+    hub.max_stream_seconds = 0.05
+    with patch.object(stream, "notification_hub", hub), patch.object(
+        stream, "latest_key", AsyncMock(return_value=0)
+    ):
+        chunks = [chunk async for chunk in stream.notification_events(uuid.uuid4())]
+
+    assert chunks[0].startswith(b"retry:")
+    assert set(chunks[1:]) == {b": heartbeat\n\n"}
+
+
+@pytest.mark.asyncio
+async def test_reference_only_payload_is_loaded_from_the_database():
+    hub = NotificationHub()
+    user_id = uuid.uuid4()
+    large = _notification(user_id, "x" * 10_000, seq=8)
+    with patch.object(stream, "notification_hub", hub), patch.object(
+        stream, "latest_key", AsyncMock(return_value=7)
+    ), patch.object(
+        stream, "load_after", AsyncMock(return_value=[large])
+    ) as load_after:
+        events = stream.notification_events(user_id)
+        await events.__anext__()
+        # What pg_notify sends for rows over the payload limit
+        hub.publish({"id": str(large["id"]), "recipient_id": str(user_id)})
+        chunk = await events.__anext__()
+        await events.aclose()
+
+    assert chunk.startswith(b"id: 8\n")
+    # Resumed from the newest row committed when the stream opened
+    load_after.assert_awaited_once_with(user_id, 7)
+
+
+@pytest.mark.asyncio
+async def test_locally_published_rows_are_loaded_in_seq_order():
+    hub = NotificationHub()
+    user_id = uuid.uuid4()
+    # Committed in this order; published by two requests in the other order
+    first, second = _notification(user_id, "first", seq=3), _notification(
+        user_id, "second", seq=4
+    )
+    with patch.object(stream, "notification_hub", hub), patch.object(
+        stream, "latest_key", AsyncMock(return_value=2)
+    ), patch.object(
+        stream, "load_after", AsyncMock(return_value=[first, second])
+    ) as load_after:
+        events = stream.notification_events(user_id)
+        await events.__anext__()
+        # Rows built by the writer carry no seq
+        hub.publish_local(
+            [{key: value for key, value in second.items() if key != "seq"}]
+        )
+        chunks = [await events.__anext__(), await events.__anext__()]
+        await events.aclose()
+
+    assert [chunk.split(b"\n")[0] for chunk in chunks] == [b"id: 3", b"id: 4"]
+    load_after.assert_awaited_once_with(user_id, 2)
+
+
+@pytest.mark.asyncio
+async def test_key_of_accepts_seq_event_ids_without_a_query():
+    assert await stream.key_of(uuid.uuid4(), "42") == 42
+    assert await stream.key_of(uuid.uuid4(), "not-an-id") is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+async def test_listener_relays_notifications_committed_on_another_connection():
+    engine = create_async_engine(TEST_DATABASE_URL, poolclass=NullPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    hub = NotificationHub()
+    listener = NotificationListener(hub, engine)
+    user_id = uuid.uuid4()
+    queue = hub.subscribe(user_id)
+    listener.start()
+    try:
+        for _ in range(50):
+            if hub.listening:
+                break
+            await asyncio.sleep(0.05)
+        assert hub.listening
+
+        async with AsyncSession(engine) as db:
+            await db.execute(
+                text(
+                    "INSERT INTO users (id, name, role) "
+                    "VALUES (:id, 'Stream test', 'grandchild')"
+                ),
+                {"id": user_id},
+            )
+            notification = _notification(user_id, "hello")
+            del notification["seq"]
+            notification_id = notification["id"]
+            await db.execute(NotificationService.build_insert([notification]))
+            # NOTIFY is delivered on commit only
+            await asyncio.sleep(0.1)
+            assert queue.empty()
+            await db.commit()
+
+        payload = await asyncio.wait_for(queue.get(), 5)
+        assert payload["id"] == str(notification_id)
+        assert payload["message"] == "hello"
+        assert isinstance(payload["seq"], int)
+    finally:
+        await listener.stop()
+        async with engine.begin() as conn:
+            await conn.execute(
+                text("DELETE FROM notifications WHERE recipient_id = :id"),
+                {"id": user_id},
+            )
+            await conn.execute(
+                text("DELETE FROM user_versions WHERE user_id = :id"), {"id": user_id}
+            )
+            await conn.execute(
+                text("DELETE FROM notification_counters WHERE user_id = :id"),
+                {"id": user_id},
+            )
+            await conn.execute(
+                text("DELETE FROM users WHERE id = :id"), {"id": user_id}
+            )
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+async def test_resume_follows_commit_order_not_created_at():
+    engine = create_async_engine(TEST_DATABASE_URL, poolclass=NullPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    user_id = uuid.uuid4()
+    now = utcnow()
+    try:
+        async with AsyncSession(engine) as db:
+            await db.execute(
+                text(
+                    "INSERT INTO users (id, name, role) "
+                    "VALUES (:id, 'Stream test', 'grandchild')"
+                ),
+                {"id": user_id},
+            )
+            await db.commit()
+
+        def row(message, created_at):
+            notification = {**_notification(user_id, message), "created_at": created_at}
+            del notification["seq"]
+            return notification
+
+        # An outbox row enqueued a minute ago (e.g. retried after backoff) commits after
+        # a newer one
+        async with AsyncSession(engine) as db:
+            await stream.lock_stream_order(db, [user_id])
+            await db.execute(NotificationService.build_insert([row("newer", now)]))
+            await db.commit()
+        async with AsyncSession(engine) as db:
+            await stream.lock_stream_order(db, [user_id])
+            await db.execute(
+                NotificationService.build_insert(
+                    [row("older", now - datetime.timedelta(minutes=1))]
+                )
+            )
+            await db.commit()
+
+        with patch.object(database, "AsyncSessionLocal", async_sessionmaker(engine)):
+            newer, older = await stream.load_after(user_id, 0)
+            assert (newer["message"], older["message"]) == ("newer", "older")
+            # A client that was sent "newer" still gets "older" on reconnect
+            assert await stream.key_of(user_id, str(newer["id"])) == newer["seq"]
+            assert [
+                n["message"] for n in await stream.load_after(user_id, newer["seq"])
+            ] == ["older"]
+            assert await stream.latest_key(user_id) == older["seq"]
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(
+                text("DELETE FROM notifications WHERE recipient_id = :id"),
+                {"id": user_id},
+            )
+            await conn.execute(
+                text("DELETE FROM user_versions WHERE user_id = :id"), {"id": user_id}
+            )
+            await conn.execute(
+                text("DELETE FROM notification_counters WHERE user_id = :id"),
+                {"id": user_id},
+            )
+            await conn.execute(
+                text("DELETE FROM users WHERE id = :id"), {"id": user_id}
+            )
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+async def test_stream_order_lock_only_holds_up_writers_to_the_same_recipient():
+    engine = create_async_engine(TEST_DATABASE_URL, poolclass=NullPool)
+    alice, bob, carol = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    try:
+        async with AsyncSession(engine) as holder, AsyncSession(engine) as other:
+            await stream.lock_stream_order(holder, [bob, alice])
+
+            # Other recipients go straight through
+            await asyncio.wait_for(stream.lock_stream_order(other, [carol]), 5)
+            await other.rollback()
+
+            # A batch sharing a recipient waits for the holder's commit
+            waiting = asyncio.create_task(
+                stream.lock_stream_order(other, [carol, alice])
+            )
+            await asyncio.sleep(0.2)
+            assert not waiting.done()
+            await holder.commit()
+            await asyncio.wait_for(waiting, 5)
+            await other.rollback()
+    finally:
+        await engine.dispose()
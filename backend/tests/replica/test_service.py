@@ -0,0 +1,126 @@
+import uuid
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi.routing import APIRoute
+from pydantic import ValidationError
+
+from app import database
+from app.config import Settings
+from app.shared.cache.backends import InMemoryBackend
+from app.shared.replica.service import RecentWrites, ReplicaMonitor
+
+
+@pytest.mark.asyncio
+async def test_monitor_without_replica_is_never_usable():
+    assert await ReplicaMonitor(None, max_lag_seconds=5).is_usable() is False
+
+
+@pytest.mark.asyncio
+async def test_monitor_rejects_lagging_replica_and_caches_the_check():
+    monitor = ReplicaMonitor(MagicMock(), max_lag_seconds=5, check_interval_seconds=60)
+    monitor._measure_lag = AsyncMock(return_value=12.5)
+
+    assert await monitor.is_usable() is False
+    assert await monitor.is_usable() is False
+    assert monitor._measure_lag.await_count == 1
+    assert monitor.stats()["lag_seconds"] == 12.5
+
+
+@pytest.mark.asyncio
+async def test_monitor_falls_back_when_replica_unreachable():
+    monitor = ReplicaMonitor(
+        MagicMock(), max_lag_seconds=5, check_interval_seconds=0.001
+    )
+    monitor._measure_lag = AsyncMock(side_effect=OSError("connection refused"))
+
+    assert await monitor.is_usable() is False
+    assert monitor.errors == 1
+
+    monitor._measure_lag = AsyncMock(return_value=0.2)
+    monitor.checked_at -= 1
+    assert await monitor.is_usable() is True
+
+
+@pytest.mark.asyncio
+async def test_recent_writes_marks_users_for_the_window():
+    writes = RecentWrites(InMemoryBackend(), window_seconds=30)
+    writer, other = uuid.uuid4(), uuid.uuid4()
+
+    await writes.mark(writer, writer)
+
+    assert await writes.is_recent(str(writer)) is True
+    assert await writes.is_recent(str(other)) is False
+    assert await writes.is_recent(None) is False
+
+
+@pytest.mark.asyncio
+async def test_recent_writes_prefers_primary_when_backend_fails():
+    backend = MagicMock()
+    backend.get = AsyncMock(side_effect=ConnectionError("redis down"))
+
+    assert await RecentWrites(backend, window_seconds=30).is_recent("someone") is True
+
+
+def test_window_must_cover_tolerated_lag():
+    with pytest.raises(ValidationError):
+        Settings(
+            database_url="postgresql+asyncpg://u:p@localhost/x",
+            database_replica_url="postgresql+asyncpg://u:p@replica/x",
+            db_replica_max_lag_seconds=10,
+            db_read_your_writes_seconds=2,
+        )
+
+
+@pytest.mark.asyncio
+async def test_get_read_db_routes_recent_writers_to_primary(monkeypatch):
+    primary, replica = MagicMock(name="primary"), MagicMock(name="replica")
+    for factory in (primary, replica):
+        factory.return_value.__aenter__ = AsyncMock(return_value=factory)
+        factory.return_value.__aexit__ = AsyncMock(return_value=False)
+        factory.close = AsyncMock()
+    monkeypatch.setattr(database, "get_engine", MagicMock())
+    monkeypatch.setattr(database, "AsyncSessionLocal", primary)
+    monkeypatch.setattr(database, "ReadSessionLocal", replica)
+    monkeypatch.setattr(
+        database.replica_monitor, "is_usable", AsyncMock(return_value=True)
+    )
+    writes = RecentWrites(InMemoryBackend(), window_seconds=30)
+    monkeypatch.setattr(database, "recent_writes", writes)
+    writer = uuid.uuid4()
+    await writes.mark(writer)
+
+    async def session_for(user_id):
+        if user_id is None:
+            return await anext(database.get_read_db())
+        return await anext(database.get_user_read_db(user_id))
+
+    assert await session_for(writer) is primary
+    assert await session_for(uuid.uuid4()) is replica
+    assert await session_for(None) is replica
+
+
+def _api_routes(routes):
+    for route in routes:
+        if isinstance(route, APIRoute):
+            yield route
+        elif hasattr(route, "original_router"):
+            # Newer FastAPI versions keep each included router as a single entry
+            yield from _api_routes(route.original_router.routes)
+
+
+def test_user_scoped_read_routes_take_their_user_id():
+    from app.main import create_app
+
+    app = create_app(Settings(database_url="postgresql+asyncpg://u:p@localhost/x"))
+    routes = list(_api_routes(app.routes))
+    assert any(route.path == "/simulation/portfolio/{user_id}" for route in routes)
+    for route in routes:
+        dependencies = {dep.call for dep in route.dependant.dependencies}
+        path_params = {param.name for param in route.dependant.path_params}
+        # A user's own reads must see their writes, so they never use the unscoped
+        # session
+        if database.get_read_db in dependencies:
+            assert "user_id" not in path_params, route.path
+        if database.get_user_read_db in dependencies:
+            assert "user_id" in path_params, route.path
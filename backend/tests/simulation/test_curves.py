@@ -0,0 +1,49 @@
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+
+from app.shared.gifts.schemas import RiskProfile
+from app.shared.simulation import engine
+from app.shared.simulation.curves import UnitCurveCache, unit_curves
+from app.shared.simulation.service import SimulationService
+
+
+def test_unit_curves_are_lru_bounded():
+    cache = UnitCurveCache(max_entries=2)
+    first = cache.get(0.09, 1, 12)
+    cache.get(0.12, 1, 12)
+    assert cache.get(0.09, 1, 12) is first
+    cache.get(0.06, 1, 12)
+
+    # 0.12 was least recently used
+    assert cache.stats() == {
+        "entries": 2,
+        "max_entries": 2,
+        "hits": 1,
+        "misses": 3,
+        "hit_ratio": 0.25,
+        "evictions": 1,
+    }
+    assert list(first) == pytest.approx([1.0, 1.09])
+    with pytest.raises(ValueError):
+        first[0] = 2.0
+
+
+def test_repeated_projections_reuse_unit_curves():
+    unit_curves.clear()
+    requests = [
+        (Decimal(5000), RiskProfile.Balanced, 15),
+        (Decimal(10000), RiskProfile.Balanced, 15),
+    ]
+    expected = SimulationService.project_many(requests)
+
+    with patch.object(engine, "unit_curve", wraps=engine.unit_curve) as compounding:
+        again = SimulationService.project_many(requests)
+        scaled = SimulationService.project_many(
+            [(Decimal(7500), RiskProfile.Balanced, 15)]
+        )
+
+    assert compounding.call_count == 0
+    assert again == expected
+    assert scaled[0][-1]["value"] == round(Decimal(7500) * Decimal("1.09") ** 15, 2)
@@ -0,0 +1,68 @@
+import datetime
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from app.shared.gifts.schemas import RiskProfile
+from app.shared.simulation.engine import lttb
+from app.shared.simulation.history import HistoryStore, generate_history
+from app.shared.simulation.service import SimulationService
+
+
+def test_lttb_keeps_endpoints_and_extremes():
+    x = np.arange(10)
+    y = np.array([0, 1, 0, 9, 0, 1, 0, -7, 0, 1.0])
+
+    assert lttb(x, y, 5).tolist() == [0, 2, 3, 7, 9]
+    assert lttb(x, y, 4).tolist() == [0, 3, 7, 9]
+    assert lttb(x, y, 20).tolist() == list(range(10))
+
+
+def test_lttb_returns_requested_count_in_order():
+    y = np.cumsum(np.random.default_rng(0).normal(size=10_000))
+    selected = lttb(np.arange(10_000), y, 300)
+
+    assert len(selected) == 300
+    assert (np.diff(selected) > 0).all()
+    assert y.argmax() in selected and y.argmin() in selected
+
+
+def test_bundled_history_is_sorted_per_profile():
+    store = HistoryStore()
+    for profile in RiskProfile:
+        series = store.series(profile)
+        assert isinstance(series, np.memmap)
+        assert (np.diff(series["date"].astype("int64")) > 0).all()
+        assert series["value"][0] == 100.0
+
+
+@pytest.mark.asyncio
+async def test_history_range_is_inclusive_and_downsampled(tmp_path, monkeypatch):
+    generate_history(str(tmp_path), start="2024-01-01", end="2024-03-01")
+    monkeypatch.setattr(
+        "app.shared.simulation.service.history_store", HistoryStore(str(tmp_path))
+    )
+
+    january = await SimulationService.get_history(
+        RiskProfile.Growth,
+        datetime.date(2024, 1, 2),
+        datetime.date(2024, 1, 31),
+        points=5_000,
+    )
+    downsampled = await SimulationService.get_history(RiskProfile.Growth, points=10)
+
+    assert [p["date"] for p in january[:1] + january[-1:]] == [
+        datetime.date(2024, 1, 2),
+        datetime.date(2024, 1, 31),
+    ]
+    assert len(january) == 22
+    assert len(downsampled) == 10
+    assert downsampled[0] == {
+        "date": datetime.date(2024, 1, 1),
+        "value": Decimal("100.00"),
+    }
+    with pytest.raises(ValueError):
+        await SimulationService.get_history(
+            RiskProfile.Growth, datetime.date(2024, 2, 1), datetime.date(2024, 1, 1)
+        )
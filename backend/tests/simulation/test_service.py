@@ -1,30 +1,188 @@
+import uuid
 from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock
+
 import pytest
-from app.shared.utils import convert_usd_to_inr, convert_inr_to_usd
+
+from app.shared.gifts.schemas import Currency, RiskProfile
+from app.shared.simulation.montecarlo import MonteCarloRunner
 from app.shared.simulation.service import SimulationService
-from app.shared.gifts.schemas import RiskProfile
+from app.shared.utils import convert_amount, convert_inr_to_usd, convert_usd_to_inr
+
 
 def test_fx_conversion():
-    usd = Decimal("100")
+    usd = Decimal(100)
     inr = convert_usd_to_inr(usd)
     assert inr == Decimal("8350.0")
-    
+
     back_to_usd = convert_inr_to_usd(inr)
     assert back_to_usd == usd
 
+
+def test_convert_amount():
+    assert convert_amount(Decimal(100), "USD", "INR") == Decimal("8350.0")
+    assert convert_amount(Decimal(8350), "INR", "USD") == Decimal(100)
+    assert convert_amount(Decimal(5), "INR", "INR") == Decimal(5)
+    with pytest.raises(ValueError):
+        convert_amount(Decimal(5), "USD", "EUR")
+
+
 @pytest.mark.asyncio
 async def test_growth_projection():
-    initial = Decimal("1000")
+    initial = Decimal(1000)
     # Balanced is 9% CAGR
-    projection = await SimulationService.get_growth_projection(initial, RiskProfile.Balanced, years=1)
-    
-    assert len(projection) == 2 # Year 0 and Year 1
+    projection = await SimulationService.get_growth_projection(
+        initial, RiskProfile.Balanced, years=1
+    )
+
+    assert len(projection) == 2  # Year 0 and Year 1
     assert projection[0]["value"] == initial
     # Year 1: 1000 * 1.09 = 1090
     assert projection[1]["value"] == Decimal("1090.00")
 
+
+def _decimal_projection(initial, rate, years):
+    # The yearly Decimal loop the NumPy engine replaced
+    points, current = [{"year": 0, "value": round(initial, 2)}], initial
+    for year in range(1, years + 1):
+        current = current * (1 + rate)
+        points.append({"year": year, "value": round(current, 2)})
+    return points
+
+
+def test_vectorized_projection_matches_decimal_loop():
+    requests = [
+        (Decimal(corpus), profile, years)
+        for corpus in (
+            "0.01",
+            "1",
+            "999.99",
+            "1000",
+            "25000.50",
+            "123456.78",
+            "5000000",
+        )
+        for profile in RiskProfile
+        for years in (0, 1, 7, 15)
+    ]
+    projections = SimulationService.project_many(requests)
+
+    for (corpus, profile, years), projection in zip(requests, projections):
+        expected = _decimal_projection(
+            corpus, SimulationService.annual_rate(profile), years
+        )
+        assert [(p["year"], p["value"]) for p in projection] == [
+            (p["year"], p["value"]) for p in expected
+        ]
+
+
+@pytest.mark.asyncio
+async def test_monthly_projection_lands_on_yearly_values():
+    monthly = await SimulationService.get_growth_projection(
+        Decimal(1000), RiskProfile.Growth, years=15, step_months=1
+    )
+    yearly = await SimulationService.get_growth_projection(
+        Decimal(1000), RiskProfile.Growth, years=15
+    )
+
+    assert len(monthly) == 15 * 12 + 1
+    assert monthly[6]["label"] == "Month 6"
+    assert [p for p in monthly if p["month"] % 12 == 0] == yearly
+
+
+def test_projection_step_must_divide_a_year():
+    with pytest.raises(ValueError):
+        SimulationService.project_many(
+            [(Decimal(1000), RiskProfile.Balanced, 1)], step_months=5
+        )
+
+
+@pytest.mark.asyncio
+async def test_portfolio_projection_is_one_query_in_one_currency():
+    mock_db = AsyncMock()
+    rows = [
+        {
+            "id": uuid.uuid4(),
+            "grandchild_id": uuid.uuid4(),
+            "grandchild_name": "Arjun",
+            "corpus": Decimal(100),
+            "currency": "USD",
+            "risk_profile": "Growth",
+        },
+        {
+            "id": uuid.uuid4(),
+            "grandchild_id": uuid.uuid4(),
+            "grandchild_name": "Meera",
+            "corpus": Decimal(16700),
+            "currency": "INR",
+            "risk_profile": "Balanced",
+        },
+    ]
+    mock_db.execute.return_value = MagicMock(
+        mappings=lambda: MagicMock(all=lambda: rows)
+    )
+
+    portfolio = await SimulationService.get_portfolio_projection(
+        mock_db, uuid.uuid4(), Currency.USD, years=2
+    )
+
+    assert mock_db.execute.call_count == 1
+    growth, balanced = portfolio["gifts"]
+    assert [p["value"] for p in growth["series"]] == [
+        Decimal("100.00"),
+        Decimal("112.00"),
+        Decimal("125.44"),
+    ]
+    assert [p["value"] for p in balanced["series"]] == [
+        Decimal("200.00"),
+        Decimal("218.00"),
+        Decimal("237.62"),
+    ]
+    assert [p["value"] for p in portfolio["total"]] == [
+        Decimal("300.00"),
+        Decimal("330.00"),
+        Decimal("363.06"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_monte_carlo_bands_are_reproducible_and_ordered():
+    bands = await SimulationService.get_monte_carlo_bands(
+        Decimal(1000), RiskProfile.Growth, years=5, paths=5_000, seed=3
+    )
+    again = await SimulationService.get_monte_carlo_bands(
+        Decimal(1000), RiskProfile.Growth, years=5, paths=5_000, seed=3
+    )
+    other = await SimulationService.get_monte_carlo_bands(
+        Decimal(1000), RiskProfile.Growth, years=5, paths=5_000, seed=4
+    )
+    deterministic = await SimulationService.get_growth_projection(
+        Decimal(1000), RiskProfile.Growth, years=5
+    )
+
+    assert bands == again
+    assert bands != other
+    assert len(bands) == 5 * 12 + 1
+    assert bands[0]["p10"] == bands[0]["p50"] == bands[0]["p90"] == Decimal("1000.00")
+    assert all(point["p10"] < point["p50"] < point["p90"] for point in bands[1:])
+    # Paths compound at the profile's CAGR in the median
+    assert abs(bands[-1]["p50"] / deterministic[-1]["value"] - 1) < Decimal("0.02")
+
+
+@pytest.mark.asyncio
+async def test_monte_carlo_process_pool_matches_serial_run():
+    serial = MonteCarloRunner()
+    pooled = MonteCarloRunner(workers=2, pool_min_paths=1)
+    try:
+        expected = await serial.run(0.09, 0.10, 24, 5_000, 11)
+        assert (await pooled.run(0.09, 0.10, 24, 5_000, 11) == expected).all()
+        assert pooled.stats()["pooled_runs"] == 1
+    finally:
+        pooled.close()
+
+
 def test_calculate_cagr():
-    initial = Decimal("1000")
-    final = Decimal("1210") # (1.1)^2 * 1000
+    initial = Decimal(1000)
+    final = Decimal(1210)  # (1.1)^2 * 1000
     cagr = SimulationService.calculate_cagr(initial, final, 2)
     assert round(cagr, 2) == Decimal("0.10")
@@ -0,0 +1,24 @@
+import os
+
+from benchmarks.bench_startup import import_times
+
+# Best-of-three cumulative import time of app.main; override on slow CI runners
+IMPORT_TIME_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "1200"))
+
+
+def test_heavy_dependencies_load_lazily():
+    _, loaded = import_times()
+
+    assert "app.main" in loaded
+    assert "openai" not in loaded
+    assert "numpy" not in loaded
+
+
+def test_app_import_stays_within_budget():
+    fastest_ms = min(import_times()[0]["app.main"] for _ in range(3)) / 1000
+
+    assert fastest_ms <= IMPORT_TIME_BUDGET_MS, (
+        f"import app.main took {fastest_ms:.0f}ms, over the "
+        f"{IMPORT_TIME_BUDGET_MS:.0f}ms budget; "
+        "run `python -m benchmarks.bench_startup` to find the slow modules"
+    )
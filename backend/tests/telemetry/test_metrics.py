@@ -0,0 +1,73 @@
+import httpx
+import pytest
+
+from app.config import Settings
+from app.main import create_app
+from app.shared.telemetry.metrics import (
+    OPENAI_ERRORS,
+    OPENAI_REQUEST_DURATION,
+    Counter,
+    Histogram,
+    Registry,
+    track_openai,
+)
+
+app = create_app(Settings(database_url="postgresql+asyncpg://u:p@localhost/x"))
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    latency = registry.register(
+        Histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+    )
+    for value in (0.05, 0.5, 3.0):
+        latency.observe("/gifts/{gift_id}", value=value)
+
+    lines = registry.render().splitlines()
+
+    assert "# TYPE latency_seconds histogram" in lines
+    assert 'latency_seconds_bucket{route="/gifts/{gift_id}",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{route="/gifts/{gift_id}",le="1.0"} 2' in lines
+    assert 'latency_seconds_bucket{route="/gifts/{gift_id}",le="+Inf"} 3' in lines
+    assert 'latency_seconds_count{route="/gifts/{gift_id}"} 3' in lines
+
+
+def test_label_values_are_escaped():
+    registry = Registry()
+    registry.register(Counter("errors_total", "Errors.", ("error",))).inc(
+        'bad "quote"\n'
+    )
+
+    assert 'errors_total{error="bad \\"quote\\"\\n"} 1' in registry.render()
+
+
+def test_track_openai_counts_errors_and_latency():
+    before = sum(OPENAI_REQUEST_DURATION.series.get(("chat",), [[0]])[0])
+
+    with pytest.raises(TimeoutError), track_openai("chat"):
+        raise TimeoutError()
+
+    assert OPENAI_ERRORS.values[("chat", "TimeoutError")] >= 1
+    assert sum(OPENAI_REQUEST_DURATION.series[("chat",)][0]) == before + 1
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_scrapes_request_metrics():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        await client.get("/")
+        await client.get("/no-such-route/123")
+        response = await client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert 'http_requests_total{method="GET",route="/",status="200"}' in body
+    assert 'http_requests_total{method="GET",route="<unmatched>",status="404"}' in body
+    assert (
+        'http_request_duration_seconds_bucket{method="GET",route="/",le="+Inf"}' in body
+    )
+    # The scrape itself is in flight while rendering
+    assert "http_requests_in_flight 1" in body
+    assert 'db_pool_size{pool="primary"} 5' in body
+    assert "# TYPE openai_request_duration_seconds histogram" in body
@@ -0,0 +1,153 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from pydantic import ValidationError
+from sqlalchemy import exc
+
+from app import database
+from app.config import Settings
+from app.database import build_engine
+from app.shared.telemetry.pool import InstrumentedPool, PoolMetrics, _summary
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+
+def test_settings_from_env_coerces_types():
+    settings = Settings.from_env(
+        {
+            "DATABASE_URL": "postgresql+asyncpg://u:p@localhost/x",
+            "DB_POOL_SIZE": "12",
+            "DB_ECHO": "true",
+            "DB_POOL_PRE_PING": "1",
+            "DB_STATEMENT_CACHE_SIZE": "0",
+            "UNRELATED": "ignored",
+        }
+    )
+
+    assert settings.db_pool_size == 12
+    assert settings.db_echo is True
+    assert settings.db_pool_pre_ping is True
+    assert settings.db_statement_cache_size == 0
+    assert settings.db_max_overflow == 10
+
+
+def test_settings_reject_invalid_pool_size():
+    with pytest.raises(ValidationError):
+        Settings.from_env(
+            {
+                "DATABASE_URL": "postgresql+asyncpg://u:p@localhost/x",
+                "DB_POOL_SIZE": "0",
+            }
+        )
+
+
+def test_engine_built_from_settings():
+    settings = Settings(
+        database_url="postgresql+asyncpg://u:p@localhost/x",
+        db_pool_size=7,
+        db_max_overflow=3,
+        db_statement_cache_size=0,
+    )
+    metrics = PoolMetrics()
+
+    engine = build_engine(settings, metrics)
+
+    assert isinstance(engine.pool, InstrumentedPool)
+    assert engine.pool.metrics is metrics
+    assert engine.pool.size() == 7
+    assert engine.echo is False
+    assert engine.url.query["prepared_statement_cache_size"] == "0"
+    stats = metrics.stats(engine)
+    assert (
+        stats["max_overflow"] == 3
+        and stats["checked_out"] == 0
+        and stats["wait"]["count"] == 0
+    )
+
+
+def test_app_builds_without_database_environment():
+    env = {key: value for key, value in os.environ.items() if key != "DATABASE_URL"}
+    script = (
+        "from app import database\n"
+        "from app.config import Settings\n"
+        "from app.main import create_app\n"
+        "create_app(Settings(database_url='postgresql+asyncpg://u:p@localhost/explicit'))\n"
+        "assert database.engine is None\n"
+        "assert database.get_engine().url.database == 'explicit'\n"
+    )
+    # Run from an empty directory so no .env supplies DATABASE_URL
+    backend = os.path.dirname(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        env={**env, "PYTHONPATH": backend},
+        cwd=os.path.join(backend, "tests"),
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+
+    assert result.returncode == 0, result.stderr
+
+
+@pytest.mark.asyncio
+async def test_configure_disposes_replaced_engines(monkeypatch):
+    for name in ("settings", "engine", "replica_engine"):
+        monkeypatch.setattr(database, name, None)
+    for factory in (database.AsyncSessionLocal, database.ReadSessionLocal):
+        monkeypatch.setitem(factory.kw, "bind", factory.kw.get("bind"))
+    database.configure(
+        Settings(database_url="postgresql+asyncpg://u:p@localhost/first")
+    )
+    first = database.get_engine()
+    first_pool = first.pool
+
+    database.configure(
+        Settings(database_url="postgresql+asyncpg://u:p@localhost/second")
+    )
+    assert database.engine is None
+    await database.dispose()
+
+    # dispose() swaps in a fresh, empty pool
+    assert first.pool is not first_pool
+    assert database.get_engine().url.database == "second"
+    await database.dispose()
+
+
+def test_summary_percentiles():
+    summary = _summary(list(range(1, 101)))
+
+    assert summary["count"] == 100
+    assert summary["p50_ms"] == 51
+    assert summary["p95_ms"] == 96
+    assert summary["max_ms"] == 100
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+async def test_pool_metrics_against_database():
+    metrics = PoolMetrics()
+    engine = build_engine(
+        Settings(
+            database_url=TEST_DATABASE_URL,
+            db_pool_size=1,
+            db_max_overflow=0,
+            db_pool_timeout=0.2,
+        ),
+        metrics,
+    )
+    try:
+        conn = await engine.connect()
+        with pytest.raises(exc.TimeoutError):
+            await engine.connect()
+        stats = metrics.stats(engine)
+        await conn.close()
+    finally:
+        await engine.dispose()
+
+    assert stats["checked_out"] == 1
+    assert stats["connects"] == 1 and stats["connect"]["count"] == 1
+    assert stats["checkouts"] == 1 and stats["timeouts"] == 1
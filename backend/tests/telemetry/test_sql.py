@@ -0,0 +1,115 @@
+import logging
+import os
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.shared.telemetry import sql
+from app.shared.telemetry.middleware import SQLInstrumentationMiddleware
+from app.shared.telemetry.sql import (
+    RequestSQLStats,
+    current_stats,
+    instrument_engine,
+    sql_metrics,
+    start_request,
+    statement_shape,
+)
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+
+def test_statement_shape_collapses_bind_lists():
+    assert (
+        statement_shape("SELECT * FROM gifts\nWHERE id IN ($1, $2,  $3)")
+        == "SELECT * FROM gifts WHERE id IN ($?)"
+    )
+    assert statement_shape("SELECT 1 WHERE a = $1") == statement_shape(
+        "SELECT 1   WHERE a = $7"
+    )
+
+
+def test_request_stats_track_slowest_and_repeats():
+    stats = RequestSQLStats()
+    for elapsed in (1.0, 4.0, 2.0):
+        stats.record("SELECT * FROM milestones WHERE gift_id = $1", elapsed)
+    stats.record("UPDATE gifts SET status = $1", 0.5)
+
+    assert stats.statements == 4
+    assert stats.db_time_ms == 7.5
+    assert stats.slowest_ms == 4.0
+    assert stats.repeated(2) == {"SELECT * FROM milestones WHERE gift_id = $?": 3}
+    assert (
+        stats.server_timing()
+        == 'db;dur=7.500;desc="4 statements", db-slowest;dur=4.000'
+    )
+
+
+def build_app(statements: int) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: str):
+        for _ in range(statements):
+            current_stats().record("SELECT * FROM items WHERE id = $1", 1.0)
+        return {"id": item_id}
+
+    app.add_middleware(SQLInstrumentationMiddleware, repeat_threshold=3)
+    return app
+
+
+@pytest.mark.asyncio
+async def test_middleware_emits_server_timing_and_route_metrics():
+    sql_metrics.routes.clear()
+    transport = httpx.ASGITransport(app=build_app(statements=2))
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get("/items/a")
+        await client.get("/items/b")
+
+    assert (
+        response.headers["server-timing"]
+        == 'db;dur=2.000;desc="2 statements", db-slowest;dur=1.000'
+    )
+    route = sql_metrics.stats()["/items/{item_id}"]
+    assert route["requests"] == 2
+    assert route["statements"] == 4
+    assert route["repeat_warnings"] == 0
+
+
+@pytest.mark.asyncio
+async def test_middleware_warns_on_repeated_statement_shape(caplog):
+    sql_metrics.routes.clear()
+    transport = httpx.ASGITransport(app=build_app(statements=4))
+    with caplog.at_level(logging.WARNING, logger="app.shared.telemetry.middleware"):
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            await client.get("/items/a")
+
+    assert "Possible N+1 on GET /items/{item_id}: statement ran 4 times" in caplog.text
+    assert sql_metrics.stats()["/items/{item_id}"]["repeat_warnings"] == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+async def test_failed_statements_are_timed_without_leaking_start_times():
+    # One pooled connection, so a leaked start time would pair with the next statement
+    engine = create_async_engine(TEST_DATABASE_URL, pool_size=1, max_overflow=0)
+    instrument_engine(engine)
+    stats = start_request()
+    try:
+        async with engine.connect() as conn:
+            with pytest.raises(DBAPIError):
+                await conn.execute(text("SELECT 1 / 0"))
+            await conn.rollback()
+            await conn.execute(text("SELECT 1"))
+            assert not conn.sync_connection.info.get("query_started")
+
+        assert stats.statements == 2
+        assert stats.shapes["SELECT 1 / 0"] == 1
+    finally:
+        sql._current.set(None)
+        await engine.dispose()
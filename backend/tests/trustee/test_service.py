@@ -1,40 +1,95 @@
-import pytest
+import uuid
 from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
 from app.modules.trustee.service import TrusteeService
-from app.shared.gifts.schemas import MilestoneStatus, GiftStatus
-import uuid
+from app.shared.gifts.schemas import GiftStatus, MilestoneStatus
+from app.shared.gifts.state_machine import StateMachineError
+
 
 @pytest.mark.asyncio
-@patch("app.shared.notifications.service.NotificationService.create_notification", new_callable=AsyncMock)
+@patch("app.shared.notifications.outbox.OutboxService.enqueue", new_callable=AsyncMock)
 async def test_auto_approval_logic(mock_notify):
     mock_db = AsyncMock()
     milestone_id = str(uuid.uuid4())
     gift_id = str(uuid.uuid4())
     grandchild_id = uuid.uuid4()
     grandparent_id = uuid.uuid4()
-    
+
     mock_milestone = MagicMock()
     mock_milestone.id = uuid.UUID(milestone_id)
     mock_milestone.gift_id = uuid.UUID(gift_id)
     mock_milestone.status = MilestoneStatus.Pending
     mock_milestone.type = "Graduation"
-    
+
     mock_gift = MagicMock()
     mock_gift.id = uuid.UUID(gift_id)
     mock_gift.status = GiftStatus.Active
     mock_gift.grandchild_id = grandchild_id
     mock_gift.grandparent_id = grandparent_id
-    
+
     # Mock database results
     mock_db.execute.side_effect = [
-        MagicMock(scalar_one_or_none=lambda: mock_milestone), # Milestone
-        MagicMock(scalar_one=lambda: mock_gift),             # Gift
-        MagicMock(scalars=lambda: MagicMock(all=lambda: [mock_milestone])) # All milestones
+        MagicMock(scalar_one_or_none=lambda: mock_milestone),  # Milestone
+        MagicMock(scalar_one=lambda: mock_gift),  # Gift
+        MagicMock(
+            scalars=lambda: MagicMock(all=lambda: [mock_milestone])
+        ),  # All milestones
+        MagicMock(
+            mappings=lambda: MagicMock(one_or_none=lambda: {"id": mock_gift.id})
+        ),  # Completion
     ]
-    
+
     result = await TrusteeService.process_milestone_submission(mock_db, milestone_id)
-    
+
     assert result.status == MilestoneStatus.Approved
-    assert mock_gift.status == GiftStatus.Completed
+    # Completed through the state machine's conditional UPDATE, which bumps both owners'
+    # versions and queues the gift_unlocked notifications in the same statement
+    completion = str(
+        mock_db.execute.await_args_list[3].args[0].compile(dialect=postgresql.dialect())
+    )
+    assert "UPDATE gifts SET status=" in completion
+    assert "bump_versions" in completion and "queue_notifications" in completion
+    assert mock_db.execute.await_count == 4
+    assert mock_gift.status == GiftStatus.Active
     assert mock_db.commit.called
-    assert mock_notify.call_count == 2
+    # Both owners are notified through the outbox, inside the approval transaction
+    mock_notify.assert_awaited_once()
+    notifications = mock_notify.await_args.args[1]
+    assert {n.recipient_id for n in notifications} == {grandchild_id, grandparent_id}
+    assert all(
+        n.dedup_key.startswith(f"milestone_approved:{milestone_id}:")
+        for n in notifications
+    )
+
+
+@pytest.mark.asyncio
+@patch("app.shared.notifications.outbox.OutboxService.enqueue", new_callable=AsyncMock)
+async def test_completion_lost_to_a_concurrent_change_rolls_back(mock_notify):
+    mock_db = AsyncMock()
+    mock_milestone = MagicMock(
+        id=uuid.uuid4(), gift_id=uuid.uuid4(), status=MilestoneStatus.Pending
+    )
+    mock_gift = MagicMock(id=mock_milestone.gift_id, status=GiftStatus.Active)
+    mock_db.execute.side_effect = [
+        MagicMock(scalar_one_or_none=lambda: mock_milestone),
+        MagicMock(scalar_one=lambda: mock_gift),
+        MagicMock(scalars=lambda: MagicMock(all=lambda: [mock_milestone])),
+        MagicMock(
+            mappings=lambda: MagicMock(one_or_none=lambda: None)
+        ),  # no longer Active
+        MagicMock(
+            scalar_one_or_none=lambda: "Completed"
+        ),  # completed by another approval
+    ]
+
+    with pytest.raises(StateMachineError):
+        await TrusteeService.process_milestone_submission(
+            mock_db, str(mock_milestone.id)
+        )
+
+    assert mock_db.rollback.called
+    assert not mock_db.commit.called
+    mock_notify.assert_not_awaited()
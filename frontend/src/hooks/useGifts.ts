@@ -1,6 +1,6 @@
 import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query';
 import api from '@/lib/api';
-import { Gift, GiftStatus, Milestone } from '@/types/gift';
+import { Gift, GiftRecord, GiftStatus, Milestone } from '@/types/gift';
 
 export const useGifts = (userId?: string, role?: 'grandparent' | 'grandchild' | 'trustee') => {
     const queryClient = useQueryClient();
@@ -31,7 +31,7 @@ export const useGifts = (userId?: string, role?: 'grandparent' | 'grandchild' |
     // Mutation to update gift status
     const updateStatusMutation = useMutation({
         mutationFn: async ({ giftId, status }: { giftId: string; status: GiftStatus }) => {
-            const response = await api.patch<Gift>(`/gifts/${giftId}/status?next_status=${status}`);
+            const response = await api.patch<GiftRecord>(`/gifts/${giftId}/status?next_status=${status}`);
             return response.data;
         },
         onSuccess: () => {
@@ -1,6 +1,6 @@
 import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query';
 import api from '@/lib/api';
-import { Notification } from '@/types/gift';
+import { Notification, UnreadCount } from '@/types/gift';
 
 export const useNotifications = (userId?: string) => {
     const queryClient = useQueryClient();
@@ -16,6 +16,18 @@ export const useNotifications = (userId?: string) => {
         refetchInterval: 5000, // Poll every 5 seconds for demo
     });
 
+    // The feed is paginated, so the badge reads the maintained counter instead of counting a page
+    const { data: unreadCount } = useQuery({
+        queryKey: ['notifications', userId, 'unread-count'],
+        queryFn: async () => {
+            if (!userId) return 0;
+            const response = await api.get<UnreadCount>(`/notifications/${userId}/unread-count`);
+            return response.data.unread;
+        },
+        enabled: !!userId,
+        refetchInterval: 5000,
+    });
+
     const markReadMutation = useMutation({
         mutationFn: async (notificationId: string) => {
             await api.patch(`/notifications/${notificationId}/read`);
@@ -29,6 +41,6 @@ export const useNotifications = (userId?: string) => {
         notifications: notifications || [],
         isLoading,
         markRead: markReadMutation.mutate,
-        unreadCount: notifications?.length || 0,
+        unreadCount: unreadCount || 0,
     };
 };
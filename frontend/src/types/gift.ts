@@ -72,6 +72,11 @@ export interface Gift {
   media_messages?: MediaMessage[];
 }
 
+// A gift's own columns, as returned by status updates (no milestones or media)
+export type GiftRecord = Omit<Gift, "milestones" | "media_messages"> & {
+  created_at?: string;
+};
+
 export interface Notification {
   id: string;
   recipient_id: string;
@@ -83,6 +88,11 @@ export interface Notification {
   created_at: string;
 }
 
+export interface UnreadCount {
+  user_id: string;
+  unread: number;
+}
+
 export interface VoiceParseDetails {
   grandchild_name?: string;
   corpus?: number;